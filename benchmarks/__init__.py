@@ -0,0 +1 @@
+"""Benchmarks for genruler, run from the repository root with `python -m benchmarks.<name>`."""
@@ -0,0 +1,61 @@
+"""Compare rules with many conjuncts in their written order and learned order.
+
+Usage:
+    python -m benchmarks.adaptive [--conjuncts 24] [--contexts 100000]
+"""
+
+import argparse
+
+import genruler
+from genruler.compiler import BACKENDS
+
+from .batch import measure
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--conjuncts", type=int, default=24)
+    parser.add_argument("--contexts", type=int, default=100000)
+    parser.add_argument("--repeat", type=int, default=3)
+    arguments = parser.parse_args()
+
+    # conditions on string fields costing more than those on numbers, and
+    # passing for most contexts, written before the selective one on "kind"
+    count = arguments.conjuncts - 1
+    conditions = [
+        (
+            f'(condition.in (string.lower (basic.field "s{i}")) ("a" "b" "c"))'
+            if i % 2
+            else f'(condition.ge (basic.field "n{i}") 0)'
+        )
+        for i in range(count)
+    ]
+    source = "(boolean.and {} {})".format(
+        " ".join(conditions), '(condition.equal (basic.field "kind") "rare")'
+    )
+    contexts = [
+        {
+            **{f"n{i}": i for i in range(count)},
+            **{f"s{i}": "A" for i in range(count)},
+            "kind": "rare" if i % 100 == 0 else "common",
+        }
+        for i in range(arguments.contexts)
+    ]
+
+    for backend in BACKENDS:
+        rule = genruler.compile(source, backend=backend, cache=None)
+        elapsed = measure(lambda: [rule(c) for c in contexts], arguments.repeat)
+        print(f"{backend:>9}: {elapsed:7.3f}s")
+
+    rule = genruler.compile(source, cache=None)
+    adaptive = rule.adaptive()
+    elapsed = measure(lambda: [adaptive(c) for c in contexts], arguments.repeat)
+    print(f"{'adaptive':>9}: {elapsed:7.3f}s  order {adaptive.export()['']}")
+
+    frozen = rule.adaptive(adaptive.export(), adapt=False)
+    elapsed = measure(lambda: [frozen(c) for c in contexts], arguments.repeat)
+    print(f"{'frozen':>9}: {elapsed:7.3f}s")
+
+
+if __name__ == "__main__":
+    main()
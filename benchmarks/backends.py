@@ -0,0 +1,48 @@
+"""Compare per-evaluation time of the compile backends.
+
+Usage:
+    python -m benchmarks.backends [--number 100000]
+"""
+
+import argparse
+import timeit
+
+import genruler
+from genruler.compiler import BACKENDS
+
+RULES = {
+    "field": ('(condition.equal (basic.field "name") "John")', {"name": "John"}),
+    "and": (
+        '(boolean.and (condition.gt (basic.field "age") 18) (condition.le (basic.field "age") 65) (condition.equal (basic.field "verified") (boolean.tautology)))',
+        {"age": 30, "verified": True},
+    ),
+    "nested": (
+        '(basic.context (basic.field "data") (condition.equal (string.lower (basic.context (basic.field "user") (basic.field "email"))) "john@example.com"))',
+        {"data": {"user": {"email": "John@Example.com"}}},
+    ),
+    "arithmetic": (
+        '(condition.gt (number.multiply (number.add (basic.field "price") (basic.field "tax")) 1.5) 100)',
+        {"price": 80, "tax": 10},
+    ),
+}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--number", type=int, default=100000)
+    arguments = parser.parse_args()
+
+    for name, (source, context) in RULES.items():
+        timings = []
+        for backend in BACKENDS:
+            rule = genruler.compile(source, backend=backend, cache=None)
+            elapsed = min(
+                timeit.repeat(lambda: rule(context), number=arguments.number, repeat=3)
+            )
+            timings.append(f"{backend} {elapsed / arguments.number * 1e9:8.0f}ns")
+
+        print(f"{name:>12}: {', '.join(timings)}")
+
+
+if __name__ == "__main__":
+    main()
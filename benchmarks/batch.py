@@ -0,0 +1,75 @@
+"""Compare evaluating contexts one by one with Rule.evaluate_many.
+
+Usage:
+    python -m benchmarks.batch [--contexts 1000000] [--repeat 3]
+"""
+
+import argparse
+import random
+import time
+from collections.abc import Callable
+from typing import Any
+
+import genruler
+from genruler.compiler import BACKENDS
+
+RULES = {
+    "field": '(condition.equal (basic.field "country") "MY")',
+    "and": '(boolean.and (condition.ge (basic.field "age") 18) (condition.lt (basic.field "age") 65) (condition.equal (basic.field "verified") (boolean.tautology)))',
+    "arithmetic": '(condition.gt (number.multiply (number.add (basic.field "price") (basic.field "tax")) 1.5) 100)',
+    "nested": '(boolean.or (condition.in (string.lower (basic.field "country")) ("us" "ca")) (condition.gt (basic.context (basic.field "order") (basic.field "total")) 100))',
+}
+
+
+def generate(count: int) -> list[dict[str, Any]]:
+    """Return random contexts with the fields the benchmark rules read."""
+    rng = random.Random(0)
+
+    return [
+        {
+            "age": rng.randint(1, 90),
+            "verified": rng.random() < 0.5,
+            "country": rng.choice(["MY", "US", "CA", "GB"]),
+            "price": rng.randint(1, 100),
+            "tax": rng.randint(1, 10),
+            "order": {"total": rng.randint(1, 200)},
+        }
+        for _ in range(count)
+    ]
+
+
+def measure(function: Callable[[], Any], repeat: int) -> float:
+    """Return the best wall time in seconds of calling the function."""
+    best = float("inf")
+
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        best = min(best, time.perf_counter() - start)
+
+    return best
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--contexts", type=int, default=1000000)
+    parser.add_argument("--repeat", type=int, default=3)
+    arguments = parser.parse_args()
+
+    contexts = generate(arguments.contexts)
+
+    for name, source in RULES.items():
+        for backend in BACKENDS:
+            rule = genruler.compile(source, backend=backend, cache=None)
+
+            loop = measure(lambda: [rule(c) for c in contexts], arguments.repeat)
+            many = measure(lambda: rule.evaluate_many(contexts), arguments.repeat)
+
+            print(
+                f"{name:>12} {backend:>8}: loop {loop:7.3f}s, "
+                f"evaluate_many {many:7.3f}s, {loop / many:5.2f}x"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,61 @@
+"""Compare evaluating rows with Rule.evaluate_many and columns with evaluate_columns.
+
+Requires NumPy.
+
+Usage:
+    python -m benchmarks.columnar [--rows 1000000] [--repeat 3]
+"""
+
+import argparse
+
+import numpy as np
+
+import genruler
+
+from .batch import measure
+
+RULES = {
+    "field": '(condition.equal (basic.field "country") "MY")',
+    "and": '(boolean.and (condition.ge (basic.field "age") 18) (condition.lt (basic.field "age") 65) (condition.equal (basic.field "verified") (boolean.tautology)))',
+    "arithmetic": '(condition.gt (number.multiply (number.add (basic.field "price") (basic.field "tax")) 1.5) 100)',
+    "in": '(boolean.or (condition.in (string.lower (basic.field "country")) ("us" "ca")) (condition.gt (basic.field "price") 90))',
+}
+
+
+def generate(count: int) -> dict[str, np.ndarray]:
+    """Return random columns with the fields the benchmark rules read."""
+    rng = np.random.default_rng(0)
+
+    return {
+        "age": rng.integers(1, 90, count),
+        "verified": rng.random(count) < 0.5,
+        "country": rng.choice(np.array(["MY", "US", "CA", "GB"]), count),
+        "price": rng.integers(1, 100, count),
+        "tax": rng.integers(1, 10, count),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=1000000)
+    parser.add_argument("--repeat", type=int, default=3)
+    arguments = parser.parse_args()
+
+    columns = generate(arguments.rows)
+    names = list(columns)
+    rows = [dict(zip(names, row)) for row in zip(*(columns[n].tolist() for n in names))]
+
+    for name, source in RULES.items():
+        rule = genruler.compile(source, backend="python", cache=None)
+
+        many = measure(lambda: rule.evaluate_many(rows), arguments.repeat)
+        columnar = measure(lambda: rule.evaluate_columns(columns), arguments.repeat)
+
+        print(
+            f"{name:>12}: evaluate_many {many:7.3f}s, "
+            f"evaluate_columns {columnar:7.3f}s, {many / columnar:6.1f}x"
+        )
+
+
+if __name__ == "__main__":
+    main()
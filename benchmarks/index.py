@@ -0,0 +1,61 @@
+"""Compare evaluating every rule with evaluating the candidates of a RuleIndex.
+
+Usage:
+    python -m benchmarks.index [--rules 50000] [--number 20]
+"""
+
+import argparse
+import random
+import timeit
+
+import genruler
+
+TEMPLATES = [
+    '(boolean.and (condition.equal (basic.field "event_type") "{event}") (condition.gt (basic.field "amount") {n}))',
+    '(boolean.and (condition.in (basic.field "country") ("{country}" "{other}")) (condition.ge (basic.field "age") {age}))',
+    '(condition.equal (basic.field "event_type") "{event}")',
+]
+
+COUNTRIES = ["us", "ca", "mx", "gb", "de", "fr", "jp", "my", "sg", "au"]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rules", type=int, default=50000)
+    parser.add_argument("--number", type=int, default=20)
+    arguments = parser.parse_args()
+
+    rng = random.Random(0)
+    sources = {
+        f"rule{i}": TEMPLATES[i % len(TEMPLATES)].format(
+            event=f"event{rng.randrange(arguments.rules // 10)}",
+            n=rng.randrange(1000),
+            country=rng.choice(COUNTRIES),
+            other=rng.choice(COUNTRIES),
+            age=rng.randrange(1, 90),
+        )
+        for i in range(arguments.rules)
+    }
+    context = {"event_type": "event7", "amount": 500, "country": "my", "age": 30}
+
+    index = genruler.RuleIndex(sources)
+    rules = index.rules
+
+    for name, function in (
+        ("loop", lambda: [rule(context) for rule in rules]),
+        ("RuleIndex", lambda: index.matching(context)),
+    ):
+        elapsed = min(timeit.repeat(function, number=arguments.number, repeat=3))
+        print(f"{name:>10}: {elapsed / arguments.number * 1e6:10.1f}us")
+
+    print(f"{len(index.candidates(context))} candidates of {len(index)} rules")
+    for statistics in index.statistics().values():
+        print(
+            f"{statistics.field:>10}: {statistics.rules} rules, "
+            f"{statistics.values} values, largest bucket {statistics.largest}, "
+            f"selectivity {statistics.selectivity:.2e}"
+        )
+
+
+if __name__ == "__main__":
+    main()
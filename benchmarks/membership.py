@@ -0,0 +1,64 @@
+"""Compare membership tests against long literal lists with linear scans.
+
+Usage:
+    python -m benchmarks.membership [--items 5000] [--contexts 100000]
+"""
+
+import argparse
+import operator
+
+import genruler
+from genruler.common import binary
+from genruler.compiler import BACKENDS
+from genruler.modules import basic
+
+from .batch import measure
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--items", type=int, default=5000)
+    parser.add_argument("--contexts", type=int, default=100000)
+    parser.add_argument("--repeat", type=int, default=3)
+    arguments = parser.parse_args()
+
+    count = arguments.items
+    items = tuple(f"item{i}" for i in range(count))
+    intervals = tuple((i * 10, i * 10 + 5) for i in range(count))
+    contexts = [
+        {"name": f"item{i * 7 % (count * 2)}", "number": i * 3 % (count * 10)}
+        for i in range(arguments.contexts)
+    ]
+
+    # condition.in and condition.in_range as they were before hashing and
+    # bisection, scanning the whole literal on every evaluation
+    scans = {
+        "in": binary(operator.contains, (items, basic.field("name"))),
+        "in_range": lambda context: any(
+            lower <= context["number"] <= upper for lower, upper in intervals
+        ),
+    }
+    sources = {
+        "in": '(condition.in (basic.field "name") ({}))'.format(
+            " ".join(f'"{item}"' for item in items)
+        ),
+        "in_range": '(condition.in_range (basic.field "number") {})'.format(
+            " ".join(f"({lower} {upper})" for lower, upper in intervals)
+        ),
+    }
+
+    for name, source in sources.items():
+        scan = scans[name]
+        # scanning every context takes too long, time a sample instead
+        sample = contexts[: len(contexts) // 100]
+        elapsed = measure(lambda: [scan(c) for c in sample], arguments.repeat) * 100
+        print(f"{name:>9} {'scan':>8}: {elapsed:7.3f}s")
+
+        for backend in BACKENDS:
+            rule = genruler.compile(source, backend=backend, cache=None)
+            elapsed = measure(lambda: [rule(c) for c in contexts], arguments.repeat)
+            print(f"{name:>9} {backend:>8}: {elapsed:7.3f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+"""Measure the memory each parsed rule keeps allocated, by rule shape.
+
+Usage:
+    python -m benchmarks.memory [--rules 2000]
+
+For each shape, the rules are parsed without a cache and kept alive, and the
+bytes still allocated once parsing is done are divided by the number of rules.
+Node trees are measured alone, as built and folded, as compiled rules,
+closures included, and as compiled rules sharing their equal subtrees through
+a NodeTable.
+"""
+
+import argparse
+import gc
+import tracemalloc
+from collections.abc import Callable
+from typing import Any
+
+import genruler
+from genruler.interning import NodeTable
+from genruler.lexer import read
+from genruler.nodes import build
+from genruler.optimizer import fold
+
+from .workloads import README_RULES, synthetic
+
+# Shapes of the synthetic rules, as depth, width and mix
+SHAPES = [
+    (1, 2, "condition"),
+    (2, 3, "mixed"),
+    (3, 3, "mixed"),
+    (3, 2, "string"),
+]
+
+
+def retained(function: Callable[[], list[Any]]) -> int:
+    """Return the bytes still allocated by what a function returns.
+
+    Args:
+        function: The function building the objects to measure
+
+    Returns:
+        The bytes allocated while calling the function and not yet freed
+    """
+    gc.collect()
+    tracemalloc.start()
+    try:
+        before, _ = tracemalloc.get_traced_memory()
+        result = function()
+        gc.collect()
+        after, _ = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    del result
+    return after - before
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rules", type=int, default=2000)
+    arguments = parser.parse_args()
+
+    shapes = {
+        "readme": (README_RULES * arguments.rules)[: arguments.rules],
+        "tautology": ["(boolean.and (boolean.tautology) (boolean.contradiction))"]
+        * arguments.rules,
+        **{
+            f"d{depth}-w{width}-{mix}": synthetic(
+                depth, width, mix, arguments.rules, 0
+            ).sources
+            for depth, width, mix in SHAPES
+        },
+    }
+
+    print(f"{'shape':>20} {'nodes B/rule':>13} {'rules B/rule':>13} {'interned':>13}")
+    for name, sources in shapes.items():
+        nodes = retained(lambda: [fold(build(read(s), None)) for s in sources])
+        rules = retained(lambda: [genruler.compile(s, cache=None) for s in sources])
+
+        table = NodeTable()
+        interned = retained(
+            lambda: [genruler.compile(s, cache=None, table=table) for s in sources]
+        )
+        sharing = table.info()
+
+        print(
+            f"{name:>20} {nodes / len(sources):>13,.0f} "
+            f"{rules / len(sources):>13,.0f} {interned / len(sources):>13,.0f}"
+            f"  {sharing.hits:,} subtrees shared, {sharing.misses:,} nodes"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,55 @@
+"""Compare Rule.evaluate_many with Rule.evaluate_parallel over 1 to 8 workers.
+
+Usage:
+    python -m benchmarks.parallel [--contexts 1000000] [--workers 1 2 4 8]
+"""
+
+import argparse
+import os
+
+import genruler
+
+from .batch import RULES, generate, measure
+
+# sending a context to a worker costs about as much as evaluating a simple
+# rule, a rule doing more work per context shows how evaluation scales
+HEAVY = "(boolean.and {})".format(
+    " ".join(
+        f'(condition.ge (number.modulo (number.multiply (basic.field "price") {n}) 97) 0)'
+        for n in range(1, 41)
+    )
+)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--contexts", type=int, default=1000000)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4, 8])
+    parser.add_argument("--chunk-size", type=int, default=4096)
+    parser.add_argument("--repeat", type=int, default=1)
+    arguments = parser.parse_args()
+
+    contexts = generate(arguments.contexts)
+    print(f"{os.cpu_count()} CPUs, {arguments.contexts} contexts")
+
+    for name, source in {**RULES, "heavy": HEAVY}.items():
+        rule = genruler.compile(source, backend="python", cache=None)
+
+        serial = measure(lambda: rule.evaluate_many(contexts), arguments.repeat)
+        print(f"{name:>12} {'serial':>10}: {serial:7.3f}s")
+
+        for workers in arguments.workers:
+            elapsed = measure(
+                lambda: rule.evaluate_parallel(
+                    contexts, workers=workers, chunk_size=arguments.chunk_size
+                ),
+                arguments.repeat,
+            )
+            print(
+                f"{name:>12} {f'{workers} workers':>10}: {elapsed:7.3f}s, "
+                f"{serial / elapsed:5.2f}x"
+            )
+
+
+if __name__ == "__main__":
+    main()
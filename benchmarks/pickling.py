@@ -0,0 +1,59 @@
+"""Compare unpickling compiled rules with parsing their source again.
+
+Usage:
+    python -m benchmarks.pickling [--rules 5000] [--repeat 3]
+"""
+
+import argparse
+import pickle
+import timeit
+
+import genruler
+from genruler.compiler import BACKENDS
+
+from .ruleset import COUNTRIES, TEMPLATES
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rules", type=int, default=5000)
+    parser.add_argument("--repeat", type=int, default=3)
+    arguments = parser.parse_args()
+
+    sources = [
+        TEMPLATES[i % len(TEMPLATES)].format(
+            n=i % 200, country=COUNTRIES[i % len(COUNTRIES)]
+        )
+        for i in range(arguments.rules)
+    ]
+    size = sum(len(source.encode()) for source in sources)
+    print(f"{'source':>8}: {size / 1024:8.1f}KiB")
+
+    for backend in BACKENDS:
+        rules = [genruler.compile(s, backend=backend, cache=None) for s in sources]
+        data = pickle.dumps(rules, protocol=pickle.HIGHEST_PROTOCOL)
+
+        # timeit disables the garbage collector, which would otherwise walk
+        # the rules already alive every few thousand nodes created
+        parse = min(
+            timeit.repeat(
+                lambda: [
+                    genruler.compile(s, backend=backend, cache=None) for s in sources
+                ],
+                number=1,
+                repeat=arguments.repeat,
+            )
+        )
+        load = min(
+            timeit.repeat(lambda: pickle.loads(data), number=1, repeat=arguments.repeat)
+        )
+
+        print(
+            f"{backend:>8}: {len(data) / 1024:8.1f}KiB pickled, "
+            f"parse {parse * 1e3:8.1f}ms, unpickle {load * 1e3:8.1f}ms, "
+            f"{parse / load:5.2f}x"
+        )
+
+
+if __name__ == "__main__":
+    main()
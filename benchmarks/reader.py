@@ -0,0 +1,56 @@
+"""Compare the single-pass reader with the funcparserlib pipeline.
+
+Usage:
+    python -m benchmarks.reader [--rules 20000] [--repeat 3]
+"""
+
+import argparse
+import time
+from collections.abc import Callable
+
+from genruler.lexer import read_fast, read_funcparserlib
+
+RULES = [
+    '(condition.equal (basic.field "name") "John")',
+    '(basic.coalesce (basic.field "a") (basic.field "b") "default")',
+    '(basic.context (basic.field "data") (basic.context (basic.field "user") (basic.field "email")))',
+    '(number.add (basic.field "price") (basic.field "tax"))',
+    '(boolean.and (condition.gt (basic.field "age") 18) (condition.equal (basic.field "verified") (boolean.tautology)))',
+    '(boolean.or (condition.equal (basic.field "role") "admin") (condition.equal (basic.field "role") "moderator"))',
+    '(condition.in (basic.field "country") ("US" "CA" "MX" "GB" "DE" "FR" "JP"))',
+    '(condition.le (number.multiply (basic.field "score") 1.5) 99.75)',
+]
+
+
+def measure(read: Callable[[str], list], sources: list[str], repeat: int) -> float:
+    """Return the best wall time in seconds of reading every source once."""
+    best = float("inf")
+
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for source in sources:
+            read(source)
+        best = min(best, time.perf_counter() - start)
+
+    return best
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rules", type=int, default=20000)
+    parser.add_argument("--repeat", type=int, default=3)
+    arguments = parser.parse_args()
+
+    sources = [RULES[i % len(RULES)] for i in range(arguments.rules)]
+
+    for name, read in (("funcparserlib", read_funcparserlib), ("fast", read_fast)):
+        elapsed = measure(read, sources, arguments.repeat)
+        print(
+            f"{name:>14}: {elapsed:8.3f}s total, "
+            f"{elapsed / len(sources) * 1e6:8.2f}us/rule, "
+            f"{len(sources) / elapsed:10.0f} rules/s"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,67 @@
+"""Compare evaluating many rules one by one with evaluating them as a RuleSet.
+
+Usage:
+    python -m benchmarks.ruleset [--rules 5000] [--number 20]
+"""
+
+import argparse
+import timeit
+
+import genruler
+
+TEMPLATES = [
+    '(condition.gt (basic.context (basic.field "order") (basic.field "total")) {n})',
+    '(boolean.and (condition.ge (basic.field "age") 18) (condition.equal (string.lower (basic.field "country")) "{country}"))',
+    '(boolean.or (condition.equal (basic.field "tier") "gold") (condition.lt (number.multiply (basic.context (basic.field "order") (basic.field "total")) 1.2) {n}))',
+    '(condition.in (string.lower (basic.field "country")) ("{country}" "us" "ca"))',
+]
+
+COUNTRIES = ["us", "ca", "mx", "gb", "de", "fr", "jp", "my"]
+
+CONTEXT = {
+    "age": 30,
+    "country": "MY",
+    "tier": "silver",
+    "order": {"total": 120},
+}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rules", type=int, default=5000)
+    parser.add_argument("--number", type=int, default=20)
+    arguments = parser.parse_args()
+
+    sources = {
+        f"rule{i}": TEMPLATES[i % len(TEMPLATES)].format(
+            n=i % 200, country=COUNTRIES[i % len(COUNTRIES)]
+        )
+        for i in range(arguments.rules)
+    }
+
+    for backend in ("closure", "python"):
+        rules = [
+            genruler.compile(source, backend=backend, cache=None)
+            for source in sources.values()
+        ]
+        elapsed = min(
+            timeit.repeat(
+                lambda: [rule(CONTEXT) for rule in rules],
+                number=arguments.number,
+                repeat=3,
+            )
+        )
+        print(f"{'loop ' + backend:>14}: {elapsed / arguments.number * 1e3:8.2f}ms")
+
+    ruleset = genruler.RuleSet(sources)
+    elapsed = min(
+        timeit.repeat(lambda: ruleset(CONTEXT), number=arguments.number, repeat=3)
+    )
+    print(
+        f"{'RuleSet':>14}: {elapsed / arguments.number * 1e3:8.2f}ms, "
+        f"{ruleset.deduplicated} uses deduplicated"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+"""Compare loading a rule catalogue from a snapshot with parsing it.
+
+Usage:
+    python -m benchmarks.snapshot [--rules 20000] [--stale 0.01] [--repeat 3]
+"""
+
+import argparse
+import os
+import tempfile
+import timeit
+from collections.abc import Callable
+from typing import Any
+
+import genruler
+from genruler import snapshot
+from genruler.compiler import BACKENDS
+
+from .ruleset import COUNTRIES, TEMPLATES
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rules", type=int, default=20000)
+    parser.add_argument("--stale", type=float, default=0.01)
+    parser.add_argument("--repeat", type=int, default=3)
+    arguments = parser.parse_args()
+
+    sources = {
+        f"rule{i}": TEMPLATES[i % len(TEMPLATES)].format(
+            n=i % 200, country=COUNTRIES[i % len(COUNTRIES)]
+        )
+        for i in range(arguments.rules)
+    }
+    # the same catalogue with a fraction of its rules changed since the
+    # snapshot was saved
+    step = max(1, round(1 / arguments.stale)) if arguments.stale else 0
+    changed = {
+        name: (
+            source.replace("basic.field", "basic.field ", 1)
+            if step and i % step == 0
+            else source
+        )
+        for i, (name, source) in enumerate(sources.items())
+    }
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "rules.snapshot")
+
+        for backend in BACKENDS:
+            # timeit disables the garbage collector, which would otherwise
+            # walk the rules already alive every few thousand nodes created
+            parse = _best(
+                lambda: [
+                    genruler.compile(s, backend=backend, cache=None)
+                    for s in sources.values()
+                ],
+                arguments.repeat,
+            )
+
+            rules = snapshot.load_or_compile(path, sources, backend=backend)
+            size = snapshot.save(path, sources, rules)
+            data = open(path, "rb").read()
+
+            load = _best(
+                lambda: snapshot.load(path, sources, backend=backend),
+                arguments.repeat,
+            )
+
+            def stale() -> None:
+                with open(path, "wb") as file:
+                    file.write(data)
+                snapshot.load_or_compile(path, changed, backend=backend)
+
+            update = _best(stale, arguments.repeat)
+
+            print(f"{backend:>8} {'parse':>14}: {parse:7.3f}s")
+            print(f"{backend:>8} {'snapshot':>14}: {load:7.3f}s  {size / 1024:,.0f}KiB")
+            print(f"{backend:>8} {f'{arguments.stale:.0%} stale':>14}: {update:7.3f}s")
+
+
+def _best(function: Callable[[], Any], repeat: int) -> float:
+    return min(timeit.repeat(function, number=1, repeat=repeat))
+
+
+if __name__ == "__main__":
+    main()
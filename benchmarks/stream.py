@@ -0,0 +1,95 @@
+"""Compare a hand-written filter loop over JSON Lines with genruler.stream.
+
+Usage:
+    python -m benchmarks.stream [--records 500000] [--repeat 3]
+"""
+
+import argparse
+import json
+import os
+import random
+import tempfile
+import time
+from collections.abc import Callable
+from typing import Any
+
+import genruler
+from genruler import stream
+
+RULE = '(boolean.and (condition.equal (basic.field "type") "click") (condition.gt (basic.field "price") 50))'
+
+
+def generate(path: str, count: int) -> None:
+    """Write random events with the fields the benchmark rule reads."""
+    rng = random.Random(0)
+
+    with open(path, "w") as file:
+        for i in range(count):
+            event = {
+                "id": i,
+                "type": rng.choice(["click", "view", "purchase"]),
+                "price": rng.randint(1, 100),
+                "user": {"country": rng.choice(["MY", "US", "CA"])},
+            }
+            file.write(json.dumps(event) + "\n")
+
+
+def loop(rule: Callable[[Any], Any], source: str, destination: str) -> None:
+    """Filter the events the way it is written by hand."""
+    with open(source) as lines, open(destination, "w") as output:
+        for line in lines:
+            event = json.loads(line)
+            if rule(event):
+                output.write(json.dumps(event) + "\n")
+
+
+def measure(function: Callable[[], Any], repeat: int) -> float:
+    """Return the best wall time in seconds of calling the function."""
+    best = float("inf")
+
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        best = min(best, time.perf_counter() - start)
+
+    return best
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--records", type=int, default=500000)
+    parser.add_argument("--repeat", type=int, default=3)
+    arguments = parser.parse_args()
+
+    rule = genruler.compile(RULE, cache=None)
+
+    with tempfile.TemporaryDirectory() as directory:
+        source = os.path.join(directory, "events.jsonl")
+        destination = os.path.join(directory, "matches.jsonl")
+        generate(source, arguments.records)
+
+        timings = {
+            "loop": lambda: loop(rule, source, destination),
+            "stream": lambda: stream.write(
+                stream.filter(rule, stream.read_jsonl(source)), destination
+            ),
+            "stream mmap": lambda: stream.write(
+                stream.filter(rule, stream.read_jsonl(source, use_mmap=True)),
+                destination,
+            ),
+            "prefilter": lambda: stream.write(
+                stream.filter(rule, stream.read_jsonl(source, prefilter=rule)),
+                destination,
+            ),
+        }
+
+        for name, function in timings.items():
+            elapsed = measure(function, arguments.repeat)
+            print(
+                f"{name:>12}: {elapsed:7.3f}s, "
+                f"{arguments.records / elapsed:10.0f} records/s"
+            )
+
+
+if __name__ == "__main__":
+    main()
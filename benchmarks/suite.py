@@ -0,0 +1,209 @@
+"""Measure parsing, compiling and evaluating workloads, and compare two runs.
+
+Usage:
+    python -m benchmarks.suite [--output results.json] [--compare baseline.json]
+        [--threshold 0.1] [--rules 50] [--contexts 2000] [--repeat 5]
+        [--only NAME ...]
+
+Every workload is measured with fixed seeds, so that runs on the same machine
+measure the same work. Timings are the best of the repeats, with the garbage
+collector disabled. With --compare, metrics worse than the baseline by more
+than the threshold are listed, and the exit status is 1.
+"""
+
+import argparse
+import json
+import os
+import platform
+import sys
+import time
+import timeit
+import tracemalloc
+from collections.abc import Callable
+from typing import Any
+
+import genruler
+from genruler.compiler import BACKENDS
+from genruler.lexer import read
+from genruler.library import evaluate
+
+from .workloads import Workload, readme, synthetic
+
+# Shapes of the synthetic workloads, as depth, width and mix
+SHAPES = [
+    (1, 2, "condition"),
+    (3, 3, "mixed"),
+    (5, 2, "mixed"),
+    (3, 2, "number"),
+    (3, 2, "string"),
+]
+
+# Suffix of the metrics for which higher values are better, lower values
+# being better for every other metric
+HIGHER_IS_BETTER = "_per_s"
+
+
+def measure(workload: Workload, repeat: int) -> dict[str, float]:
+    """Measure a workload.
+
+    Args:
+        workload: The rules and contexts to measure
+        repeat: Number of runs each timing is the best of
+
+    Returns:
+        The value of each metric, keyed on its name
+    """
+    sources, contexts = workload.sources, workload.contexts
+    rules = len(sources)
+    metrics = {
+        "read_us": _best(lambda: [read(s) for s in sources], repeat) / rules * 1e6,
+        "evaluate_us": _best(lambda: [evaluate(read(s), None) for s in sources], repeat)
+        / rules
+        * 1e6,
+    }
+
+    for backend in BACKENDS:
+        compiled = [genruler.compile(s, backend=backend, cache=None) for s in sources]
+        evaluations = rules * len(contexts)
+
+        metrics[f"compile_us_{backend}"] = (
+            _best(
+                lambda: [
+                    genruler.compile(s, backend=backend, cache=None) for s in sources
+                ],
+                repeat,
+            )
+            / rules
+            * 1e6
+        )
+        metrics[f"call_{backend}_per_s"] = evaluations / _best(
+            lambda: [rule(c) for rule in compiled for c in contexts], repeat
+        )
+        metrics[f"many_{backend}_per_s"] = evaluations / _best(
+            lambda: [rule.evaluate_many(contexts) for rule in compiled], repeat
+        )
+
+    peak, blocks = _memory(lambda: [genruler.compile(s, cache=None) for s in sources])
+    metrics["compile_peak_bytes_per_rule"] = peak / rules
+    metrics["blocks_per_rule"] = blocks / rules
+
+    compiled = [genruler.compile(s, cache=None) for s in sources]
+    peak, _ = _memory(lambda: [rule.evaluate_many(contexts) for rule in compiled])
+    metrics["many_peak_bytes_per_rule"] = peak / rules
+
+    return metrics
+
+
+def compare(
+    baseline: dict[str, Any], current: dict[str, Any], threshold: float
+) -> list[str]:
+    """Return the metrics of a run worse than those of a baseline run.
+
+    Args:
+        baseline: The results of the baseline run, as written by main
+        current: The results of the run to compare
+        threshold: The relative change beyond which a metric regressed, 0.1
+            for 10%
+
+    Returns:
+        A line describing each regressed metric
+    """
+    regressions = []
+
+    for name, metrics in current["results"].items():
+        for metric, value in metrics.items():
+            base = baseline["results"].get(name, {}).get(metric)
+            if not base:
+                continue
+
+            change = (value - base) / base
+            worse = -change if metric.endswith(HIGHER_IS_BETTER) else change
+
+            if worse > threshold:
+                regressions.append(
+                    f"{name} {metric}: {base:,.2f} -> {value:,.2f} ({change:+.1%})"
+                )
+
+    return regressions
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--output", help="write the results to this JSON file")
+    parser.add_argument("--compare", help="compare with the results of this JSON file")
+    parser.add_argument("--threshold", type=float, default=0.1)
+    parser.add_argument("--rules", type=int, default=50)
+    parser.add_argument("--contexts", type=int, default=2000)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument(
+        "--only", action="append", help="measure the workloads with this in their name"
+    )
+    arguments = parser.parse_args()
+
+    workloads = [readme(arguments.contexts)] + [
+        synthetic(depth, width, mix, arguments.rules, arguments.contexts)
+        for depth, width, mix in SHAPES
+    ]
+    if arguments.only:
+        workloads = [w for w in workloads if any(o in w.name for o in arguments.only)]
+
+    results = {}
+    for workload in workloads:
+        results[workload.name] = metrics = measure(workload, arguments.repeat)
+
+        print(workload.name)
+        for metric, value in metrics.items():
+            print(f"  {metric:>28}: {value:14,.2f}")
+
+    run = {
+        "meta": {
+            "python": platform.python_version(),
+            "implementation": platform.python_implementation(),
+            "platform": platform.platform(),
+            "cpus": os.cpu_count(),
+            "time": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+            "arguments": vars(arguments),
+        },
+        "results": results,
+    }
+
+    if arguments.output:
+        with open(arguments.output, "w") as file:
+            json.dump(run, file, indent=2)
+
+    if arguments.compare:
+        with open(arguments.compare) as file:
+            regressions = compare(json.load(file), run, arguments.threshold)
+
+        for regression in regressions:
+            print(f"regression: {regression}")
+
+        if regressions:
+            sys.exit(1)
+
+        print(f"no regressions beyond {arguments.threshold:.0%}")
+
+
+def _best(function: Callable[[], Any], repeat: int) -> float:
+    return min(timeit.repeat(function, number=1, repeat=repeat))
+
+
+def _memory(function: Callable[[], Any]) -> tuple[int, int]:
+    # the peak bytes allocated while calling the function, and the number of
+    # blocks still allocated by what it returns
+    tracemalloc.start()
+    try:
+        result = function()
+        snapshot = tracemalloc.take_snapshot()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    blocks = sum(statistic.count for statistic in snapshot.statistics("filename"))
+    del result
+
+    return peak, blocks
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,162 @@
+"""Rules and contexts the benchmark suite measures, synthetic and realistic."""
+
+import random
+from dataclasses import dataclass
+from typing import Any
+
+# Relative weights of the kinds of leaves of synthetic rules
+MIXES = {
+    "mixed": {"condition": 2, "number": 1, "string": 1, "boolean": 1},
+    "condition": {"condition": 1},
+    "number": {"number": 1},
+    "string": {"string": 1},
+}
+
+NUMBER_FIELDS = [f"n{i}" for i in range(8)]
+STRING_FIELDS = [f"s{i}" for i in range(4)]
+WORDS = ["alpha", "beta", "gamma", "delta", "Alpha", "BETA"]
+
+
+@dataclass(frozen=True)
+class Workload:
+    """Rules evaluated together over the same contexts.
+
+    Attributes:
+        name: The name results are reported under
+        sources: The S-expressions of the rules
+        contexts: The contexts every rule is evaluated with
+    """
+
+    name: str
+    sources: list[str]
+    contexts: list[Any]
+
+
+def synthetic(
+    depth: int, width: int, mix: str, rules: int, contexts: int, seed: int = 0
+) -> Workload:
+    """Generate random boolean rules, and contexts with the fields they read.
+
+    Each rule is a tree of boolean.and and boolean.or with width arguments
+    each, depth levels deep, whose leaves are conditions drawn from the mix.
+
+    Args:
+        depth: Number of levels of connectives above the leaves
+        width: Number of arguments of each connective
+        mix: The name of the weights of the kinds of leaves, see MIXES
+        rules: Number of rules to generate
+        contexts: Number of contexts to generate
+        seed: The seed of the random generator, the same seed generating the
+            same workload
+
+    Returns:
+        The workload, named after its parameters
+    """
+    rng = random.Random(f"{depth}-{width}-{mix}-{seed}")
+    kinds, weights = zip(*MIXES[mix].items())
+
+    def leaf() -> str:
+        kind = rng.choices(kinds, weights)[0]
+
+        if kind == "condition":
+            field = rng.choice(NUMBER_FIELDS)
+            operator = rng.choice(["gt", "lt", "ge", "le", "equal"])
+            return (
+                f'(condition.{operator} (basic.field "{field}") {rng.randint(0, 100)})'
+            )
+        elif kind == "number":
+            first, second = rng.sample(NUMBER_FIELDS, 2)
+            operator = rng.choice(["add", "subtract", "multiply"])
+            return (
+                f'(condition.gt (number.{operator} (basic.field "{first}") '
+                f'(number.multiply (basic.field "{second}") {rng.randint(1, 5)})) '
+                f"{rng.randint(0, 200)})"
+            )
+        elif kind == "string":
+            field = rng.choice(STRING_FIELDS)
+            if rng.random() < 0.5:
+                return (
+                    f'(condition.equal (string.lower (basic.field "{field}")) '
+                    f'"{rng.choice(WORDS).lower()}")'
+                )
+            words = " ".join(f'"{word}"' for word in rng.sample(WORDS, 3))
+            return f'(condition.in (basic.field "{field}") ({words}))'
+
+        return f"(boolean.not {leaf()})"
+
+    def tree(level: int) -> str:
+        if level == 0:
+            return leaf()
+
+        connective = rng.choice(["and", "or"])
+        arguments = " ".join(tree(level - 1) for _ in range(width))
+        return f"(boolean.{connective} {arguments})"
+
+    return Workload(
+        f"synthetic-d{depth}-w{width}-{mix}",
+        [tree(depth) for _ in range(rules)],
+        [
+            {
+                **{field: rng.randint(0, 100) for field in NUMBER_FIELDS},
+                **{field: rng.choice(WORDS) for field in STRING_FIELDS},
+            }
+            for _ in range(contexts)
+        ],
+    )
+
+
+# Rules from the examples of the README, with contexts of the fields they read
+README_RULES = [
+    '(condition.equal (basic.field "name") "John")',
+    '(basic.coalesce (basic.field "a") (basic.field "b") "default")',
+    '(basic.context (basic.field "data") (basic.context (basic.field "user") (basic.field "email")))',
+    '(condition.equal (basic.field "status") (basic.value "active"))',
+    '(number.add (basic.field "price") (basic.field "tax"))',
+    '(number.modulo (basic.field "items") (basic.field "per_page"))',
+    '(boolean.and (condition.gt (basic.field "age") 18) (condition.equal (basic.field "verified") (boolean.tautology)))',
+    '(boolean.or (condition.equal (basic.field "role") "admin") (condition.equal (basic.field "role") "moderator"))',
+    '(condition.in (basic.field "country") ("US" "CA" "MX"))',
+    '(condition.gt (basic.field "seconds") (number.multiply 60 60 24))',
+    '(boolean.and (condition.equal (basic.field "type") "click") (condition.gt (basic.field "price") 50))',
+    '(string.concat "-" (basic.field "first") (string.lower (basic.field "last")))',
+]
+
+
+def readme(contexts: int, seed: int = 0) -> Workload:
+    """Return the rules of the README examples, and contexts for them.
+
+    Args:
+        contexts: Number of contexts to generate
+        seed: The seed of the random generator
+
+    Returns:
+        The workload
+    """
+    rng = random.Random(f"readme-{seed}")
+
+    return Workload(
+        "readme",
+        README_RULES,
+        [
+            {
+                "name": rng.choice(["John", "Jane"]),
+                "a": rng.choice([None, "", "x"]),
+                "b": rng.choice([None, "y"]),
+                "data": {"user": {"email": "john@example.com"}},
+                "status": rng.choice(["active", "inactive"]),
+                "price": rng.randint(1, 100),
+                "tax": rng.randint(1, 10),
+                "items": rng.randint(1, 100),
+                "per_page": rng.randint(1, 20),
+                "age": rng.randint(1, 90),
+                "verified": rng.random() < 0.5,
+                "role": rng.choice(["admin", "moderator", "user"]),
+                "country": rng.choice(["US", "CA", "MX", "GB"]),
+                "seconds": rng.randint(0, 200000),
+                "type": rng.choice(["click", "view"]),
+                "first": "John",
+                "last": "DOE",
+            }
+            for _ in range(contexts)
+        ],
+    )
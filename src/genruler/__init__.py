@@ -1,13 +1,21 @@
-from collections.abc import Callable
 from types import ModuleType
-from typing import Any
 
-from .exceptions import NonCallableResultError
+from .cache import ParseCache, default_cache
+from .compiler import BACKENDS, Rule
+from .index import RuleIndex
+from .interning import NodeTable
 from .lexer import read
-from .library import evaluate
+from .nodes import build
+from .optimizer import fold
+from .ruleset import RuleSet
 
 
-def parse(input: str, env: ModuleType | object | None = None) -> Callable[[Any], Any]:
+def parse(
+    input: str,
+    env: ModuleType | object | None = None,
+    cache: ParseCache | None = default_cache,
+    table: NodeTable | None = None,
+) -> Rule:
     """Parse an S-expression string into a callable function.
 
     This function takes an S-expression string (e.g., "(module.function arg1 arg2)") and
@@ -20,10 +28,14 @@ def parse(input: str, env: ModuleType | object | None = None) -> Callable[[Any],
             in the format "module.function".
         env: Optional module containing local functions that can be referenced in the S-expression.
             If None, only genruler's built-in modules can be used.
+        cache: The ParseCache compiled rules are looked up in and stored to. Defaults
+            to the module-wide cache, pass None to always parse from scratch.
+        table: The NodeTable the subtrees of the rule are shared through with
+            those of other rules, see genruler.interning. None to share nothing.
 
     Returns:
-        A callable function that takes a context argument. When called with a context,
-        the function evaluates the S-expression with that context and returns the result.
+        A callable Rule that takes a context argument. When called with a context,
+        the rule evaluates the S-expression with that context and returns the result.
 
     Raises:
         ValueError: If the input string cannot be parsed as a valid S-expression
@@ -36,8 +48,65 @@ def parse(input: str, env: ModuleType | object | None = None) -> Callable[[Any],
         >>> fn({})  # Empty context
         3
     """
-    result = evaluate(read(input), env=env)
+    return compile(input, env, cache=cache, table=table)
 
-    if not callable(result):
-        raise NonCallableResultError(type(result).__name__)
-    return result
\ No newline at end of file
+
+def compile(
+    input: str,
+    env: ModuleType | object | None = None,
+    backend: str = "closure",
+    cache: ParseCache | None = default_cache,
+    optimize: bool = True,
+    table: NodeTable | None = None,
+) -> Rule:
+    """Compile an S-expression string into a callable Rule with the given backend.
+
+    Args:
+        input: The S-expression string to compile
+        env: Optional module containing local functions that can be referenced in the S-expression
+        backend: "closure" evaluates the rule through nested closures, exactly like parse.
+            "python" generates and compiles a single Python function for the whole rule.
+        cache: The ParseCache compiled rules are looked up in and stored to. Defaults
+            to the module-wide cache, pass None to always compile from scratch.
+        optimize: Whether to fold context independent subexpressions into
+            constants once, at compile time, see genruler.optimizer.fold, and
+            for the "python" backend to compute repeated subexpressions once
+            per evaluation.
+        table: The NodeTable the subtrees of the rule are shared through with
+            those of other rules, see genruler.interning. None to share nothing.
+
+    Returns:
+        A callable Rule that takes a context argument
+
+    Raises:
+        ValueError: If the input string cannot be parsed, or the backend is unknown
+        NonCallableResultError: If the parsed expression does not evaluate to a callable
+        InvalidFunctionNameError: If the referenced function cannot be found
+
+    Examples:
+        >>> rule = compile('(condition.gt (basic.field "age") 18)', backend="python")
+        >>> rule({"age": 21})
+        True
+    """
+    try:
+        compiler = BACKENDS[backend]
+    except KeyError:
+        raise ValueError(
+            f"Unknown backend {backend!r}, expected one of {list(BACKENDS)}"
+        )
+
+    def factory() -> Rule:
+        node = build(read(input), env)
+        if optimize:
+            node = fold(node)
+        if table is not None:
+            node = table.intern(node)
+
+        return compiler(node, optimize)
+
+    if cache is None:
+        return factory()
+
+    # rules interned through a table are cached apart, the table being kept
+    # alive by their entries so that its identity is not reused
+    return cache.get_or_parse(input, env, factory, (backend, optimize, table))
@@ -0,0 +1,350 @@
+import time
+from collections.abc import Iterable
+from dataclasses import dataclass
+from typing import Any
+
+from .compiler import TEMPLATES
+from .library import is_pure
+from .modules import boolean
+from .modules.basic import value as constant
+from .nodes import Call, Constant, Literal, Node, Reference, unparse
+
+# Evaluations of a connective between two that sample its operands
+SAMPLE_EVERY = 16
+
+# Evaluations of a connective between two reorderings of its operands
+REORDER_EVERY = 1024
+
+type Order = dict[str, list[int]]
+
+
+@dataclass(frozen=True)
+class OperandStatistics:
+    """What sampling an operand of a connective measured.
+
+    Attributes:
+        source: The S-expression of the operand
+        position: The position of the operand in the rule
+        evaluated: Number of sampled evaluations that reached the operand
+        decisive: Number of those for which the operand decided the result,
+            being falsy for boolean.and and truthy for boolean.or
+        cost: Average nanoseconds evaluating the operand took
+    """
+
+    source: str
+    position: int
+    evaluated: float
+    decisive: float
+    cost: float
+
+
+class Connective:
+    """A boolean.and or boolean.or evaluating its operands in a learned order.
+
+    One evaluation in sample_every times each operand reached, the time it
+    takes and whether it decides the result are measured. Every
+    reorder_every evaluations, rounded down to a whole number of samples, the
+    operands are sorted on their average cost divided by how often they
+    decide the result, which is the order that minimizes the expected cost of
+    evaluating independent operands, and the measures are halved so that the
+    order follows changes in the contexts.
+
+    Connectives only compute True or False, whatever the order of their
+    operands, unless one raises. When an operand raises while the operands
+    are not in the order of the rule, the connective is evaluated again in
+    that order, so that it raises, or not, as the rule would. An operand that
+    would raise is however not evaluated at all when the operands ordered
+    before it decide the result, in which case the connective returns that
+    result where the rule raises.
+
+    Attributes:
+        path: The positions of the arguments leading from the root of the
+            rule to the connective, joined with dots
+        order: The position in the rule of each operand, in the order they
+            are evaluated
+    """
+
+    path: str
+    order: list[int]
+
+    def __init__(
+        self,
+        node: Call,
+        operands: list[Any],
+        path: str,
+        sample_every: int,
+        reorder_every: int,
+        adapt: bool,
+    ) -> None:
+        self.path = path
+        self.order = list(range(len(operands)))
+        self._node = node
+        self._conjunctive = node.function is boolean.and_
+        self._operands = [
+            operand if callable(operand) else constant(operand) for operand in operands
+        ]
+        self._ordered = list(self._operands)
+        self._original = node.function(*operands)
+        self._sample_every = sample_every
+        self._adapt = adapt
+        self._count = 0
+        self._samples = 0
+        self._samples_per_reorder = max(reorder_every // sample_every, 1)
+        self._evaluated = [0.0] * len(operands)
+        self._decisive = [0.0] * len(operands)
+        self._cost = [0.0] * len(operands)
+
+    def __call__(self, context: Any) -> bool:
+        if self._adapt:
+            self._count += 1
+            if self._count % self._sample_every == 0:
+                return self._sample(context)
+
+        try:
+            if self._conjunctive:
+                for operand in self._ordered:
+                    if not operand(context):
+                        return False
+                return True
+
+            for operand in self._ordered:
+                if operand(context):
+                    return True
+            return False
+        except Exception:
+            if self._ordered == self._operands:
+                raise
+
+        return self._original(context)
+
+    def reorder(self) -> None:
+        """Sort the operands on their measured cost and decisiveness."""
+
+        def rank(position: int) -> float:
+            evaluated = self._evaluated[position]
+            if not evaluated:
+                # never reached, kept after the operands that were
+                return float("inf")
+
+            # smoothed, so that operands never decisive rank on their cost
+            decisive = (self._decisive[position] + 1) / (evaluated + 2)
+            return self._cost[position] / evaluated / decisive
+
+        self.set_order(sorted(range(len(self._operands)), key=rank))
+
+        for measures in (self._evaluated, self._decisive, self._cost):
+            measures[:] = [measure / 2 for measure in measures]
+
+    def set_order(self, order: list[int]) -> None:
+        """Evaluate the operands in the given order.
+
+        Args:
+            order: The position in the rule of each operand, in the order to
+                evaluate them
+
+        Raises:
+            ValueError: If the order is not a permutation of the operands
+        """
+        if sorted(order) != list(range(len(self._operands))):
+            raise ValueError(
+                f"{order} is not an order of the {len(self._operands)} operands "
+                f"of {self._node.name} at {self.path or 'the root'}"
+            )
+
+        self.order = list(order)
+        self._ordered = [self._operands[position] for position in order]
+
+    def statistics(self) -> list[OperandStatistics]:
+        """Return what sampling each operand measured, in evaluation order."""
+        return [
+            OperandStatistics(
+                unparse(self._node.arguments[position]),
+                position,
+                self._evaluated[position],
+                self._decisive[position],
+                (
+                    self._cost[position] / self._evaluated[position]
+                    if self._evaluated[position]
+                    else 0.0
+                ),
+            )
+            for position in self.order
+        ]
+
+    def _sample(self, context: Any) -> bool:
+        clock = time.perf_counter_ns
+        result = self._conjunctive
+
+        try:
+            for position in self.order:
+                start = clock()
+                value = self._operands[position](context)
+                self._cost[position] += clock() - start
+                self._evaluated[position] += 1
+
+                if self._conjunctive:
+                    decisive = not value
+                else:
+                    decisive = bool(value)
+
+                if decisive:
+                    self._decisive[position] += 1
+                    result = not self._conjunctive
+                    break
+        except Exception:
+            if self._ordered == self._operands:
+                raise
+
+            return self._original(context)
+        finally:
+            self._samples += 1
+            if self._samples % self._samples_per_reorder == 0:
+                self.reorder()
+
+        return result
+
+
+class AdaptiveRule:
+    """A rule reordering the operands of its connectives as it is evaluated.
+
+    Every boolean.and and boolean.or with two operands or more, all of them
+    calling only built-in or pure functions, is a Connective learning the
+    order that evaluates it the fastest. Connectives with an operand calling
+    an env function keep the order of the rule, so that env functions are
+    called exactly when the rule would call them.
+
+    Adaptive rules compute the results of the rule for the contexts it
+    computes a result for. For the contexts it raises on, they may return a
+    result instead, when a learned order decides it before reaching the
+    operand raising.
+
+    Attributes:
+        connectives: The connectives of the rule, keyed on their path
+    """
+
+    connectives: dict[str, Connective]
+
+    def __init__(
+        self,
+        node: Node,
+        order: Order | None = None,
+        adapt: bool = True,
+        sample_every: int = SAMPLE_EVERY,
+        reorder_every: int = REORDER_EVERY,
+    ) -> None:
+        """Compile a node tree into closures with adaptive connectives.
+
+        Args:
+            node: The root of the node tree
+            order: The order of the operands of each connective to start
+                from, keyed on the path of the connective, as exported
+            adapt: Whether to sample and reorder operands, rather than keep
+                the order given, for deterministic evaluations
+            sample_every: Evaluations of a connective between two that
+                sample its operands
+            reorder_every: Evaluations of a connective between two
+                reorderings of its operands
+
+        Raises:
+            ValueError: If the order does not match the connectives, or
+                sample_every or reorder_every is not positive
+        """
+        if min(sample_every, reorder_every) < 1:
+            raise ValueError("sample_every and reorder_every must be positive")
+
+        self.connectives = {}
+        self._settings = (sample_every, max(reorder_every, sample_every), adapt)
+        self._function = self._compile(node, ())
+
+        for path, operands in (order or {}).items():
+            if path not in self.connectives:
+                raise ValueError(f"No connective to order at {path or 'the root'}")
+            self.connectives[path].set_order(operands)
+
+    def __call__(self, context: Any) -> Any:
+        """Evaluate the rule against a context.
+
+        Args:
+            context: The context to evaluate the rule with
+
+        Returns:
+            The result of the rule
+        """
+        return self._function(context)
+
+    def evaluate_many(self, contexts: Iterable[Any]) -> list[Any]:
+        """Evaluate the rule against each context.
+
+        Args:
+            contexts: The contexts to evaluate the rule with
+
+        Returns:
+            The result for each context, in order
+        """
+        function = self._function
+
+        return [function(context) for context in contexts]
+
+    def export(self) -> Order:
+        """Return the order of the operands of each connective.
+
+        The order is plain JSON, and passed back to AdaptiveRule, or to
+        Rule.adaptive, with adapt=False to evaluate the rule in it without
+        learning anything more.
+
+        Returns:
+            The position in the rule of each operand, in the order they are
+            evaluated, keyed on the path of their connective
+        """
+        return {path: list(c.order) for path, c in self.connectives.items()}
+
+    def reorder(self) -> None:
+        """Reorder the operands of every connective now."""
+        for connective in self.connectives.values():
+            connective.reorder()
+
+    def _compile(self, node: Node, path: tuple[int, ...]) -> Any:
+        if isinstance(node, Constant):
+            return constant(node.value)
+        elif isinstance(node, Literal):
+            return node.value
+        elif isinstance(node, Reference):
+            return node.function
+        elif not isinstance(node, Call):
+            values = [
+                self._compile(item, (*path, i)) for i, item in enumerate(node.items)
+            ]
+            if values and callable(values[0]):
+                return values[0](*values[1:])
+            return tuple(values)
+
+        values = [
+            self._compile(argument, (*path, i))
+            for i, argument in enumerate(node.arguments)
+        ]
+
+        if (
+            node.function in (boolean.and_, boolean.or_)
+            and len(values) > 1
+            and all(_safe(argument) for argument in node.arguments)
+        ):
+            key = ".".join(map(str, path))
+            connective = Connective(node, values, key, *self._settings)
+            self.connectives[key] = connective
+            return connective
+
+        return node.function(*values)
+
+
+def _safe(node: Node) -> bool:
+    # whether evaluating the node only calls functions without side effects
+    if isinstance(node, Call):
+        if node.function not in TEMPLATES and not is_pure(node.function):
+            return False
+        return all(_safe(argument) for argument in node.arguments)
+    elif isinstance(node, Reference):
+        return node.function in TEMPLATES or is_pure(node.function)
+    elif isinstance(node, Constant) or isinstance(node, Literal):
+        return True
+
+    return all(_safe(item) for item in node.items)
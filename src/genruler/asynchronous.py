@@ -0,0 +1,357 @@
+import asyncio
+import inspect
+from collections.abc import Awaitable, Callable, Hashable, Sequence
+from typing import Any
+
+from .compiler import TEMPLATES
+from .library import is_pure
+from .modules import basic, boolean
+from .nodes import Call, Node, instantiate
+
+# Iterations of the event loop a DataLoader waits at most for more keys,
+# before looking up those it has while keys keep coming
+MAX_DEFERRALS = 16
+
+type AsyncEvaluator = Callable[[Any], Awaitable[Any]]
+
+
+def compile_async(node: Node) -> AsyncEvaluator:
+    """Compile a node tree into a coroutine function evaluating it.
+
+    Env functions, and any other function neither pure nor built in, may
+    return an awaitable from the closure they build, such as a coroutine or a
+    DataLoader.load future, which is awaited for its value. Their arguments
+    are evaluated first, and passed to them as basic.value constants when
+    they involve such functions themselves.
+
+    Arguments involving awaitables are awaited concurrently, except for those
+    of boolean.and, boolean.or and basic.coalesce, evaluated one after the
+    other until the result is known, and basic.context, whose argument is
+    evaluated in the sub-context. Subtrees without such functions are
+    evaluated synchronously, through their closures.
+
+    Args:
+        node: The root of the node tree
+
+    Returns:
+        The coroutine function, taking a context and returning the result
+    """
+    values: dict[int, Any] = {}
+    root = instantiate(node, values)
+
+    evaluator = AsyncCompiler(values).evaluator(node)
+    if evaluator is not None:
+        return evaluator
+
+    async def evaluate(context: Any) -> Any:
+        return root(context)
+
+    return evaluate
+
+
+class AsyncCompiler:
+    """Compile the nodes of a tree into coroutine functions evaluating them.
+
+    Attributes:
+        values: The instantiated value of every node, keyed on node id
+    """
+
+    values: dict[int, Any]
+
+    def __init__(self, values: dict[int, Any]) -> None:
+        self.values = values
+
+    def evaluator(self, node: Node) -> AsyncEvaluator | None:
+        """Return the coroutine function evaluating a node.
+
+        Args:
+            node: The node to compile
+
+        Returns:
+            The coroutine function, or None when the node is evaluated
+            synchronously by its closure
+        """
+        if not isinstance(node, Call):
+            return None
+
+        evaluators = [self.evaluator(argument) for argument in node.arguments]
+        synchronous = node.function in SYNCHRONOUS or is_pure(node.function)
+
+        if synchronous and all(evaluator is None for evaluator in evaluators):
+            return None
+
+        if synchronous and node.function in SEQUENTIAL:
+            return SEQUENTIAL[node.function](self, node.arguments, evaluators)
+
+        function = node.function
+        closure = self.values[id(node)]
+        arguments = [self.values[id(argument)] for argument in node.arguments]
+        pending = [
+            (index, evaluator)
+            for index, evaluator in enumerate(evaluators)
+            if evaluator is not None
+        ]
+
+        async def evaluate(context: Any) -> Any:
+            if not pending:
+                value = closure(context)
+            else:
+                computed = list(arguments)
+                results = await _gather(pending, context)
+
+                for (index, _), result in zip(pending, results):
+                    computed[index] = basic.value(result)
+
+                value = function(*computed)(context)
+
+            return await value if inspect.isawaitable(value) else value
+
+        return evaluate
+
+    def operand(self, node: Node, evaluator: AsyncEvaluator | None) -> AsyncEvaluator:
+        """Return a coroutine function evaluating an argument node."""
+        if evaluator is not None:
+            return evaluator
+
+        value = self.values[id(node)]
+
+        if not callable(value):
+
+            async def constant(context: Any) -> Any:
+                return value
+
+            return constant
+
+        async def evaluate(context: Any) -> Any:
+            return value(context)
+
+        return evaluate
+
+
+async def _gather(pending: list[tuple[int, AsyncEvaluator]], context: Any) -> list[Any]:
+    if len(pending) == 1:
+        # a single argument is awaited without the task gather wraps it in
+        return [await pending[0][1](context)]
+
+    return await asyncio.gather(*(evaluator(context) for _, evaluator in pending))
+
+
+type SequentialFactory = Callable[
+    [AsyncCompiler, tuple[Node, ...], list[AsyncEvaluator | None]], AsyncEvaluator
+]
+
+
+def _and(
+    compiler: AsyncCompiler,
+    arguments: tuple[Node, ...],
+    evaluators: list[AsyncEvaluator | None],
+) -> AsyncEvaluator:
+    operands = list(map(compiler.operand, arguments, evaluators))
+
+    async def evaluate(context: Any) -> bool:
+        for operand in operands:
+            if not await operand(context):
+                return False
+
+        return True
+
+    return evaluate
+
+
+def _or(
+    compiler: AsyncCompiler,
+    arguments: tuple[Node, ...],
+    evaluators: list[AsyncEvaluator | None],
+) -> AsyncEvaluator:
+    operands = list(map(compiler.operand, arguments, evaluators))
+
+    async def evaluate(context: Any) -> bool:
+        for operand in operands:
+            if await operand(context):
+                return True
+
+        return False
+
+    return evaluate
+
+
+def _coalesce(
+    compiler: AsyncCompiler,
+    arguments: tuple[Node, ...],
+    evaluators: list[AsyncEvaluator | None],
+) -> AsyncEvaluator:
+    operands = list(map(compiler.operand, arguments, evaluators))
+
+    async def evaluate(context: Any) -> Any:
+        # the first truthy value, or the last value when none is
+        for operand in operands:
+            value = await operand(context)
+            if value:
+                break
+
+        return value
+
+    return evaluate
+
+
+def _context(
+    compiler: AsyncCompiler,
+    arguments: tuple[Node, ...],
+    evaluators: list[AsyncEvaluator | None],
+) -> AsyncEvaluator:
+    sub, argument = map(compiler.operand, arguments, evaluators)
+
+    async def evaluate(context: Any) -> Any:
+        return await argument(await sub(context))
+
+    return evaluate
+
+
+SEQUENTIAL: dict[Callable[..., Any], SequentialFactory] = {
+    basic.coalesce: _coalesce,
+    basic.context: _context,
+    boolean.and_: _and,
+    boolean.or_: _or,
+}
+
+
+# Built-in functions, which never return awaitables
+SYNCHRONOUS = frozenset(TEMPLATES)
+
+
+class DataLoader[K: Hashable, V]:
+    """Coalesce the lookups of many concurrent evaluations into batched calls.
+
+    Keys loaded while the event loop has coroutines ready to run are passed
+    together to the batch function, once an iteration of the loop loads no
+    new key, rather than being looked up one at a time. Under steady load,
+    batches are looked up as soon as they are full, and every key after
+    MAX_DEFERRALS iterations at most. Env functions
+    return the future of a load from their closures for compile_async to
+    await.
+
+    Attributes:
+        batch: The coroutine function looking up a list of keys, returning
+            the list of values in the same order
+        max_batch_size: Maximum number of keys passed to a single call of
+            the batch function, None for no limit
+        cache: Whether to keep the future of each key, so that a key is only
+            looked up once for the lifetime of the loader
+
+    Examples:
+        >>> async def fetch_tiers(user_ids):
+        ...     return [await database.tier(user_id) for user_id in user_ids]
+        >>> tiers = DataLoader(fetch_tiers)
+        >>> class Env:
+        ...     @staticmethod
+        ...     def tier(user_id):
+        ...         return lambda context: tiers.load(compute(user_id, context))
+    """
+
+    batch: Callable[[list[K]], Awaitable[Sequence[V]]]
+    max_batch_size: int | None
+    cache: bool
+
+    def __init__(
+        self,
+        batch: Callable[[list[K]], Awaitable[Sequence[V]]],
+        max_batch_size: int | None = None,
+        cache: bool = True,
+    ) -> None:
+        if max_batch_size is not None and max_batch_size < 1:
+            raise ValueError("max_batch_size must be positive")
+
+        self.batch = batch
+        self.max_batch_size = max_batch_size
+        self.cache = cache
+        self._futures: dict[K, asyncio.Future[V]] = {}
+        self._queue: list[tuple[K, asyncio.Future[V]]] = []
+        self._queued = 0
+        self._deferrals = 0
+        self._tasks: set[asyncio.Future[None]] = set()
+
+    def load(self, key: K) -> asyncio.Future[V]:
+        """Return a future resolving to the value of a key.
+
+        Args:
+            key: The key to look up
+
+        Returns:
+            The future, set once the batch holding the key is looked up
+        """
+        if self.cache and key in self._futures:
+            return self._futures[key]
+
+        loop = asyncio.get_running_loop()
+        future: asyncio.Future[V] = loop.create_future()
+
+        if self.cache:
+            self._futures[key] = future
+
+        if not self._queue:
+            loop.call_soon(self._dispatch)
+
+        self._queue.append((key, future))
+
+        return future
+
+    def clear(self, key: K | None = None) -> None:
+        """Forget the cached value of a key, or of every key."""
+        if key is None:
+            self._futures.clear()
+        else:
+            self._futures.pop(key, None)
+
+    def _dispatch(self) -> None:
+        size = self.max_batch_size
+
+        if size is not None and len(self._queue) >= size:
+            # full batches gain nothing from waiting
+            full = len(self._queue) - len(self._queue) % size
+            self._send(self._queue[:full])
+            self._queue, self._queued = self._queue[full:], 0
+
+            if not self._queue:
+                self._deferrals = 0
+                return
+
+        if len(self._queue) != self._queued and self._deferrals < MAX_DEFERRALS:
+            # evaluations awaiting in tasks they just created load their keys
+            # an iteration later, wait for them while keys keep coming
+            self._queued = len(self._queue)
+            self._deferrals += 1
+            asyncio.get_running_loop().call_soon(self._dispatch)
+            return
+
+        queue, self._queue, self._queued, self._deferrals = self._queue, [], 0, 0
+        self._send(queue)
+
+    def _send(self, queue: list[tuple[K, asyncio.Future[V]]]) -> None:
+        size = self.max_batch_size or len(queue)
+
+        for start in range(0, len(queue), size):
+            # the loop only keeps weak references to its tasks
+            task = asyncio.ensure_future(self._load(queue[start : start + size]))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+    async def _load(self, queue: list[tuple[K, asyncio.Future[V]]]) -> None:
+        try:
+            values = await self.batch([key for key, _ in queue])
+
+            if len(values) != len(queue):
+                raise ValueError(
+                    f"batch returned {len(values)} values for {len(queue)} keys"
+                )
+        except Exception as e:
+            for key, future in queue:
+                # a failed lookup is retried by the next load of the key
+                if self._futures.get(key) is future:
+                    del self._futures[key]
+                if not future.done():
+                    future.set_exception(e)
+            return
+
+        for (_, future), value in zip(queue, values):
+            if not future.done():
+                future.set_result(value)
@@ -0,0 +1,437 @@
+import operator
+from collections.abc import Callable, Iterable, Iterator
+from itertools import islice
+from typing import Any
+
+from .common import Intervals, Members, literal
+from .modules import basic, boolean, condition, number, string
+from .modules import list as list_
+from .nodes import Call, Constant, Node, instantiate
+
+# Subtrees nested deeper than this are evaluated context by context through
+# their closures, which bounds the recursion of nested kernels
+MAX_KERNEL_DEPTH = 32
+
+# Number of contexts evaluated together by each kernel call
+CHUNK_SIZE = 4096
+
+type Kernel = Callable[[list[Any]], list[Any]]
+
+
+def compile_kernel(node: Node) -> Kernel:
+    """Compile a node tree into a kernel evaluating it over a batch of contexts.
+
+    A kernel takes a list of contexts and returns the list of results. Each
+    node of the tree gets a kernel of its own, set up once, which loops over
+    the batch rather than the whole tree being walked once per context.
+    Arguments of boolean.and, boolean.or and basic.coalesce are only
+    evaluated for the contexts they would be evaluated for one at a time.
+
+    Args:
+        node: The root of the node tree
+
+    Returns:
+        The kernel of the root node
+    """
+    values: dict[int, Any] = {}
+    instantiate(node, values)
+
+    return BatchCompiler(values).kernel(node, 0)
+
+
+def evaluate_many(
+    function: Callable[[Any], Any],
+    kernel: Kernel,
+    contexts: Iterable[Any],
+    chunk_size: int = CHUNK_SIZE,
+) -> Iterator[Any]:
+    """Evaluate a rule over contexts, a chunk of contexts at a time.
+
+    When the kernel raises for a chunk, the chunk is evaluated again context
+    by context with the rule's function, so that the exception raised is the
+    one evaluating the contexts in a loop would raise.
+
+    Args:
+        function: The rule function, evaluating a single context
+        kernel: The rule kernel, as returned by compile_kernel
+        contexts: The contexts to evaluate
+        chunk_size: Maximum number of contexts passed to each kernel call
+
+    Returns:
+        A generator of the result for each context, in order
+
+    Raises:
+        ValueError: If chunk_size is not positive
+    """
+    if chunk_size < 1:
+        raise ValueError("chunk_size must be positive")
+
+    return _evaluate_many(function, kernel, contexts, chunk_size)
+
+
+def _evaluate_many(
+    function: Callable[[Any], Any],
+    kernel: Kernel,
+    contexts: Iterable[Any],
+    chunk_size: int,
+) -> Iterator[Any]:
+    iterator = iter(contexts)
+
+    while chunk := list(islice(iterator, chunk_size)):
+        try:
+            results = kernel(chunk)
+        except Exception:
+            results = list(map(function, chunk))
+
+        yield from results
+
+
+class BatchCompiler:
+    """Compile the nodes of a tree into kernels evaluating batches of contexts.
+
+    Attributes:
+        values: The instantiated value of every node, keyed on node id
+    """
+
+    values: dict[int, Any]
+
+    def __init__(self, values: dict[int, Any]) -> None:
+        self.values = values
+
+    def kernel(self, node: Node, depth: int) -> Kernel:
+        """Return the kernel of a node.
+
+        Calls of built-in functions get kernels of their own. Everything else,
+        including env functions, is evaluated through the closure
+        library.evaluate would build for it.
+
+        Args:
+            node: The node to compile
+            depth: Nesting depth of the kernel
+
+        Returns:
+            The kernel
+        """
+        if isinstance(node, Constant):
+            return _repeat(node.value)
+
+        if isinstance(node, Call) and depth < MAX_KERNEL_DEPTH:
+            factory = KERNELS.get(node.function)
+
+            if factory is not None:
+                kernel = factory(self, node.arguments, depth + 1)
+                if kernel is not None:
+                    return kernel
+
+        value = self.values[id(node)]
+
+        if not callable(value):
+            return _repeat(value)
+
+        return lambda contexts: list(map(value, contexts))
+
+    def kernels(self, nodes: tuple[Node, ...], depth: int) -> list[Kernel]:
+        """Return the kernels of each of the nodes."""
+        return [self.kernel(node, depth) for node in nodes]
+
+
+type KernelFactory = Callable[[BatchCompiler, tuple[Node, ...], int], Kernel | None]
+
+
+def _repeat(value: Any) -> Kernel:
+    return lambda contexts: [value] * len(contexts)
+
+
+def _select(kernel: Kernel, contexts: list[Any], selected: list[int]) -> list[Any]:
+    # evaluate a kernel for the selected contexts only
+    if len(selected) == len(contexts):
+        return kernel(contexts)
+
+    return kernel([contexts[index] for index in selected])
+
+
+def _reduce(operation: Callable[[Any, Any], Any]) -> KernelFactory:
+    def factory(
+        compiler: BatchCompiler, arguments: tuple[Node, ...], depth: int
+    ) -> Kernel | None:
+        if not arguments:
+            return None
+
+        first, *rest = compiler.kernels(arguments, depth)
+
+        def kernel(contexts: list[Any]) -> list[Any]:
+            results = first(contexts)
+            for incoming in rest:
+                results = list(map(operation, results, incoming(contexts)))
+
+            return results
+
+        return kernel
+
+    return factory
+
+
+def _unary(function: Callable[[Any], Any]) -> KernelFactory:
+    def factory(
+        compiler: BatchCompiler, arguments: tuple[Node, ...], depth: int
+    ) -> Kernel | None:
+        if len(arguments) != 1:
+            return None
+
+        argument = compiler.kernel(arguments[0], depth)
+
+        return lambda contexts: list(map(function, argument(contexts)))
+
+    return factory
+
+
+def _constant(value: Any) -> KernelFactory:
+    def factory(
+        compiler: BatchCompiler, arguments: tuple[Node, ...], depth: int
+    ) -> Kernel | None:
+        return None if arguments else _repeat(value)
+
+    return factory
+
+
+def _and(
+    compiler: BatchCompiler, arguments: tuple[Node, ...], depth: int
+) -> Kernel | None:
+    kernels = compiler.kernels(arguments, depth)
+
+    def kernel(contexts: list[Any]) -> list[Any]:
+        results = [True] * len(contexts)
+        selected = list(range(len(contexts)))
+
+        for argument in kernels:
+            if not selected:
+                break
+
+            remaining = []
+            for index, value in zip(selected, _select(argument, contexts, selected)):
+                if value:
+                    remaining.append(index)
+                else:
+                    results[index] = False
+            selected = remaining
+
+        return results
+
+    return kernel
+
+
+def _or(
+    compiler: BatchCompiler, arguments: tuple[Node, ...], depth: int
+) -> Kernel | None:
+    kernels = compiler.kernels(arguments, depth)
+
+    def kernel(contexts: list[Any]) -> list[Any]:
+        results = [False] * len(contexts)
+        selected = list(range(len(contexts)))
+
+        for argument in kernels:
+            if not selected:
+                break
+
+            remaining = []
+            for index, value in zip(selected, _select(argument, contexts, selected)):
+                if value:
+                    results[index] = True
+                else:
+                    remaining.append(index)
+            selected = remaining
+
+        return results
+
+    return kernel
+
+
+def _coalesce(
+    compiler: BatchCompiler, arguments: tuple[Node, ...], depth: int
+) -> Kernel | None:
+    if not arguments:
+        return None
+
+    first, *rest = compiler.kernels(arguments, depth)
+
+    def kernel(contexts: list[Any]) -> list[Any]:
+        results = first(contexts)
+        selected = [index for index, value in enumerate(results) if not value]
+
+        for argument in rest:
+            if not selected:
+                break
+
+            remaining = []
+            for index, value in zip(selected, _select(argument, contexts, selected)):
+                results[index] = value
+                if not value:
+                    remaining.append(index)
+            selected = remaining
+
+        return results
+
+    return kernel
+
+
+def _context(
+    compiler: BatchCompiler, arguments: tuple[Node, ...], depth: int
+) -> Kernel | None:
+    if len(arguments) != 2:
+        return None
+
+    sub, argument = compiler.kernels(arguments, depth)
+
+    return lambda contexts: argument(sub(contexts))
+
+
+def _value(
+    compiler: BatchCompiler, arguments: tuple[Node, ...], depth: int
+) -> Kernel | None:
+    if len(arguments) != 1:
+        return None
+
+    return _repeat(compiler.values[id(arguments[0])])
+
+
+def _field(
+    compiler: BatchCompiler, arguments: tuple[Node, ...], depth: int
+) -> Kernel | None:
+    if not 0 < len(arguments) <= 2:
+        return None
+
+    key_value = compiler.values[id(arguments[0])]
+
+    if len(arguments) == 1:
+        if not callable(key_value):
+            getter = operator.itemgetter(key_value)
+            return lambda contexts: list(map(getter, contexts))
+
+        keys = compiler.kernel(arguments[0], depth)
+        return lambda contexts: list(map(operator.getitem, contexts, keys(contexts)))
+
+    key, default = compiler.kernels(arguments, depth)
+
+    def kernel(contexts: list[Any]) -> list[Any]:
+        # the default is only computed for contexts that are dictionaries
+        selected = [
+            index for index, context in enumerate(contexts) if isinstance(context, dict)
+        ]
+        defaults = dict(zip(selected, _select(default, contexts, selected)))
+
+        return [
+            (context.get(name, defaults[index]) if index in defaults else context[name])
+            for index, (context, name) in enumerate(zip(contexts, key(contexts)))
+        ]
+
+    return kernel
+
+
+def _string_field(
+    compiler: BatchCompiler, arguments: tuple[Node, ...], depth: int
+) -> Kernel | None:
+    field = _field(compiler, arguments, depth)
+    if field is None:
+        return None
+
+    return lambda contexts: list(map(str, field(contexts)))
+
+
+def _concat(
+    compiler: BatchCompiler, arguments: tuple[Node, ...], depth: int
+) -> Kernel | None:
+    if not arguments:
+        return None
+
+    link, *kernels = compiler.kernels(arguments, depth)
+
+    def kernel(contexts: list[Any]) -> list[Any]:
+        columns = [argument(contexts) for argument in kernels]
+
+        return [
+            separator.join(values)
+            for separator, *values in zip(link(contexts), *columns)
+        ]
+
+    return kernel
+
+
+def _member(
+    compiler: BatchCompiler, argument: Node, members: Any, depth: int, negate: bool
+) -> Kernel:
+    value = compiler.kernel(argument, depth)
+
+    if negate:
+        return lambda contexts: [item not in members for item in value(contexts)]
+
+    return lambda contexts: [item in members for item in value(contexts)]
+
+
+def _in(
+    compiler: BatchCompiler, arguments: tuple[Node, ...], depth: int
+) -> Kernel | None:
+    if len(arguments) == 2:
+        members = Members.of(compiler.values[id(arguments[1])])
+        if members is not None:
+            return _member(compiler, arguments[0], members, depth, False)
+
+    # condition.in reduces its arguments in reverse, collection first
+    return _reduce(operator.contains)(compiler, arguments[::-1], depth)
+
+
+def _not_in(
+    compiler: BatchCompiler, arguments: tuple[Node, ...], depth: int
+) -> Kernel | None:
+    if len(arguments) != 2:
+        return None
+
+    members = Members.of(compiler.values[id(arguments[1])])
+    if members is None:
+        return None
+
+    return _member(compiler, arguments[0], members, depth, True)
+
+
+def _in_range(
+    compiler: BatchCompiler, arguments: tuple[Node, ...], depth: int
+) -> Kernel | None:
+    if not arguments:
+        return None
+
+    intervals = [literal(compiler.values[id(node)]) for node in arguments[1:]]
+    if not all(isinstance(interval, tuple) for interval in intervals):
+        return None
+
+    return _member(compiler, arguments[0], Intervals(tuple(intervals)), depth, False)
+
+
+KERNELS: dict[Callable[..., Any], KernelFactory] = {
+    basic.coalesce: _coalesce,
+    basic.context: _context,
+    basic.field: _field,
+    basic.value: _value,
+    boolean.and_: _and,
+    boolean.or_: _or,
+    boolean.not_: _unary(operator.not_),
+    boolean.tautology: _constant(True),
+    boolean.contradiction: _constant(False),
+    condition.equal: _reduce(operator.eq),
+    condition.gt: _reduce(operator.gt),
+    condition.ge: _reduce(operator.ge),
+    condition.lt: _reduce(operator.lt),
+    condition.le: _reduce(operator.le),
+    condition.in_: _in,
+    condition.in_range: _in_range,
+    condition.not_in: _not_in,
+    condition.is_none: _unary(lambda value: value is None),
+    condition.is_true: _unary(lambda value: value is True),
+    list_.length: _unary(len),
+    number.add: _reduce(operator.add),
+    number.subtract: _reduce(operator.sub),
+    number.multiply: _reduce(operator.mul),
+    number.divide: _reduce(operator.truediv),
+    number.modulo: _reduce(operator.mod),
+    string.concat: _concat,
+    string.field: _string_field,
+    string.lower: _unary(operator.methodcaller("lower")),
+}
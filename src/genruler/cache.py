@@ -0,0 +1,186 @@
+import re
+import threading
+from collections import OrderedDict
+from collections.abc import Callable, Hashable
+from typing import Any, NamedTuple
+
+WHITESPACE = re.compile(r'("[^"]*")|\s*([()])\s*|\s+')
+
+
+class CacheInfo(NamedTuple):
+    """Statistics reported by ParseCache.info()."""
+
+    hits: int
+    misses: int
+    evictions: int
+    maxsize: int
+    currsize: int
+
+
+def normalize(source: str) -> str:
+    """Normalize a rule source so that formatting differences share a cache entry.
+
+    Runs of whitespace outside of string literals are collapsed into a single
+    space, and whitespace around parentheses is dropped entirely. String
+    literals are kept verbatim.
+
+    Args:
+        source: The S-expression string to normalize
+
+    Returns:
+        The normalized S-expression string
+
+    Examples:
+        >>> normalize('( boolean.and\\n  (boolean.tautology) )')
+        '(boolean.and(boolean.tautology))'
+    """
+
+    def replace(match: re.Match) -> str:
+        if match.group(1) is not None:
+            return match.group(1)
+        elif match.group(2) is not None:
+            return match.group(2)
+        else:
+            return " "
+
+    return WHITESPACE.sub(replace, source).strip()
+
+
+class ParseCache:
+    """A bounded, thread-safe LRU cache of parsed rules.
+
+    Entries are keyed on the normalized source text together with the identity
+    of the env the rule was parsed against. The env is kept alive by its entry,
+    so its id cannot be reused by another object while the entry exists.
+
+    Attributes:
+        maxsize: Maximum number of entries kept, 0 disables caching
+    """
+
+    maxsize: int
+
+    def __init__(self, maxsize: int = 256) -> None:
+        """Initialize an empty cache.
+
+        Args:
+            maxsize: Maximum number of entries kept before the least recently
+                used one is evicted
+
+        Raises:
+            ValueError: If maxsize is negative
+        """
+        if maxsize < 0:
+            raise ValueError("maxsize must not be negative")
+
+        self.maxsize = maxsize
+        self._entries: OrderedDict[tuple[str, int, Hashable], tuple[Any, Any]] = (
+            OrderedDict()
+        )
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+
+    def get_or_parse(
+        self,
+        source: str,
+        env: Any,
+        factory: Callable[[], Any],
+        variant: Hashable = None,
+    ) -> Any:
+        """Return the cached rule for source and env, parsing it on a miss.
+
+        Args:
+            source: The S-expression string
+            env: The env the rule is parsed against
+            factory: Called without arguments to produce the rule on a miss
+            variant: Distinguishes rules compiled from the same source and env
+                with different options, such as the backend
+
+        Returns:
+            The cached or freshly parsed rule
+        """
+        key = (normalize(source), id(env), variant)
+
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self._hits += 1
+                return entry[1]
+            self._misses += 1
+
+        # parse outside of the lock, a concurrent miss on the same key simply
+        # parses twice and the last one wins
+        result = factory()
+
+        with self._lock:
+            if self.maxsize > 0:
+                self._entries[key] = (env, result)
+                self._entries.move_to_end(key)
+                self._evict()
+
+        return result
+
+    def invalidate(self, source: str, env: Any = None) -> bool:
+        """Remove the entries of a source and env, whatever their variant.
+
+        Args:
+            source: The S-expression string of the entry
+            env: The env the entry was parsed against
+
+        Returns:
+            True if an entry was removed, False if it was not cached
+        """
+        prefix = (normalize(source), id(env))
+
+        with self._lock:
+            keys = [key for key in self._entries if key[:2] == prefix]
+            for key in keys:
+                del self._entries[key]
+
+        return bool(keys)
+
+    def clear(self) -> None:
+        """Remove every entry and reset the statistics."""
+        with self._lock:
+            self._entries.clear()
+            self._hits = self._misses = self._evictions = 0
+
+    def resize(self, maxsize: int) -> None:
+        """Change the size limit, evicting entries if the cache shrinks.
+
+        Args:
+            maxsize: The new maximum number of entries
+
+        Raises:
+            ValueError: If maxsize is negative
+        """
+        if maxsize < 0:
+            raise ValueError("maxsize must not be negative")
+
+        with self._lock:
+            self.maxsize = maxsize
+            self._evict()
+
+    def info(self) -> CacheInfo:
+        """Report hit, miss and eviction counters along with the cache size."""
+        with self._lock:
+            return CacheInfo(
+                self._hits,
+                self._misses,
+                self._evictions,
+                self.maxsize,
+                len(self._entries),
+            )
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def _evict(self) -> None:
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+            self._evictions += 1
+
+
+default_cache = ParseCache()
@@ -0,0 +1,351 @@
+"""Evaluate a rule over JSON Lines or CSV records from the command line.
+
+Usage:
+    genruler RULE [INPUT] [--mode matches|results|counts] [--workers N]
+    genruler --rule-file FILE [INPUT] [--env module:path] [--bench]
+"""
+
+import argparse
+import importlib
+import json
+import sys
+import time
+from collections.abc import Callable, Iterator, Sequence
+from contextlib import nullcontext
+from itertools import tee
+from typing import Any, BinaryIO, ContextManager
+
+from . import compile as compile_rule
+from . import stream
+from .batch import CHUNK_SIZE
+from .compiler import BACKENDS, Rule
+from .exceptions import GenRulerException
+from .lexer import read
+from .nodes import build
+
+MODES = ("matches", "results", "counts")
+FORMATS = ("jsonl", "csv")
+
+# Percentiles of the per-record latency reported by --bench
+PERCENTILES = (50, 90, 99)
+
+
+def main(argv: Sequence[str] | None = None) -> int:
+    """Run the command line interface.
+
+    Args:
+        argv: The arguments, without the program name, defaults to sys.argv
+
+    Returns:
+        The exit status
+    """
+    parser = _parser()
+    arguments = parser.parse_args(argv)
+
+    if arguments.rule_file is not None:
+        if arguments.rule is not None:
+            if arguments.input != "-":
+                parser.error("a rule cannot be given with --rule-file")
+            # the only positional argument is the input
+            arguments.input, arguments.rule = arguments.rule, None
+
+        try:
+            with open(arguments.rule_file) as file:
+                source = file.read()
+        except OSError as e:
+            parser.error(f"cannot read {arguments.rule_file}: {e.strerror}")
+    elif arguments.rule is not None:
+        source = arguments.rule
+    else:
+        parser.error("a rule or --rule-file is required")
+
+    try:
+        env = load_env(arguments.env) if arguments.env else None
+        rule = compile_rule(
+            source,
+            env,
+            arguments.backend,
+            cache=None,
+            optimize=not arguments.no_optimize,
+        )
+    except (GenRulerException, ValueError, ImportError, AttributeError) as e:
+        parser.error(str(e))
+
+    input_format = arguments.format or (
+        "csv" if arguments.input.lower().endswith(".csv") else "jsonl"
+    )
+
+    with _open(arguments.input) as source_file:
+        output = sys.stdout.buffer
+
+        try:
+            if arguments.bench:
+                records = _records(source_file, input_format, arguments, None)
+                bench(rule, source, env, records, arguments)
+            else:
+                _run(rule, source_file, input_format, arguments, output)
+        except BrokenPipeError:
+            # the reader of the output, such as head, stopped early
+            sys.stderr.close()
+            return 0
+        except Exception as e:
+            print(f"genruler: {type(e).__name__}: {e}", file=sys.stderr)
+            for note in getattr(e, "__notes__", ()):
+                print(f"genruler: {note}", file=sys.stderr)
+            return 1
+
+        output.flush()
+
+    return 0
+
+
+def load_env(reference: str) -> Any:
+    """Import the env of custom functions a reference points to.
+
+    Args:
+        reference: A module name, optionally followed by a colon and the
+            dotted path of an object of the module, as in "package.rules:Env"
+
+    Returns:
+        The module, or the object of the module
+
+    Raises:
+        ImportError: If the module cannot be imported
+        AttributeError: If the module has no such object
+    """
+    module, _, path = reference.partition(":")
+    env = importlib.import_module(module)
+
+    for name in path.split(".") if path else ():
+        env = getattr(env, name)
+
+    return env
+
+
+def bench(
+    rule: Rule,
+    source: str,
+    env: Any,
+    records: Iterator[stream.Record],
+    arguments: argparse.Namespace,
+) -> None:
+    """Print how long parsing, compiling and evaluating a rule take.
+
+    Args:
+        rule: The compiled rule
+        source: The S-expression of the rule
+        env: The env of custom functions
+        records: The records to evaluate the rule with, read into memory
+        arguments: The parsed command line arguments
+    """
+    contexts = [record.value for record in records]
+    repeat = arguments.repeat
+
+    parse = _best(lambda: build(read(source), env), repeat)
+    compile_ = _best(
+        lambda: compile_rule(
+            source,
+            env,
+            arguments.backend,
+            cache=None,
+            optimize=not arguments.no_optimize,
+        ),
+        repeat,
+    )
+
+    _print("parse", f"{parse * 1e3:.3f} ms")
+    _print("compile", f"{compile_ * 1e3:.3f} ms ({arguments.backend}, parse included)")
+    _print("records", f"{len(contexts)}")
+
+    if not contexts:
+        return
+
+    latencies = []
+    for context in contexts:
+        start = time.perf_counter_ns()
+        rule(context)
+        latencies.append(time.perf_counter_ns() - start)
+
+    latencies.sort()
+    quantiles = [
+        (f"p{p}", latencies[min(len(latencies) - 1, len(latencies) * p // 100)])
+        for p in PERCENTILES
+    ]
+    quantiles.append(("max", latencies[-1]))
+    _print("latency", ", ".join(f"{name} {ns / 1e3:.2f} us" for name, ns in quantiles))
+
+    single = _best(lambda: [rule(context) for context in contexts], repeat)
+    many = _best(lambda: rule.evaluate_many(contexts), repeat)
+    _print("evaluate", f"{len(contexts) / single:,.0f} records/s")
+    _print("evaluate_many", f"{len(contexts) / many:,.0f} records/s")
+
+    if arguments.workers:
+        parallel = _best(
+            lambda: rule.evaluate_parallel(
+                contexts, workers=arguments.workers, chunk_size=arguments.chunk_size
+            ),
+            repeat,
+        )
+        _print(
+            f"parallel x{arguments.workers}",
+            f"{len(contexts) / parallel:,.0f} records/s",
+        )
+
+
+def _parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(
+        prog="genruler", description=__doc__.splitlines()[0]
+    )
+    parser.add_argument("rule", nargs="?", help="the S-expression of the rule")
+    parser.add_argument(
+        "input",
+        nargs="?",
+        default="-",
+        help="the JSON Lines or CSV file to read, - for standard input (default)",
+    )
+    parser.add_argument(
+        "-f",
+        "--rule-file",
+        help="read the rule from a file, INPUT then being the first argument",
+    )
+    parser.add_argument(
+        "-m",
+        "--mode",
+        choices=MODES,
+        default="matches",
+        help="write the matching records as they were read, the result for "
+        "each record as JSON Lines, or the counts of records and matches",
+    )
+    parser.add_argument(
+        "--format",
+        choices=FORMATS,
+        help="the format of the input, from its extension by default",
+    )
+    parser.add_argument(
+        "-e", "--env", help="the custom functions, as module or module:path.to.object"
+    )
+    parser.add_argument("-b", "--backend", choices=BACKENDS, default="closure")
+    parser.add_argument(
+        "--no-optimize", action="store_true", help="disable constant folding"
+    )
+    parser.add_argument(
+        "-w", "--workers", type=int, help="evaluate in this many worker processes"
+    )
+    parser.add_argument("--chunk-size", type=_positive, default=CHUNK_SIZE)
+    parser.add_argument("--mmap", action="store_true", help="memory-map the input file")
+    parser.add_argument(
+        "--prefilter",
+        action="store_true",
+        help="skip JSON lines without the values the rule is guarded on "
+        "undecoded, in matches mode",
+    )
+    parser.add_argument(
+        "--bench",
+        action="store_true",
+        help="print parse and compile times, and the evaluation throughput "
+        "and latency over the input, instead of evaluating it",
+    )
+    parser.add_argument(
+        "--repeat", type=int, default=5, help="runs each --bench timing is the best of"
+    )
+
+    return parser
+
+
+def _positive(value: str) -> int:
+    number = int(value)
+    if number < 1:
+        raise argparse.ArgumentTypeError(f"{value} is not positive")
+
+    return number
+
+
+def _open(path: str) -> ContextManager[BinaryIO]:
+    if path == "-":
+        # leave standard input open
+        return nullcontext(sys.stdin.buffer)
+
+    return open(path, "rb", buffering=stream.BUFFER_SIZE)
+
+
+def _records(
+    file: BinaryIO,
+    input_format: str,
+    arguments: argparse.Namespace,
+    prefilter: Rule | None,
+) -> Iterator[stream.Record]:
+    if input_format == "csv":
+        return stream.read_csv(file, use_mmap=arguments.mmap)
+
+    return stream.read_jsonl(file, use_mmap=arguments.mmap, prefilter=prefilter)
+
+
+def _run(
+    rule: Rule,
+    file: BinaryIO,
+    input_format: str,
+    arguments: argparse.Namespace,
+    output: BinaryIO,
+) -> None:
+    header = b""
+    if input_format == "csv":
+        # the header is copied through to the matches
+        row = stream.read_header(file)
+        header = b"" if row is None else row.raw
+        records = stream.read_csv(
+            file, fieldnames=row.value if row else [], use_mmap=arguments.mmap
+        )
+    else:
+        matching = arguments.prefilter and arguments.mode == "matches"
+        records = _records(file, input_format, arguments, rule if matching else None)
+
+    records, contexts = tee(records)
+    results = _evaluate(rule, (record.value for record in contexts), arguments)
+
+    if arguments.mode == "matches":
+        stream.write(
+            (record for record, result in zip(records, results) if result),
+            output,
+            header,
+        )
+    elif arguments.mode == "results":
+        for result in results:
+            output.write(json.dumps(result, default=repr).encode() + b"\n")
+    else:
+        total = matches = 0
+        for result in results:
+            total += 1
+            matches += bool(result)
+
+        output.write(
+            json.dumps({"records": total, "matches": matches}).encode() + b"\n"
+        )
+
+
+def _evaluate(
+    rule: Rule, contexts: Iterator[Any], arguments: argparse.Namespace
+) -> Iterator[Any]:
+    if arguments.workers:
+        return rule.evaluate_parallel(
+            contexts,
+            workers=arguments.workers,
+            chunk_size=arguments.chunk_size,
+            lazy=True,
+        )
+
+    return rule.evaluate_many(contexts, lazy=True, chunk_size=arguments.chunk_size)
+
+
+def _best(function: Callable[[], Any], repeat: int) -> float:
+    best = float("inf")
+
+    for _ in range(max(repeat, 1)):
+        start = time.perf_counter()
+        function()
+        best = min(best, time.perf_counter() - start)
+
+    return best
+
+
+def _print(label: str, value: str) -> None:
+    print(f"{label:>14}  {value}")
@@ -0,0 +1,538 @@
+import operator
+from collections.abc import Callable, Mapping
+from functools import cached_property
+from typing import Any
+
+try:
+    import numpy as np
+except ImportError as e:  # pragma: no cover
+    raise ImportError(
+        "genruler.columnar requires numpy, installed with genruler[columnar]"
+    ) from e
+
+from .common import Intervals, Members, literal
+from .modules import basic, boolean, condition, number, string
+from .nodes import Call, Constant, Literal, Node, instantiate
+
+# Subtrees nested deeper than this are evaluated row by row through their
+# closures, which bounds the recursion of nested kernels
+MAX_KERNEL_DEPTH = 32
+
+# Python values that combine with arrays element by element
+SCALARS = (int, float, bool, str, type(None))
+
+type Columns = Mapping[str, np.ndarray]
+type ColumnKernel = Callable[["Frame"], Any]
+
+
+class Frame:
+    """The columns a rule is evaluated against.
+
+    Attributes:
+        columns: Arrays of equal length, keyed on field name
+        length: The number of rows
+    """
+
+    columns: Columns
+    length: int
+
+    def __init__(self, columns: Columns, length: int | None = None) -> None:
+        """Initialize with the columns of a frame.
+
+        Args:
+            columns: Arrays, or sequences converted into arrays, keyed on
+                field name
+            length: The number of rows, required when there are no columns
+
+        Raises:
+            ValueError: If the columns are not one dimensional arrays of the
+                same length, or there are neither columns nor a length
+        """
+        self.columns = {name: np.asarray(column) for name, column in columns.items()}
+
+        lengths = {len(column) for column in self.columns.values()}
+        if length is not None:
+            lengths.add(length)
+
+        if len(lengths) != 1 or any(
+            column.ndim != 1 for column in self.columns.values()
+        ):
+            raise ValueError(
+                "columns must be one dimensional arrays of the same length, "
+                "and length must be given when there are no columns"
+            )
+
+        self.length = lengths.pop()
+
+    @cached_property
+    def rows(self) -> list[dict[str, Any]]:
+        """The rows of the frame as dictionaries of Python values."""
+        names = list(self.columns)
+        values = [column.tolist() for column in self.columns.values()]
+
+        return [dict(zip(names, row)) for row in zip(*values)] or [
+            {} for _ in range(self.length)
+        ]
+
+
+def compile_columns(node: Node) -> ColumnKernel:
+    """Compile a node tree into a kernel evaluating it over columns.
+
+    Fields read with a constant key resolve to whole columns, and calls of the
+    number, condition and boolean functions run as NumPy array operations.
+    Anything without a vectorized form, including env functions, is evaluated
+    row by row with its closure, as is any node whose array operation raises,
+    so that errors are the ones evaluating each row would raise.
+
+    Args:
+        node: The root of the node tree
+
+    Returns:
+        The kernel of the root node, taking a Frame and returning an array or
+        a value shared by every row
+    """
+    values: dict[int, Any] = {}
+    instantiate(node, values)
+
+    return ColumnCompiler(values).kernel(node, 0)
+
+
+def evaluate_columns(
+    kernel: ColumnKernel, columns: Columns, length: int | None = None
+) -> np.ndarray:
+    """Evaluate a column kernel, returning one result per row.
+
+    Args:
+        kernel: The rule kernel, as returned by compile_columns
+        columns: Arrays of equal length, keyed on field name
+        length: The number of rows, required when there are no columns
+
+    Returns:
+        The array of results, a boolean mask for conditions
+    """
+    frame = Frame(columns, length)
+
+    with np.errstate(divide="raise", over="raise", invalid="raise"):
+        result = kernel(frame)
+
+    # never hand out a column of the caller as the result
+    if any(result is column for column in frame.columns.values()):
+        return result.copy()
+
+    return _broadcast(result, frame.length)
+
+
+class ColumnCompiler:
+    """Compile the nodes of a tree into kernels evaluating columns.
+
+    Attributes:
+        values: The instantiated value of every node, keyed on node id
+    """
+
+    values: dict[int, Any]
+
+    def __init__(self, values: dict[int, Any]) -> None:
+        self.values = values
+
+    def kernel(self, node: Node, depth: int) -> ColumnKernel:
+        """Return the kernel of a node.
+
+        Args:
+            node: The node to compile
+            depth: Nesting depth of the kernel
+
+        Returns:
+            The kernel
+        """
+        if isinstance(node, Constant):
+            return lambda frame: node.value
+
+        value = self.values[id(node)]
+
+        if isinstance(node, Call) and depth < MAX_KERNEL_DEPTH:
+            factory = KERNELS.get(node.function)
+            vectorized = (
+                factory(self, node.arguments, depth + 1)
+                if factory is not None
+                else None
+            )
+
+            if vectorized is not None:
+
+                def kernel(frame: Frame) -> Any:
+                    try:
+                        return vectorized(frame)
+                    except Exception:
+                        return _rows(value, frame)
+
+                return kernel
+
+        if not callable(value):
+            return lambda frame: value
+
+        return lambda frame: _rows(value, frame)
+
+    def kernels(self, nodes: tuple[Node, ...], depth: int) -> list[ColumnKernel]:
+        """Return the kernels of each of the nodes."""
+        return [self.kernel(node, depth) for node in nodes]
+
+    def constant(self, node: Node) -> tuple[bool, Any]:
+        """Return whether a node is a constant, and its value if it is."""
+        if isinstance(node, Constant):
+            return True, node.value
+
+        if isinstance(node, Literal) and not callable(node.value):
+            return True, node.value
+
+        return False, None
+
+
+type KernelFactory = Callable[
+    [ColumnCompiler, tuple[Node, ...], int], ColumnKernel | None
+]
+
+
+class Unsupported(TypeError):
+    """Raised by kernels for values without a vectorized form."""
+
+
+def _rows(closure: Callable[[Any], Any], frame: Frame) -> np.ndarray:
+    return _array([closure(row) for row in frame.rows])
+
+
+def _array(values: list[Any]) -> np.ndarray:
+    # build a one dimensional array even of sequences, narrowing the dtype
+    # when every value has the same simple type
+    result = np.empty(len(values), dtype=object)
+    result[:] = values
+
+    kinds = set(map(type, values))
+    if len(kinds) == 1 and kinds <= {bool, float, str}:
+        return result.astype(kinds.pop())
+    elif kinds == {int}:
+        try:
+            return result.astype(np.int64)
+        except OverflowError:
+            return result
+
+    return result
+
+
+def _broadcast(value: Any, length: int) -> np.ndarray:
+    if isinstance(value, np.ndarray):
+        return value
+
+    return _array([value] * length)
+
+
+def _operand(value: Any) -> Any:
+    if isinstance(value, np.ndarray):
+        return value
+
+    if type(value) not in SCALARS:
+        raise Unsupported(type(value).__name__)
+
+    return value
+
+
+def _number(value: Any) -> Any:
+    # numpy adds booleans as a logical or, python as integers
+    value = _operand(value)
+
+    if isinstance(value, np.ndarray) and value.dtype.kind == "b":
+        return value.astype(np.int64)
+
+    return value
+
+
+def _numeric(value: Any) -> Any:
+    # python formats strings with the modulo operator, which arrays do not
+    value = _number(value)
+
+    if isinstance(value, np.ndarray):
+        if value.dtype.kind not in "iuf":
+            raise Unsupported(str(value.dtype))
+    elif type(value) not in (int, float, bool):
+        raise Unsupported(type(value).__name__)
+
+    return value
+
+
+def _exact(operation: Callable[[Any, Any], Any]) -> Callable[[Any, Any], Any]:
+    # numpy wraps integers around on overflow, where python ones grow, so the
+    # operation is computed again in floats, falling back to the rows when
+    # the result gets anywhere near the bounds of int64
+    def function(left: Any, right: Any) -> Any:
+        result = operation(left, right)
+
+        if isinstance(result, np.ndarray) and result.dtype.kind in "iu":
+            approximate = operation(np.asarray(left, float), np.asarray(right, float))
+            if np.any(np.abs(approximate) >= 2.0**62):
+                raise Unsupported("integer overflow")
+
+        return result
+
+    return function
+
+
+def _truth(value: Any) -> Any:
+    if not isinstance(value, np.ndarray):
+        return bool(value)
+
+    kind = value.dtype.kind
+
+    if kind == "b":
+        return value
+    elif kind in "iufc":
+        return value != 0
+    elif kind in "US":
+        return np.char.str_len(value) > 0
+    else:
+        return np.fromiter(map(bool, value), bool, len(value))
+
+
+def _each(predicate: Callable[[Any], bool]) -> Callable[[Any], Any]:
+    # apply an identity test element by element, python values of a typed
+    # array never being None or True
+    def function(value: Any) -> Any:
+        if not isinstance(value, np.ndarray):
+            return predicate(value)
+
+        if value.dtype.kind == "O":
+            return np.fromiter(map(predicate, value), bool, len(value))
+        elif value.dtype.kind == "b" and predicate(True):
+            return value.copy()
+
+        return np.zeros(len(value), bool)
+
+    return function
+
+
+def _reduce(
+    operation: Callable[[Any, Any], Any], operand: Callable[[Any], Any] = _operand
+) -> KernelFactory:
+    def factory(
+        compiler: ColumnCompiler, arguments: tuple[Node, ...], depth: int
+    ) -> ColumnKernel | None:
+        if not arguments:
+            return None
+
+        first, *rest = compiler.kernels(arguments, depth)
+
+        def kernel(frame: Frame) -> Any:
+            result = operand(first(frame))
+            for incoming in rest:
+                result = operation(result, operand(incoming(frame)))
+
+            return result
+
+        return kernel
+
+    return factory
+
+
+def _unary(function: Callable[[Any], Any]) -> KernelFactory:
+    def factory(
+        compiler: ColumnCompiler, arguments: tuple[Node, ...], depth: int
+    ) -> ColumnKernel | None:
+        if len(arguments) != 1:
+            return None
+
+        argument = compiler.kernel(arguments[0], depth)
+
+        return lambda frame: function(argument(frame))
+
+    return factory
+
+
+def _constant(value: Any) -> KernelFactory:
+    def factory(
+        compiler: ColumnCompiler, arguments: tuple[Node, ...], depth: int
+    ) -> ColumnKernel | None:
+        return None if arguments else lambda frame: value
+
+    return factory
+
+
+def _boolean(
+    combine: Callable[[Any, Any], Any], initial: bool, decided: Callable[[Any], bool]
+) -> KernelFactory:
+    def factory(
+        compiler: ColumnCompiler, arguments: tuple[Node, ...], depth: int
+    ) -> ColumnKernel | None:
+        kernels = compiler.kernels(arguments, depth)
+
+        def kernel(frame: Frame) -> Any:
+            result: Any = initial
+
+            for argument in kernels:
+                # stop once every row is decided, like the row by row
+                # evaluation stops at the first decisive argument
+                if decided(result):
+                    break
+
+                result = combine(result, _truth(argument(frame)))
+
+            return result
+
+        return kernel
+
+    return factory
+
+
+def _not(value: Any) -> Any:
+    truth = _truth(value)
+
+    return ~truth if isinstance(truth, np.ndarray) else not truth
+
+
+def _field(
+    compiler: ColumnCompiler, arguments: tuple[Node, ...], depth: int
+) -> ColumnKernel | None:
+    if not 0 < len(arguments) <= 2:
+        return None
+
+    constant, key = compiler.constant(arguments[0])
+    if not constant:
+        return None
+
+    if len(arguments) == 1:
+        return lambda frame: frame.columns[key]
+
+    default = compiler.kernel(arguments[1], depth)
+
+    return lambda frame: (
+        frame.columns[key] if key in frame.columns else default(frame)
+    )
+
+
+def _value(
+    compiler: ColumnCompiler, arguments: tuple[Node, ...], depth: int
+) -> ColumnKernel | None:
+    if len(arguments) != 1:
+        return None
+
+    value = compiler.values[id(arguments[0])]
+
+    return lambda frame: value
+
+
+def _in(
+    compiler: ColumnCompiler, arguments: tuple[Node, ...], depth: int
+) -> ColumnKernel | None:
+    if len(arguments) != 2:
+        return None
+
+    value, collection = compiler.kernels(arguments, depth)
+
+    def kernel(frame: Frame) -> Any:
+        # condition.in computes the collection before the value
+        items = collection(frame)
+        values = value(frame)
+
+        if not isinstance(items, np.ndarray) and not isinstance(values, np.ndarray):
+            return values in items
+
+        if (
+            isinstance(items, np.ndarray)
+            or not isinstance(items, (tuple, list))
+            or values.dtype.kind not in "biufU"
+        ):
+            raise Unsupported("in")
+
+        # only compare items of the same kind as the column, numpy would
+        # otherwise convert them into a common type
+        if values.dtype.kind == "U":
+            items = [item for item in items if type(item) is str]
+        else:
+            items = [item for item in items if type(item) in (int, float, bool)]
+
+        return np.isin(values, items) if items else np.zeros(len(values), bool)
+
+    return kernel
+
+
+def _not_in(
+    compiler: ColumnCompiler, arguments: tuple[Node, ...], depth: int
+) -> ColumnKernel | None:
+    if len(arguments) != 2 or Members.of(compiler.values[id(arguments[1])]) is None:
+        return None
+
+    contained = _in(compiler, arguments, depth)
+
+    return lambda frame: _not(contained(frame))
+
+
+def _in_range(
+    compiler: ColumnCompiler, arguments: tuple[Node, ...], depth: int
+) -> ColumnKernel | None:
+    if not arguments:
+        return None
+
+    intervals = [literal(compiler.values[id(node)]) for node in arguments[1:]]
+    if not all(isinstance(interval, tuple) for interval in intervals):
+        return None
+
+    members = Intervals(tuple(intervals))
+    if members.lowers is None:
+        return None
+
+    value = compiler.kernel(arguments[0], depth)
+    textual = all(type(bound) is str for bound in members.lowers)
+    lowers, uppers = np.array(members.lowers), np.array(members.uppers)
+
+    def kernel(frame: Frame) -> Any:
+        values = value(frame)
+
+        if not isinstance(values, np.ndarray):
+            return values in members
+
+        # the bounds are numbers or strings, and only compare with the same
+        if values.dtype.kind not in ("U" if textual else "biuf"):
+            raise Unsupported("in_range")
+
+        if not len(lowers):
+            return np.zeros(len(values), bool)
+
+        # the merged interval with the greatest lower bound not above the value
+        index = np.searchsorted(lowers, values, side="right") - 1
+
+        return (index >= 0) & (values <= uppers[np.maximum(index, 0)])
+
+    return kernel
+
+
+def _lower(value: Any) -> Any:
+    if isinstance(value, np.ndarray) and value.dtype.kind == "U":
+        return np.char.lower(value)
+    elif type(value) is str:
+        return value.lower()
+
+    raise Unsupported("lower")
+
+
+KERNELS: dict[Callable[..., Any], KernelFactory] = {
+    basic.field: _field,
+    basic.value: _value,
+    boolean.and_: _boolean(operator.and_, True, lambda result: not np.any(result)),
+    boolean.or_: _boolean(operator.or_, False, lambda result: bool(np.all(result))),
+    boolean.not_: _unary(_not),
+    boolean.tautology: _constant(True),
+    boolean.contradiction: _constant(False),
+    condition.equal: _reduce(operator.eq),
+    condition.gt: _reduce(operator.gt),
+    condition.ge: _reduce(operator.ge),
+    condition.lt: _reduce(operator.lt),
+    condition.le: _reduce(operator.le),
+    condition.in_: _in,
+    condition.in_range: _in_range,
+    condition.not_in: _not_in,
+    condition.is_none: _unary(_each(lambda value: value is None)),
+    condition.is_true: _unary(_each(lambda value: value is True)),
+    number.add: _reduce(_exact(operator.add), _number),
+    number.subtract: _reduce(_exact(operator.sub), _number),
+    number.multiply: _reduce(_exact(operator.mul), _number),
+    number.divide: _reduce(operator.truediv, _number),
+    number.modulo: _reduce(operator.mod, _numeric),
+    string.lower: _unary(_lower),
+}
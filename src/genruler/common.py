@@ -1,14 +1,175 @@
+from bisect import bisect_right
 from collections.abc import Callable
 from functools import reduce
 from typing import Any
 
 from .library import compute
 
+# Types whose hash is consistent with their equality, and with each other
+HASHABLE = (int, float, bool, str, type(None))
 
-def binary[T](
-    operation: Callable[[Any, Any], T], arguments: tuple[Any]
-) -> Callable[[Any], T]:
-    def inner(context: dict[Any, Any]) -> T:
-        return reduce(operation, (compute(argument, context) for argument in arguments))
 
-    return inner
+class binary[T]:
+    """Fold the values of the arguments with a binary operation, left to right.
+
+    A slotted object rather than a closure, as rules hold one per comparison
+    and arithmetic call, and calls with two arguments skip the reduction.
+    """
+
+    __slots__ = ("operation", "arguments")
+
+    operation: Callable[[Any, Any], T]
+    arguments: tuple[Any, ...]
+
+    def __init__(
+        self, operation: Callable[[Any, Any], T], arguments: tuple[Any, ...]
+    ) -> None:
+        self.operation = operation
+        self.arguments = arguments
+
+    def __call__(self, context: Any) -> T:
+        arguments = self.arguments
+
+        if len(arguments) == 2:
+            return self.operation(
+                compute(arguments[0], context), compute(arguments[1], context)
+            )
+
+        return reduce(
+            self.operation, (compute(argument, context) for argument in arguments)
+        )
+
+
+def literal(argument: Any) -> Any:
+    """Return the value of an argument known before evaluation.
+
+    Args:
+        argument: An instantiated argument of a rule function
+
+    Returns:
+        The value of a basic.value argument, the argument itself if it is not
+        callable, or None if its value depends on the context
+    """
+    from .modules import basic
+
+    if isinstance(argument, basic.value):
+        return argument.value
+
+    return None if callable(argument) else argument
+
+
+class Members:
+    """A literal collection with hashed membership tests.
+
+    Tests give the result of testing membership in the collection itself, a
+    tuple of simple values, without scanning it.
+
+    Attributes:
+        items: The collection
+    """
+
+    __slots__ = ("items", "_hashed")
+
+    items: tuple[Any, ...]
+
+    def __init__(self, items: tuple[Any, ...]) -> None:
+        self.items = items
+        self._hashed = frozenset(items)
+
+    @classmethod
+    def of(cls, argument: Any) -> "Members | None":
+        """Return the members of a literal collection argument.
+
+        Args:
+            argument: An instantiated argument of a rule function
+
+        Returns:
+            The members, or None if the argument is not a tuple known before
+            evaluation, or holds values that are not simply hashable
+        """
+        items = literal(argument)
+
+        if type(items) is not tuple or not all(
+            type(item) in HASHABLE for item in items
+        ):
+            return None
+
+        return cls(items)
+
+    def __contains__(self, value: Any) -> bool:
+        try:
+            return value in self._hashed
+        except TypeError:
+            # unhashable values are compared with every item, like a tuple does
+            return value in self.items
+
+    def __repr__(self) -> str:
+        return f"{self.__class__.__name__}({self.items!r})"
+
+
+class Intervals:
+    """Closed intervals with membership tests by binary search.
+
+    A value is a member when lower <= value <= upper for any of the intervals.
+    Intervals of numbers, or of strings, are sorted and merged up front so that
+    a test is a single bisection. Any other bounds are tested one interval at
+    a time.
+
+    Attributes:
+        intervals: The (lower, upper) pairs, in the order they were given
+        lowers: The lower bounds of the merged intervals, in ascending order,
+            or None when the bounds are not all numbers or all strings
+        uppers: The upper bounds of the merged intervals
+    """
+
+    __slots__ = ("intervals", "lowers", "uppers")
+
+    intervals: tuple[tuple[Any, Any], ...]
+    lowers: list[Any] | None
+    uppers: list[Any]
+
+    def __init__(self, intervals: tuple[tuple[Any, Any], ...]) -> None:
+        """Initialize with the bounds of the intervals.
+
+        Raises:
+            ValueError: If an interval is not a pair of bounds
+        """
+        if not all(
+            isinstance(interval, tuple | list) and len(interval) == 2
+            for interval in intervals
+        ):
+            raise ValueError("intervals must be pairs of (lower, upper) bounds")
+
+        self.intervals = tuple(tuple(interval) for interval in intervals)
+        self.lowers = None
+        self.uppers = []
+
+        bounds = {type(bound) for interval in self.intervals for bound in interval}
+        if not (bounds <= {int, float, bool} or bounds == {str}) or any(
+            bound != bound for interval in self.intervals for bound in interval
+        ):
+            return
+
+        # merge overlapping intervals, leaving out empty ones
+        lowers: list[Any] = []
+        for lower, upper in sorted(self.intervals):
+            if lower > upper:
+                continue
+            elif lowers and lower <= self.uppers[-1]:
+                self.uppers[-1] = max(self.uppers[-1], upper)
+            else:
+                lowers.append(lower)
+                self.uppers.append(upper)
+
+        self.lowers = lowers
+
+    def __contains__(self, value: Any) -> bool:
+        if self.lowers is None:
+            return any(lower <= value <= upper for lower, upper in self.intervals)
+
+        index = bisect_right(self.lowers, value) - 1
+
+        return index >= 0 and value <= self.uppers[index]
+
+    def __repr__(self) -> str:
+        return f"{self.__class__.__name__}({self.intervals!r})"
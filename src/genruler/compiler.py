@@ -0,0 +1,926 @@
+import builtins
+import math
+import operator
+from collections import Counter
+from collections.abc import Awaitable, Callable, Iterable, Iterator, Mapping
+from typing import TYPE_CHECKING, Any
+
+from . import batch
+from .common import Intervals, Members, literal
+from .exceptions import NonCallableResultError
+from .library import is_pure
+from .modules import basic, boolean, condition, number, string
+from .modules import list as list_
+from .nodes import Call, Constant, Literal, Node, Reference, children, instantiate
+from .optimizer import is_constant
+from .profiling import ProfiledRule
+
+if TYPE_CHECKING:
+    from .adaptive import AdaptiveRule
+
+# Subtrees whose generated code would sit within more parentheses than this
+# are called as closures, which keeps it below the parser's limit of 200
+# nested parentheses, whatever the templates inlined around them add
+MAX_INLINE_DEPTH = 128
+
+# Reductions over more arguments than this are called as closures, as their
+# generated code nests one level deeper per argument
+MAX_INLINE_ARGUMENTS = 32
+
+
+class Rule:
+    """A compiled rule, called with a context to compute its result.
+
+    Rules can be pickled, for instance to send them to worker processes. They
+    pickle as their node tree, with functions stored by name, and are compiled
+    again with the same backend when unpickled.
+
+    Attributes:
+        node: The root of the node tree the rule was compiled from
+        function: The callable doing the actual evaluation
+        backend: Name of the backend that compiled the rule
+        source: The generated Python source, for the "python" backend
+        deduplicated: Number of uses of repeated subexpressions that read the
+            value computed by an earlier use, rather than computing it again
+    """
+
+    node: Node
+    function: Callable[[Any], Any]
+    backend: str
+    source: str | None
+    deduplicated: int
+
+    def __init__(
+        self,
+        node: Node,
+        function: Callable[[Any], Any],
+        backend: str,
+        source: str | None = None,
+        deduplicated: int = 0,
+        kernel: batch.Kernel | None = None,
+    ) -> None:
+        self.node = node
+        self.function = function
+        self.backend = backend
+        self.source = source
+        self.deduplicated = deduplicated
+        # evaluates a list of contexts, compiled from the node tree on first
+        # use of evaluate_many when the backend does not provide one
+        self._kernel = kernel
+        self._column_kernel: Callable[[Any], Any] | None = None
+        self._async: Callable[[Any], Awaitable[Any]] | None = None
+
+    def __call__(self, context: Any) -> Any:
+        """Evaluate the rule against a context.
+
+        Args:
+            context: The context to evaluate the rule with
+
+        Returns:
+            The result of the rule
+        """
+        return self.function(context)
+
+    def evaluate_many(
+        self,
+        contexts: Iterable[Any],
+        lazy: bool = False,
+        chunk_size: int = batch.CHUNK_SIZE,
+    ) -> list[Any] | Iterator[Any]:
+        """Evaluate the rule against many contexts.
+
+        The contexts are evaluated a chunk at a time, which avoids the overhead
+        of evaluating the rule once per context. With the "closure" backend,
+        each node of the rule loops over the whole chunk, see genruler.batch.
+        The "python" backend generates a function looping over the chunk.
+
+        Args:
+            contexts: The contexts to evaluate the rule with
+            lazy: Whether to return a generator, consuming the contexts a
+                chunk at a time, rather than a list
+            chunk_size: Maximum number of contexts evaluated together
+
+        Returns:
+            The result for each context, in order, as a list or a generator
+
+        Raises:
+            ValueError: If chunk_size is not positive
+
+        Examples:
+            >>> rule = compile('(condition.gt (basic.field "age") 18)')
+            >>> rule.evaluate_many([{"age": 21}, {"age": 12}])
+            [True, False]
+        """
+        if self._kernel is None:
+            self._kernel = batch.compile_kernel(self.node)
+
+        results = batch.evaluate_many(self.function, self._kernel, contexts, chunk_size)
+
+        return results if lazy else list(results)
+
+    def evaluate_columns(
+        self, columns: Mapping[str, Any], length: int | None = None
+    ) -> Any:
+        """Evaluate the rule against columns of values, requires NumPy.
+
+        Fields read with a constant key resolve to whole columns, and the
+        number, condition and boolean functions run as array operations.
+        Anything else is evaluated row by row. See genruler.columnar.
+
+        Args:
+            columns: Arrays of equal length, keyed on field name
+            length: The number of rows, required when there are no columns
+
+        Returns:
+            The NumPy array of results, one per row, a boolean mask for
+            conditions
+
+        Raises:
+            ImportError: If NumPy is not installed
+            ValueError: If the columns do not have the same length
+
+        Examples:
+            >>> rule = compile('(condition.gt (basic.field "age") 18)')
+            >>> rule.evaluate_columns({"age": numpy.array([21, 12])})
+            array([ True, False])
+        """
+        from . import columnar
+
+        if self._column_kernel is None:
+            self._column_kernel = columnar.compile_columns(self.node)
+
+        return columnar.evaluate_columns(self._column_kernel, columns, length)
+
+    async def evaluate_async(self, context: Any) -> Any:
+        """Evaluate the rule against a context, awaiting env functions.
+
+        The closures of env functions may return awaitables, such as
+        coroutines or DataLoader.load futures, which are awaited for their
+        value. Independent arguments are awaited concurrently, while
+        boolean.and, boolean.or and basic.coalesce still stop at the first
+        argument deciding their result. See genruler.asynchronous.
+
+        Args:
+            context: The context to evaluate the rule with
+
+        Returns:
+            The result of the rule
+
+        Examples:
+            >>> rule = compile('(condition.gt (basic.field "age") 18)')
+            >>> await rule.evaluate_async({"age": 21})
+            True
+        """
+        if self._async is None:
+            from .asynchronous import compile_async
+
+            self._async = compile_async(self.node)
+
+        return await self._async(context)
+
+    def profiled(self) -> ProfiledRule:
+        """Compile the rule again, timing the evaluation of each call node.
+
+        The profiled rule evaluates the node tree through closures like the
+        "closure" backend, wrapped in timers that record the calls, the
+        cumulative time and the own time of each node. The rule itself is
+        left as it is, so that it is evaluated without any profiling overhead.
+        See genruler.profiling.
+
+        Returns:
+            The profiled rule, whose profile accumulates across evaluations
+
+        Examples:
+            >>> profiled = compile('(condition.gt (basic.field "age") 18)').profiled()
+            >>> profiled.evaluate_many(contexts)
+            >>> print(profiled.report())
+        """
+        return ProfiledRule(self.node)
+
+    def adaptive(
+        self,
+        order: dict[str, list[int]] | None = None,
+        adapt: bool = True,
+        sample_every: int = 16,
+        reorder_every: int = 1024,
+    ) -> "AdaptiveRule":
+        """Compile the rule again, learning the fastest order of its operands.
+
+        The operands of boolean.and and boolean.or are sampled for their cost
+        and how often they decide the result, and periodically reordered so
+        that the cheapest and most decisive run first, which computes the
+        same results. An operand raising may however be skipped in a learned
+        order, returning a result for a context the rule raises on. The
+        learned order is exported with
+        AdaptiveRule.export, and given back with adapt=False for
+        deterministic evaluations. See genruler.adaptive.
+
+        Args:
+            order: The order of the operands to start from, as exported
+            adapt: Whether to keep learning, rather than keep the order given
+            sample_every: Evaluations of a connective between two that sample
+                its operands
+            reorder_every: Evaluations of a connective between two
+                reorderings of its operands
+
+        Returns:
+            The adaptive rule
+
+        Examples:
+            >>> adaptive = compile(source).adaptive()
+            >>> adaptive.evaluate_many(contexts)
+            >>> frozen = compile(source).adaptive(adaptive.export(), adapt=False)
+        """
+        from .adaptive import AdaptiveRule
+
+        return AdaptiveRule(self.node, order, adapt, sample_every, reorder_every)
+
+    def evaluate_parallel(
+        self,
+        contexts: Iterable[Any],
+        workers: int | None = None,
+        chunk_size: int = batch.CHUNK_SIZE,
+        ordered: bool = True,
+        lazy: bool = False,
+    ) -> list[Any] | Iterator[Any]:
+        """Evaluate the rule against many contexts in worker processes.
+
+        The rule is sent to each worker once, and the contexts a chunk at a
+        time, with a bounded number of chunks in flight. See
+        genruler.parallel.evaluate_parallel.
+
+        Args:
+            contexts: The contexts to evaluate the rule with
+            workers: Number of worker processes, defaults to the number of CPUs
+            chunk_size: Number of contexts sent to a worker at a time
+            ordered: Whether results follow the order of the contexts, rather
+                than being paired with the position of their context as soon
+                as their chunk is evaluated
+            lazy: Whether to return a generator, consuming the contexts as the
+                results are consumed, rather than a list
+
+        Returns:
+            The result for each context, or the (position, result) pairs when
+            not ordered, as a list or a generator
+
+        Examples:
+            >>> rule = compile('(condition.gt (basic.field "age") 18)')
+            >>> rule.evaluate_parallel([{"age": 21}, {"age": 12}], workers=2)
+            [True, False]
+        """
+        from . import parallel
+
+        results = parallel.evaluate_parallel(
+            self, contexts, workers, chunk_size, ordered
+        )
+
+        return results if lazy else list(results)
+
+    def __reduce__(self) -> tuple[Any, ...]:
+        # a rule pickles as its node tree and is compiled again when loaded,
+        # sharing repeated subexpressions again when it did before, which
+        # generates the same source as when it was first compiled
+        return (_recompile, (self.node, self.backend, self.deduplicated > 0))
+
+    def __repr__(self) -> str:
+        return f"<{self.__class__.__name__} backend={self.backend!r}>"
+
+
+def _recompile(node: Node, backend: str, optimize: bool) -> Rule:
+    return BACKENDS[backend](node, optimize)
+
+
+def compile_closure(node: Node, optimize: bool = True) -> Rule:
+    """Compile a node tree into nested closures, like library.evaluate.
+
+    Args:
+        node: The root of the node tree
+        optimize: Unused, closures evaluate the tree exactly as it is
+
+    Returns:
+        The compiled rule
+
+    Raises:
+        NonCallableResultError: If the tree does not evaluate to a callable
+    """
+    return Rule(node, _callable(instantiate(node)), "closure")
+
+
+def compile_python(node: Node, optimize: bool = True) -> Rule:
+    """Compile a node tree into the source of a single Python function.
+
+    Calls of built-in functions are translated into the equivalent Python
+    expressions, with constants inlined and fields accessed directly on the
+    context. Everything else, including env functions, is called through
+    the closure library.evaluate would build for it.
+
+    Subexpressions repeated within the rule are computed once per context,
+    the first use that is evaluated storing its value in a local variable
+    for the others to read. Only calls of built-in and pure functions are
+    shared this way, as calling anything else fewer times could change the
+    result.
+
+    Args:
+        node: The root of the node tree
+        optimize: Whether to share repeated subexpressions
+
+    Returns:
+        The compiled rule, with the generated code in its source attribute
+
+    Raises:
+        NonCallableResultError: If the tree does not evaluate to a callable
+    """
+    # instantiating first raises the same errors parsing would, and provides
+    # the closures of subtrees that are not translated
+    values: dict[int, Any] = {}
+    _callable(instantiate(node, values))
+
+    repeated = PythonGenerator(values).repeated(node) if optimize else {}
+
+    generator = PythonGenerator(values, set(repeated))
+    source = generator.function(node)
+    namespace = _exec(source, generator.namespace)
+
+    return Rule(
+        node,
+        namespace["rule"],
+        "python",
+        source,
+        sum(count - 1 for count in repeated.values()),
+        namespace["batch"],
+    )
+
+
+def compile_python_results(
+    nodes: tuple[Node, ...], optimize: bool = True
+) -> tuple[Callable[[Any], tuple[Any, ...]], str, int]:
+    """Compile node trees into a single Python function evaluating all of them.
+
+    Each tree is translated like compile_python does, and subexpressions
+    repeated anywhere across the trees are computed once per context.
+
+    Args:
+        nodes: The roots of the node trees
+        optimize: Whether to share repeated subexpressions
+
+    Returns:
+        The function, taking a context and returning the tuple of the trees'
+        results, its source, and the number of uses of repeated subexpressions
+        reading a shared value
+
+    Raises:
+        NonCallableResultError: If a tree does not evaluate to a callable
+    """
+    values: dict[int, Any] = {}
+    for node in nodes:
+        _callable(instantiate(node, values))
+
+    repeated = PythonGenerator(values).repeated(*nodes) if optimize else {}
+
+    generator = PythonGenerator(values, set(repeated))
+    source = generator.results(nodes)
+
+    return (
+        _exec(source, generator.namespace)["rules"],
+        source,
+        sum(count - 1 for count in repeated.values()),
+    )
+
+
+BACKENDS: dict[str, Callable[..., Rule]] = {
+    "closure": compile_closure,
+    "python": compile_python,
+}
+
+
+class PythonGenerator:
+    """Generate the source of a Python function evaluating a node tree.
+
+    Attributes:
+        values: The instantiated value of every node, keyed on node id
+        shared: Keys, as returned by share_key, of the subexpressions whose
+            value is stored in a local variable by the first use evaluated
+        namespace: The globals the generated source refers to
+    """
+
+    values: dict[int, Any]
+    shared: set[tuple[int, str]]
+    namespace: dict[str, Any]
+
+    def __init__(
+        self, values: dict[int, Any], shared: set[tuple[int, str]] | None = None
+    ) -> None:
+        self.values = values
+        self.shared = set() if shared is None else shared
+        self.namespace = {"_contains": operator.contains, "_unset": _UNSET}
+        self._names: dict[int, str] = {}
+        self._contexts: dict[Any, str] = {}
+        self._memos: dict[tuple[int, str], str] = {}
+        self._temporaries = 0
+        self._counts: Counter[tuple[int, str]] | None = None
+        self._keys: dict[int, int | None] = {}
+        self._structures: dict[tuple[Any, ...], int] = {}
+
+    def function(self, node: Node) -> str:
+        """Return the source of a function named rule evaluating the node.
+
+        It is followed by the source of a function named batch, evaluating the
+        node for each of a list of contexts in a single loop.
+        """
+        self._index(node)
+        code = self.expression(node, "c0", 0)
+
+        return self._source("rule", code) + self._batch(code)
+
+    def results(self, nodes: tuple[Node, ...]) -> str:
+        """Return the source of a function named rules evaluating each node.
+
+        The function returns a tuple of results, in the order of the nodes.
+        Subexpressions shared between nodes are shared like within a node.
+        """
+        for node in nodes:
+            self._index(node)
+
+        codes = "".join(f"{self.expression(node, 'c0', 0)}, " for node in nodes)
+
+        return self._source("rules", f"({codes})")
+
+    def repeated(self, *nodes: Node) -> dict[tuple[int, str], int]:
+        """Count the uses of the subexpressions of nodes used more than once.
+
+        Uses nested within a repeated subexpression are only counted once, as
+        that subexpression is itself computed once.
+
+        Returns:
+            The number of uses, keyed on the subexpression's share_key
+        """
+        self._counts = Counter()
+        self.results(nodes)
+        counts, self._counts = self._counts, None
+
+        return {key: count for key, count in counts.items() if count > 1}
+
+    def expression(self, node: Node, context: str, depth: int) -> str:
+        """Return an expression computing a node against a context variable.
+
+        Args:
+            node: The node to compute
+            context: Name of the variable holding the context
+            depth: Number of parentheses the expression is nested within in
+                the generated code
+
+        Returns:
+            The source of the expression
+        """
+        key = self.share_key(node, context)
+
+        if key is not None and self._counts is not None:
+            self._counts[key] += 1
+            if self._counts[key] > 1:
+                return "None"
+
+        elif key in self.shared:
+            name = self._memos.setdefault(key, f"m{len(self._memos)}")
+            code = self._expression(node, context, depth + 2)
+            return f"({name} if {name} is not _unset else ({name} := {code}))"
+
+        return self._expression(node, context, depth)
+
+    def expressions(
+        self, nodes: tuple[Node, ...], context: str, depth: int
+    ) -> list[str]:
+        """Return the expressions computing each of the nodes."""
+        return [self.expression(node, context, depth) for node in nodes]
+
+    def share_key(self, node: Node, context: str) -> tuple[int, str] | None:
+        """Return the key under which a node computed against a context is shared.
+
+        Structurally identical nodes computed against the same context variable
+        share a key. Nodes not worth sharing, because they are not calls, are
+        cheaper to compute than to look up, or may not compute the same value
+        twice, have no key.
+        """
+        structure = self._keys.get(id(node))
+
+        if (
+            structure is None
+            or not isinstance(node, Call)
+            or node.function in _CHEAP
+            and all(
+                isinstance(argument, (Literal, Constant)) for argument in node.arguments
+            )
+        ):
+            return None
+
+        return (structure, context)
+
+    def constant(self, value: Any) -> str:
+        """Return an expression for a constant, inlining simple literals."""
+        if type(value) in (int, str, bool, type(None)) or (
+            type(value) is float and math.isfinite(value)
+        ):
+            return repr(value)
+
+        return self.name(value)
+
+    def name(self, value: Any) -> str:
+        """Return the name of a global holding the value."""
+        key = id(value)
+
+        if key not in self._names:
+            self._names[key] = f"_v{len(self._names)}"
+            self.namespace[self._names[key]] = value
+
+        return self._names[key]
+
+    def temporary(self) -> str:
+        """Return the name of a new variable, for a value used more than once."""
+        self._temporaries += 1
+
+        return f"t{self._temporaries}"
+
+    def context(self, arguments: tuple[Node, ...], outer: str) -> str:
+        """Return the name of the variable holding a context derived from another.
+
+        Structurally identical derivations from the same context share their
+        variable, so that the subexpressions computed against it can be shared
+        too. Any other derivation gets a variable of its own.
+
+        Args:
+            arguments: The nodes the context is derived from
+            outer: Name of the variable holding the context derived from
+        """
+        keys = tuple(self._keys.get(id(argument)) for argument in arguments)
+        key = (keys, outer) if None not in keys else object()
+
+        return self._contexts.setdefault(key, f"c{len(self._contexts) + 1}")
+
+    def _source(self, name: str, code: str) -> str:
+        # the variables holding shared values start out unset, as the first
+        # use may sit in a branch that is not evaluated
+        memos = "".join(f"{memo} = " for memo in self._memos.values())
+        header = f"    {memos}_unset\n" if memos else ""
+
+        return f"def {name}(c0):\n{header}    return {code}\n"
+
+    def _batch(self, code: str) -> str:
+        memos = "".join(f"{memo} = " for memo in self._memos.values())
+        header = f"        {memos}_unset\n" if memos else ""
+
+        return (
+            "def batch(contexts):\n"
+            "    results = []\n"
+            "    append = results.append\n"
+            "    for c0 in contexts:\n"
+            f"{header}"
+            f"        append({code})\n"
+            "    return results\n"
+        )
+
+    def _expression(self, node: Node, context: str, depth: int) -> str:
+        if isinstance(node, Constant):
+            return self.constant(node.value)
+
+        if isinstance(node, Call) and depth < MAX_INLINE_DEPTH:
+            template = TEMPLATES.get(node.function)
+
+            if template is not None:
+                code = template(self, node.arguments, context, depth)
+                if code is not None:
+                    return code
+
+        value = self.values[id(node)]
+
+        return (
+            f"{self.name(value)}({context})"
+            if callable(value)
+            else self.constant(value)
+        )
+
+    def _index(self, root: Node) -> None:
+        # give structurally identical subtrees computing the same value every
+        # time the same key, and no key to the others
+        stack: list[tuple[Node, bool]] = [(root, False)]
+
+        while stack:
+            node, expanded = stack.pop()
+
+            if id(node) in self._keys:
+                continue
+
+            if not expanded:
+                stack.append((node, True))
+                stack.extend((child, False) for child in children(node))
+                continue
+
+            keys = tuple(self._keys[id(child)] for child in children(node))
+
+            if isinstance(node, Literal | Constant):
+                value = node.value
+                structure: Any = (
+                    (type(value), repr(value))
+                    if type(value) in (int, float, str, bool, type(None))
+                    else id(value)
+                )
+            elif isinstance(node, Reference):
+                structure = ("reference", id(node.function))
+            elif None in keys:
+                structure = None
+            elif isinstance(node, Call):
+                structure = (
+                    (id(node.function), keys)
+                    if node.function in TEMPLATES or is_pure(node.function)
+                    else None
+                )
+            else:
+                structure = ("sequence", keys) if is_constant(node) else None
+
+            self._keys[id(node)] = (
+                None
+                if structure is None
+                else self._structures.setdefault(structure, len(self._structures))
+            )
+
+
+type Template = Callable[[PythonGenerator, tuple[Node, ...], str, int], str | None]
+
+
+def _reduce(symbol: str) -> Template:
+    def template(
+        generator: PythonGenerator,
+        arguments: tuple[Node, ...],
+        context: str,
+        depth: int,
+    ) -> str | None:
+        if not 0 < len(arguments) <= MAX_INLINE_ARGUMENTS:
+            return None
+
+        # the first argument ends up within a pair of parentheses per argument
+        codes = generator.expressions(arguments, context, depth + len(arguments))
+        code = codes[0]
+        for incoming in codes[1:]:
+            code = f"({code} {symbol} {incoming})"
+
+        return code
+
+    return template
+
+
+def _unary(pattern: str) -> Template:
+    def template(
+        generator: PythonGenerator,
+        arguments: tuple[Node, ...],
+        context: str,
+        depth: int,
+    ) -> str | None:
+        if len(arguments) != 1:
+            return None
+
+        # any other operand may still compile to a literal expression, such as
+        # 1 + 2 when not folded, so it is bound to a variable tested instead
+        code = generator.expression(arguments[0], context, depth + 2)
+
+        return pattern.format(f"({generator.temporary()} := {code})")
+
+    return template
+
+
+def _identity(pattern: str) -> Template:
+    # python warns about identity tests of literals, which constant operands
+    # are inlined as, so those are read from a global instead
+    def template(
+        generator: PythonGenerator,
+        arguments: tuple[Node, ...],
+        context: str,
+        depth: int,
+    ) -> str | None:
+        if len(arguments) != 1:
+            return None
+
+        operand = arguments[0]
+        if (
+            isinstance(operand, Call)
+            and operand.function is basic.value
+            and len(operand.arguments) == 1
+        ):
+            operand = operand.arguments[0]
+
+        if isinstance(operand, Literal | Constant):
+            return pattern.format(generator.name(operand.value))
+
+        # any other operand may still compile to a literal expression, such as
+        # 1 + 2 when not folded, so it is bound to a variable tested instead
+        code = generator.expression(arguments[0], context, depth + 2)
+
+        return pattern.format(f"({generator.temporary()} := {code})")
+
+    return template
+
+
+def _and(
+    generator: PythonGenerator, arguments: tuple[Node, ...], context: str, depth: int
+) -> str | None:
+    if not arguments:
+        return "True"
+
+    operands = " and ".join(generator.expressions(arguments, context, depth + 1))
+
+    return f"(True if {operands} else False)"
+
+
+def _or(
+    generator: PythonGenerator, arguments: tuple[Node, ...], context: str, depth: int
+) -> str | None:
+    if not arguments:
+        return "False"
+
+    operands = " or ".join(generator.expressions(arguments, context, depth + 1))
+
+    return f"(True if {operands} else False)"
+
+
+def _in(
+    generator: PythonGenerator, arguments: tuple[Node, ...], context: str, depth: int
+) -> str | None:
+    if len(arguments) != 2:
+        return None
+
+    members = Members.of(generator.values[id(arguments[1])])
+    if members is not None:
+        value = generator.expression(arguments[0], context, depth + 1)
+        return f"({value} in {generator.name(members)})"
+
+    # condition.in computes the collection before the value
+    collection, value = generator.expressions(arguments[::-1], context, depth + 1)
+
+    return f"_contains({collection}, {value})"
+
+
+def _not_in(
+    generator: PythonGenerator, arguments: tuple[Node, ...], context: str, depth: int
+) -> str | None:
+    if len(arguments) != 2:
+        return None
+
+    members = Members.of(generator.values[id(arguments[1])])
+    if members is None:
+        return None
+
+    value = generator.expression(arguments[0], context, depth + 1)
+
+    return f"({value} not in {generator.name(members)})"
+
+
+def _in_range(
+    generator: PythonGenerator, arguments: tuple[Node, ...], context: str, depth: int
+) -> str | None:
+    if not arguments:
+        return None
+
+    intervals = [literal(generator.values[id(node)]) for node in arguments[1:]]
+    if not all(isinstance(interval, tuple) for interval in intervals):
+        return None
+
+    value = generator.expression(arguments[0], context, depth + 1)
+
+    return f"({value} in {generator.name(Intervals(tuple(intervals)))})"
+
+
+def _field(
+    generator: PythonGenerator,
+    arguments: tuple[Node, ...],
+    context: str,
+    depth: int,
+    pattern: str = "{}",
+) -> str | None:
+    if not arguments:
+        return None
+
+    # within the pattern, the binding of the key, the conditional and the
+    # call or subscript
+    key = generator.expression(arguments[0], context, depth + 4)
+
+    if len(arguments) == 1:
+        return pattern.format(f"{context}[{key}]")
+
+    default = generator.expression(arguments[1], context, depth + 4)
+
+    # a computed key is used by both branches, so it is computed once first
+    # rather than copied into each, which would double the code per level
+    computed = None
+    if not isinstance(arguments[0], Literal | Constant):
+        computed, key = key, generator.temporary()
+
+    get = f"{context}.get({key}, {default})"
+    code = f"({get} if isinstance({context}, dict) else {context}[{key}])"
+
+    if computed is not None:
+        code = f"(({key} := {computed}), {code})[1]"
+
+    return pattern.format(code)
+
+
+def _string_field(
+    generator: PythonGenerator, arguments: tuple[Node, ...], context: str, depth: int
+) -> str | None:
+    return _field(generator, arguments, context, depth, "str({})")
+
+
+def _context(
+    generator: PythonGenerator, arguments: tuple[Node, ...], context: str, depth: int
+) -> str | None:
+    if len(arguments) != 2:
+        return None
+
+    sub = generator.expression(arguments[0], context, depth + 2)
+    inner = generator.context(arguments, context)
+
+    value = generator.expression(arguments[1], inner, depth + 1)
+
+    return f"(({inner} := {sub}), {value})[1]"
+
+
+def _coalesce(
+    generator: PythonGenerator, arguments: tuple[Node, ...], context: str, depth: int
+) -> str | None:
+    if not arguments:
+        return None
+
+    return f"({' or '.join(generator.expressions(arguments, context, depth + 1))})"
+
+
+def _value(
+    generator: PythonGenerator, arguments: tuple[Node, ...], context: str, depth: int
+) -> str | None:
+    if len(arguments) != 1:
+        return None
+
+    return generator.constant(generator.values[id(arguments[0])])
+
+
+def _concat(
+    generator: PythonGenerator, arguments: tuple[Node, ...], context: str, depth: int
+) -> str | None:
+    if not arguments or len(arguments) > MAX_INLINE_ARGUMENTS:
+        return None
+
+    link, *values = generator.expressions(arguments, context, depth + 2)
+
+    return f"{link}.join(({''.join(f'{value}, ' for value in values)}))"
+
+
+TEMPLATES: dict[Callable[..., Any], Template] = {
+    basic.coalesce: _coalesce,
+    basic.context: _context,
+    basic.field: _field,
+    basic.value: _value,
+    boolean.and_: _and,
+    boolean.or_: _or,
+    boolean.not_: _unary("(not {})"),
+    boolean.tautology: lambda generator, arguments, context, depth: (
+        None if arguments else "True"
+    ),
+    boolean.contradiction: lambda generator, arguments, context, depth: (
+        None if arguments else "False"
+    ),
+    condition.equal: _reduce("=="),
+    condition.gt: _reduce(">"),
+    condition.ge: _reduce(">="),
+    condition.lt: _reduce("<"),
+    condition.le: _reduce("<="),
+    condition.in_: _in,
+    condition.in_range: _in_range,
+    condition.not_in: _not_in,
+    condition.is_none: _identity("({} is None)"),
+    condition.is_true: _identity("({} is True)"),
+    list_.length: _unary("len({})"),
+    number.add: _reduce("+"),
+    number.subtract: _reduce("-"),
+    number.multiply: _reduce("*"),
+    number.divide: _reduce("/"),
+    number.modulo: _reduce("%"),
+    string.concat: _concat,
+    string.field: _string_field,
+    string.lower: _unary("({}).lower()"),
+}
+
+
+# calls with constant arguments compiling to an expression no slower than
+# reading a shared value
+_CHEAP = {basic.field, basic.value, boolean.tautology, boolean.contradiction}
+
+_UNSET = object()
+
+
+def _exec(source: str, namespace: dict[str, Any]) -> dict[str, Any]:
+    namespace = dict(namespace)
+    exec(builtins.compile(source, "<genruler>", "exec"), namespace)
+
+    return namespace
+
+
+def _callable(result: Any) -> Callable[[Any], Any]:
+    if not callable(result):
+        raise NonCallableResultError(type(result).__name__)
+
+    return result
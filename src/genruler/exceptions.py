@@ -20,3 +20,31 @@ class InvalidFunctionNameError(GenRulerException):
         super().__init__(
             f"Invalid function name '{name}'. Function names must be in format 'module.function'"
         )
+
+
+class UnknownFunctionError(InvalidFunctionNameError):
+    """Raised when a qualified function name is not registered."""
+
+    def __init__(self, name: str):
+        self.name = name
+        GenRulerException.__init__(self, f"Unknown function '{name}'")
+
+
+class ParseError(GenRulerException, ValueError):
+    """Raised when an S-expression string cannot be read."""
+
+    def __init__(self, reason: str, line: int, column: int):
+        self.reason = reason
+        self.line = line
+        self.column = column
+        super().__init__(f"Parse error at line {line}, column {column}: {reason}")
+
+
+class NestingDepthError(GenRulerException):
+    """Raised when an S-expression is nested deeper than allowed."""
+
+    def __init__(self, max_depth: int):
+        self.max_depth = max_depth
+        super().__init__(
+            f"Expression is nested deeper than the maximum depth of {max_depth}"
+        )
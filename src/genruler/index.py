@@ -0,0 +1,285 @@
+from collections.abc import Hashable, Iterator, Mapping
+from dataclasses import dataclass
+from heapq import merge
+from types import ModuleType
+from typing import Any
+
+from .compiler import BACKENDS, Rule
+from .lexer import read
+from .modules import basic, boolean, condition
+from .nodes import Call, Constant, Literal, Node, Sequence, build
+from .optimizer import fold
+
+
+@dataclass(frozen=True)
+class Guard:
+    """A test of a field against constant values, leading a rule.
+
+    Attributes:
+        field: The name of the field tested
+        values: The values the field must equal one of for the rule to match
+    """
+
+    field: str
+    values: frozenset[Hashable]
+
+
+@dataclass(frozen=True)
+class FieldStatistics:
+    """How well the rules guarded on a field are discriminated by its value.
+
+    Attributes:
+        field: The name of the field
+        rules: Number of rules guarded on the field
+        values: Number of distinct values the rules are guarded on
+        largest: Number of rules guarded on the most common value
+        selectivity: Average fraction of all the rules of the index evaluated
+            for a context with one of the values, lower is better
+    """
+
+    field: str
+    rules: int
+    values: int
+    largest: int
+    selectivity: float
+
+
+class RuleIndex:
+    """Named rules indexed on the field values they require.
+
+    Rules leading with a test of a field against constants, such as
+    (condition.equal (basic.field "type") "click") or condition.in over a
+    literal list, alone or as the first argument of boolean.and, are bucketed
+    on those values. A context then only evaluates the rules in the buckets
+    of its own values, and the rules without such a guard, rather than every
+    rule of the index.
+
+    A rule that is skipped evaluates to False for the context, as its guard
+    does. When a context does not have the field of a guard, the rules
+    guarded on it are evaluated, raising or not as they would on their own.
+
+    Attributes:
+        names: The names of the rules, in the order they were given
+        rules: The compiled rules, in the same order
+        guards: The guard of each rule, None for rules without one
+    """
+
+    names: tuple[str, ...]
+    rules: tuple[Rule, ...]
+    guards: tuple[Guard | None, ...]
+
+    def __init__(
+        self,
+        rules: Mapping[str, str],
+        env: ModuleType | object | None = None,
+        backend: str = "closure",
+        optimize: bool = True,
+    ) -> None:
+        """Compile and index the rules.
+
+        Args:
+            rules: The S-expression string of each rule, keyed on its name
+            env: Optional module containing local functions that can be
+                referenced in the S-expressions
+            backend: The backend compiling each rule, see genruler.compile
+            optimize: Whether to fold context independent subexpressions, and
+                share repeated ones with the "python" backend
+
+        Raises:
+            ValueError: If a rule cannot be parsed, or the backend is unknown
+            NonCallableResultError: If a rule does not evaluate to a callable
+            InvalidFunctionNameError: If a referenced function cannot be found
+        """
+        try:
+            compiler = BACKENDS[backend]
+        except KeyError:
+            raise ValueError(
+                f"Unknown backend {backend!r}, expected one of {list(BACKENDS)}"
+            )
+
+        compiled = []
+
+        for name, source in rules.items():
+            try:
+                node = build(read(source), env)
+                compiled.append(compiler(fold(node) if optimize else node, optimize))
+            except Exception as e:
+                e.add_note(f"In rule {name!r}")
+                raise
+
+        self.names = tuple(rules)
+        self.rules = tuple(compiled)
+        self.guards = tuple(guard(rule.node) for rule in self.rules)
+
+        # positions of the rules guarded on each value of each field, and of
+        # those evaluated for every context
+        self._buckets: dict[str, dict[Hashable, list[int]]] = {}
+        self._unguarded: list[int] = []
+
+        for position, rule_guard in enumerate(self.guards):
+            if rule_guard is None:
+                self._unguarded.append(position)
+                continue
+
+            buckets = self._buckets.setdefault(rule_guard.field, {})
+            for value in rule_guard.values:
+                buckets.setdefault(value, []).append(position)
+
+        self._guarded = {
+            field: sorted({p for bucket in buckets.values() for p in bucket})
+            for field, buckets in self._buckets.items()
+        }
+
+    def candidates(self, context: Any) -> list[str]:
+        """Return the names of the rules to evaluate for a context.
+
+        Args:
+            context: The context the rules would be evaluated with
+
+        Returns:
+            The names of the rules not ruled out by their guard, in the order
+            they were given
+        """
+        return [self.names[position] for position in self._candidates(context)]
+
+    def matching(self, context: Any) -> list[str]:
+        """Return the names of the rules with a truthy result for a context.
+
+        Args:
+            context: The context to evaluate the rules with
+
+        Returns:
+            The names of the matching rules, in the order they were given
+        """
+        rules = self.rules
+
+        return [
+            self.names[position]
+            for position in self._candidates(context)
+            if rules[position](context)
+        ]
+
+    def statistics(self) -> dict[str, FieldStatistics]:
+        """Return how well the value of each guarded field discriminates rules.
+
+        Returns:
+            The statistics of each field rules are guarded on, keyed on the
+            name of the field
+        """
+        statistics = {}
+
+        for field, buckets in self._buckets.items():
+            sizes = [len(bucket) for bucket in buckets.values()]
+
+            statistics[field] = FieldStatistics(
+                field,
+                len(self._guarded[field]),
+                len(buckets),
+                max(sizes),
+                sum(sizes) / len(sizes) / len(self.rules),
+            )
+
+        return statistics
+
+    def _candidates(self, context: Any) -> Iterator[int]:
+        if not isinstance(context, dict):
+            return iter(range(len(self.rules)))
+
+        selected = [self._unguarded]
+
+        for field, buckets in self._buckets.items():
+            if field not in context:
+                # the guards raise, as the rules would
+                selected.append(self._guarded[field])
+                continue
+
+            try:
+                bucket = buckets.get(context[field])
+            except TypeError:
+                # unhashable values never equal the constants of a guard
+                continue
+
+            if bucket is not None:
+                selected.append(bucket)
+
+        return merge(*selected)
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.names)
+
+    def __contains__(self, name: object) -> bool:
+        return name in self.names
+
+    def __repr__(self) -> str:
+        return f"<{self.__class__.__name__} of {len(self)} rules>"
+
+
+def guard(node: Node) -> Guard | None:
+    """Return the guard leading a rule, if it has one.
+
+    The guard is the rule itself, or the first argument of a boolean.and at
+    its root, when it is a condition.equal of a field and a constant, or a
+    condition.in of a field and a literal list. Only fields read with a
+    constant string key and without a default are guards.
+
+    Args:
+        node: The root of the rule's node tree
+
+    Returns:
+        The guard, or None if the rule does not lead with one
+    """
+    while isinstance(node, Call) and node.function is boolean.and_ and node.arguments:
+        node = node.arguments[0]
+
+    if not isinstance(node, Call) or len(node.arguments) != 2:
+        return None
+
+    if node.function is condition.equal:
+        for key, value in (node.arguments, node.arguments[::-1]):
+            field, values = _field(key), _constants(value, False)
+            if field is not None and values is not None:
+                return Guard(field, values)
+    elif node.function is condition.in_:
+        field, values = _field(node.arguments[0]), _constants(node.arguments[1], True)
+        if field is not None and values is not None:
+            return Guard(field, values)
+
+    return None
+
+
+def _field(node: Node) -> str | None:
+    if (
+        isinstance(node, Call)
+        and node.function is basic.field
+        and len(node.arguments) == 1
+        and isinstance(node.arguments[0], (Literal, Constant))
+        and type(node.arguments[0].value) is str
+    ):
+        return node.arguments[0].value
+
+    return None
+
+
+def _constants(node: Node, collection: bool) -> frozenset[Hashable] | None:
+    if isinstance(node, Constant):
+        values = node.value if collection else (node.value,)
+    elif isinstance(node, Literal) and not collection:
+        values = (node.value,)
+    elif isinstance(node, Sequence) and collection:
+        if not all(isinstance(item, Literal) for item in node.items):
+            return None
+        values = tuple(item.value for item in node.items)
+    else:
+        return None
+
+    # the values are compared by hash, which is only consistent with the
+    # equality of these types
+    if not isinstance(values, tuple) or not all(
+        type(value) in (int, float, bool, str, type(None)) for value in values
+    ):
+        return None
+
+    return frozenset(values)
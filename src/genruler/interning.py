@@ -0,0 +1,173 @@
+import threading
+import weakref
+from collections.abc import Hashable
+from typing import Any, NamedTuple
+
+from .nodes import Call, Constant, Literal, Node, Reference, Sequence, children
+from .registry import is_builtin
+
+# Types of the values literals and constants are interned with
+SCALARS = frozenset({str, int, bool, bytes, type(None)})
+
+
+class TableInfo(NamedTuple):
+    """Statistics reported by NodeTable.info()."""
+
+    hits: int
+    misses: int
+    skipped: int
+    currsize: int
+
+
+class NodeTable:
+    """A thread-safe table of node trees, sharing their equal subtrees.
+
+    Interning a tree resolves each of its subtrees to the node already in the
+    table for an equal subtree, so that the fragments many rules have in
+    common, such as (basic.field "country"), are held in memory once. Nodes
+    are immutable, which makes sharing them safe whatever tree they end up in.
+
+    Only subtrees made of built-in functions and of literals are interned,
+    literals holding a number, a string, bytes, None, or a tuple of those.
+    Subtrees calling env functions, or functions of namespaces an application
+    registers, are kept as they are. The table references its nodes weakly,
+    so a node is dropped from it once no tree uses it anymore.
+
+    Examples:
+        >>> table = NodeTable()
+        >>> first = genruler.compile('(basic.field "country")', table=table)
+        >>> second = genruler.compile('(basic.field "country")', table=table)
+        >>> first.node is second.node
+        True
+    """
+
+    def __init__(self) -> None:
+        """Initialize an empty table."""
+        # nodes keyed on their type, fields, and the identity of their
+        # children, which are interned first and kept alive by their parent
+        self._nodes: weakref.WeakValueDictionary[Hashable, Node] = (
+            weakref.WeakValueDictionary()
+        )
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+        self._skipped = 0
+
+    def intern(self, node: Node) -> Node:
+        """Return the tree with its subtrees replaced by those of the table.
+
+        Subtrees missing from the table are added to it. The tree is walked
+        with an explicit stack rather than recursion.
+
+        Args:
+            node: The root of the tree
+
+        Returns:
+            The root of the interned tree, equal to the given one
+        """
+        stack: list[tuple[Node, bool]] = [(node, False)]
+        # the interned node of each node, and whether it is in the table
+        results: list[tuple[Node, bool]] = []
+
+        with self._lock:
+            while stack:
+                current, expanded = stack.pop()
+                items = _children(current)
+
+                if items and not expanded:
+                    stack.append((current, True))
+                    stack.extend((child, False) for child in reversed(items))
+                    continue
+
+                interned = results[len(results) - len(items) :]
+                del results[len(results) - len(items) :]
+
+                if any(new is not old for (new, _), old in zip(interned, items)):
+                    arguments = tuple(new for new, _ in interned)
+                    if isinstance(current, Call):
+                        current = Call(current.name, current.function, arguments)
+                    elif isinstance(current, Constant):
+                        current = Constant(current.value, arguments[0])
+                    else:
+                        current = Sequence(arguments)
+
+                key = None
+                if all(shared for _, shared in interned):
+                    key = _key(current)
+
+                if key is None:
+                    self._skipped += 1
+                    results.append((current, False))
+                    continue
+
+                existing = self._nodes.get(key)
+                if existing is None:
+                    self._misses += 1
+                    self._nodes[key] = existing = current
+                else:
+                    self._hits += 1
+
+                results.append((existing, True))
+
+        return results[0][0]
+
+    def clear(self) -> None:
+        """Remove every node and reset the statistics."""
+        with self._lock:
+            self._nodes.clear()
+            self._hits = self._misses = self._skipped = 0
+
+    def info(self) -> TableInfo:
+        """Report how many nodes were shared, added and skipped, and the size.
+
+        Hits count the subtrees resolved to a node already in the table,
+        misses the nodes added to it, and skipped the nodes that could not be
+        interned. The size counts the nodes still used by a tree.
+        """
+        with self._lock:
+            return TableInfo(self._hits, self._misses, self._skipped, len(self))
+
+    def __len__(self) -> int:
+        return len(self._nodes)
+
+
+def _children(node: Node) -> tuple[Node, ...]:
+    # the subtree a constant replaces is interned too, for constants folded
+    # from equal subtrees to be equal
+    return (node.node,) if isinstance(node, Constant) else children(node)
+
+
+def _key(node: Node) -> Hashable | None:
+    # the key of a node whose children are interned, or None when the node
+    # cannot be interned
+    if isinstance(node, Call):
+        if not is_builtin(node.name, node.function):
+            return None
+        return (Call, node.name, node.function, *map(id, node.arguments))
+    elif isinstance(node, Sequence):
+        return (Sequence, *map(id, node.items))
+    elif isinstance(node, Reference):
+        if not is_builtin(node.name, node.function):
+            return None
+        return (Reference, node.name, node.function)
+    elif isinstance(node, Literal):
+        key = _value_key(node.value)
+        return None if key is None else (Literal, key)
+
+    key = _value_key(node.value)
+    return None if key is None else (Constant, key, id(node.node))
+
+
+def _value_key(value: Any) -> Hashable | None:
+    # values are keyed with their type, as 1, 1.0 and True are equal but
+    # compute differently, and floats on their repr, which tells 0.0 and
+    # -0.0 apart. Values of other types are not interned.
+    if type(value) is tuple:
+        keys = tuple(map(_value_key, value))
+        return None if None in keys else (tuple, keys)
+    elif type(value) is float:
+        return (float, repr(value))
+    elif type(value) in SCALARS:
+        return (type(value), value)
+
+    return None
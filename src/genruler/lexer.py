@@ -1,15 +1,28 @@
 import ast
+import re
+import sys
 from dataclasses import dataclass
 from operator import itemgetter
-from typing import Any
+from typing import Any, Literal
 
 from funcparserlib.lexer import Token, make_tokenizer
 from funcparserlib.parser import NoParseError, Parser, forward_decl, many, tok
 
+from .exceptions import ParseError
 
-@dataclass
+# One alternative per token type, in the same order of precedence as the specs in
+# make_sexp_tokenizer, so both readers split the input identically
+TOKEN = re.compile(r'[ \t\r\n]+|(\()|(\))|"([^"]*)"|(-?\d+\.\d+)|(-?\d+)|([^\s\(\)"]+)')
+LPAREN, RPAREN, STRING, FLOAT, INTEGER, SYMBOL = range(1, 7)
+
+
+@dataclass(slots=True)
 class Symbol:
-    """Represents a symbol in the S-expression."""
+    """Represents a symbol in the S-expression.
+
+    Symbols read by read have their name interned, so that the nodes of every
+    rule calling a function share a single copy of its name.
+    """
 
     name: str
 
@@ -54,7 +67,7 @@ def make_parser() -> Parser[Token, Any]:
     # Convert tokens to Python values
     number = tok("NUMBER") >> ast.literal_eval
     string = tok("STRING") >> ast.literal_eval
-    symbol = tok("SYMBOL") >> Symbol
+    symbol = tok("SYMBOL") >> (lambda name: Symbol(sys.intern(name)))
 
     # Atom can be number, string, or symbol
     atom = number | string | symbol
@@ -73,9 +86,114 @@ def make_parser() -> Parser[Token, Any]:
     return top_level
 
 
-def read(input: str) -> list:
+def read(input: str, reader: Literal["fast", "funcparserlib"] = "fast") -> list:
     """Read an S-expression string into an AST.
 
+    Args:
+        input: The S-expression string to parse
+        reader: "fast" for the single-pass reader, "funcparserlib" for the
+            tokenizer and parser pipeline built by make_sexp_tokenizer and
+            make_parser
+
+    Returns:
+        The parsed AST
+
+    Raises:
+        ValueError: If the input cannot be parsed
+    """
+    if reader == "fast":
+        return read_fast(input)
+
+    return read_funcparserlib(input)
+
+
+def read_fast(input: str) -> list:
+    """Read an S-expression string into an AST in a single pass.
+
+    Produces the same AST as read_funcparserlib without materializing a token
+    list, and without recursion so that deeply nested input cannot exhaust the
+    stack. Unlike read_funcparserlib, anything but whitespace after the closing
+    parenthesis of the top level expression is rejected.
+
+    Args:
+        input: The S-expression string to parse
+
+    Returns:
+        The parsed AST
+
+    Raises:
+        ParseError: If the input cannot be parsed, with the line and column of
+            the offending character
+    """
+    match = TOKEN.match
+    stack: list[list] = []
+    current: list | None = None
+    position = 0
+    length = len(input)
+
+    while position < length:
+        token = match(input, position)
+
+        if token is None:
+            raise _parse_error(
+                input, position, f"unexpected character {input[position]!r}"
+            )
+
+        kind = token.lastindex
+
+        if kind is None:  # whitespace
+            pass
+
+        elif current is None and stack:
+            raise _parse_error(input, position, "unexpected input after expression")
+
+        elif kind == LPAREN:
+            if current is not None:
+                stack.append(current)
+            current = []
+
+        elif current is None:
+            raise _parse_error(input, position, f"expected '(', got {token.group()!r}")
+
+        elif kind == RPAREN:
+            if stack:
+                parent = stack.pop()
+                parent.append(current)
+                current = parent
+            else:
+                # keep the finished top level expression on the stack, so that
+                # trailing input is detected above
+                stack.append(current)
+                current = None
+
+        elif kind == STRING:
+            text = token.group(STRING)
+            current.append(
+                _read_escaped(input, position, token.group()) if "\\" in text else text
+            )
+
+        elif kind == FLOAT:
+            current.append(float(token.group()))
+
+        elif kind == INTEGER:
+            current.append(int(token.group()))
+
+        else:
+            current.append(Symbol(sys.intern(token.group())))
+
+        position = token.end()
+
+    if current is not None:
+        raise _parse_error(input, length, "unexpected end of input, expected ')'")
+    elif not stack:
+        raise _parse_error(input, length, "unexpected end of input, expected '('")
+
+    return stack[0]
+
+
+def read_funcparserlib(input: str) -> list:
+    """Read an S-expression string into an AST with funcparserlib.
+
     Args:
         input: The S-expression string to parse
 
@@ -98,3 +216,19 @@ def read(input: str) -> list:
 
     except NoParseError as e:
         raise ValueError(f"Parse error: {e}")
+
+
+def _read_escaped(input: str, position: int, literal: str) -> str:
+    try:
+        return ast.literal_eval(literal)
+    except (SyntaxError, ValueError) as e:
+        raise _parse_error(
+            input, position, f"invalid string literal {literal!r}"
+        ) from e
+
+
+def _parse_error(input: str, position: int, reason: str) -> ParseError:
+    line = input.count("\n", 0, position) + 1
+    column = position - input.rfind("\n", 0, position)
+
+    return ParseError(reason, line, column)
@@ -4,7 +4,7 @@ from types import ModuleType
 from typing import Any, List
 
 from .exceptions import InvalidFunctionNameError
-from .lexer import Symbol as genSymbol
+from .nodes import MAX_DEPTH, build, get_function, instantiate
 
 
 def compute[T, U, V](argument: Callable[[T], U] | V, context: T) -> U | V:
@@ -35,27 +35,61 @@ def compute[T, U, V](argument: Callable[[T], U] | V, context: T) -> U | V:
     )
 
 
+def pure[T](function: T) -> T:
+    """Declare a function as pure, so that rules can fold its calls into constants.
+
+    A pure function computes its result from its arguments alone, never reading
+    the context directly, and has no side effects. When every argument of a
+    call to a pure function is a constant, the optimizer (see
+    genruler.optimizer) evaluates the call once at compile time.
+
+    Args:
+        function: The function, or class, to declare as pure
+
+    Returns:
+        The function itself
+
+    Examples:
+        >>> @pure
+        ... def double(argument):
+        ...     return lambda context: compute(argument, context) * 2
+    """
+    function.__genruler_pure__ = True  # type: ignore
+    return function
+
+
+def is_pure(function: Any) -> bool:
+    """Return whether a function was declared pure."""
+    return getattr(function, "__genruler_pure__", False) is True
+
+
 def evaluate(
-    sequence: List[Any], env: ModuleType | object | None, result=None
+    sequence: List[Any], env: ModuleType | object | None, max_depth: int = MAX_DEPTH
 ) -> tuple[Any] | Callable[[Any], Any]:
     """Evaluate an S-expression sequence into a callable or value.
 
-    This function recursively evaluates S-expressions into either a callable function
-    or a tuple of values. It supports three types of expressions:
+    This function evaluates S-expressions into either a callable function or a
+    tuple of values. It supports three types of expressions:
     1. Function calls: (module.function arg1 arg2)
     2. Nested expressions: ((inner_expr) arg1 arg2)
     3. Value sequences: (1 2 3 4)
 
     Function calls can use either:
-    - Built-in genruler functions (e.g., "number.add")
+    - Functions from the registry, including genruler's built-in modules
+      (e.g., "number.add")
     - Custom functions from the provided env module (e.g., "custom_func")
 
+    The sequence is first built into a node tree (see genruler.nodes), whose
+    functions are then called. Both steps walk the tree with an explicit stack
+    rather than recursion, so the cost is linear in the size of the expression
+    and the Python stack depth stays constant.
+
     Args:
         sequence: A list representing an S-expression to evaluate
         env: Optional module containing custom functions that can be referenced
             by name without a module prefix
-        result: Internal accumulator for recursive evaluation, should not be
-            provided by external callers
+        max_depth: Maximum nesting depth of lists, the top level list counting
+            as depth 1
 
     Returns:
         - If the first element is a function: the result of calling that function
@@ -65,65 +99,19 @@ def evaluate(
     Raises:
         TypeError: If sequence is not a list
         InvalidFunctionNameError: If a function reference is invalid or not found
-            in either genruler's modules or the provided env
+            in either the registry or the provided env
+        NestingDepthError: If lists are nested deeper than max_depth
         TypeError: If function arguments are invalid for the called function
     """
-    if not isinstance(sequence, list):
-        raise TypeError("sequence must be a list")
-
-    result = result or tuple()
-    to_return = None
-
-    if len(sequence) > 0:
-        if isinstance(sequence[0], genSymbol):
-            closure = (
-                get_function(sequence[0].name, env)
-                if "." not in sequence[0].name
-                else get_genruler_function(*sequence[0].name.split("."))
-            )
-
-            to_return = evaluate(
-                sequence[1:],  # type: ignore
-                env,
-                result + (closure,),
-            )
-
-        elif isinstance(sequence[0], list):
-            to_return = evaluate(
-                sequence[1:],  # type: ignore
-                env,
-                result + (evaluate(sequence[0], env),),
-            )
-
-        else:
-            to_return = evaluate(
-                sequence[1:],  # type: ignore
-                env,
-                result + (sequence[0],),
-            )
-
-    else:
-        if callable(result[0]):
-            to_return = result[0](*result[1:])
-        else:
-            to_return = result
-
-    return to_return
-
-
-def get_function(
-    function_name: str, env: ModuleType | object | None
-) -> Callable[..., Any]:
-    try:
-        assert env
-
-        return getattr(env, function_name)
-    except (AttributeError, AssertionError) as e:
-        raise InvalidFunctionNameError(function_name) from e
+    return instantiate(build(sequence, env, max_depth))
 
 
 def get_genruler_function(module_name: str, function_name: str) -> Callable[[Any], Any]:
-    """Get a function from a module by name."""
+    """Get a function from a module by name.
+
+    Imports the module on every call, evaluate resolves names through
+    genruler.registry.default_registry instead.
+    """
     module = importlib.import_module(f"genruler.modules.{module_name}")
 
     try:
@@ -3,11 +3,12 @@ from functools import reduce
 from operator import itemgetter
 from typing import Any, TypeVar
 
-from genruler.library import compute
+from genruler.library import compute, pure
 
 T = TypeVar("T")
 
 
+@pure
 class coalesce:
     """Return the first non-empty value from a sequence of values.
 
@@ -19,6 +20,8 @@ class coalesce:
         arguments: Additional values to try in sequence
     """
 
+    __slots__ = ("value", "arguments")
+
     value: Any
     arguments: Any
 
@@ -69,6 +72,8 @@ class context:
         argument: Expression to evaluate within the sub-context
     """
 
+    __slots__ = ("context_sub", "argument")
+
     context_sub: Any
     argument: Any
 
@@ -108,6 +113,8 @@ class field:
         args: Optional default value for dictionary access
     """
 
+    __slots__ = ("key", "args")
+
     key: Callable[[dict[Any, Any]], str | int] | str | int
     args: tuple[Any, ...]
 
@@ -150,6 +157,7 @@ class field:
             return itemgetter(key)(context)
 
 
+@pure
 class value[T]:
     """Hold a constant value that ignores context.
 
@@ -163,6 +171,10 @@ class value[T]:
         ValueError: If the value is a sub-rule
     """
 
+    __slots__ = ("value",)
+
+    value: T
+
     def __init__(self, value: T) -> None:
         """Initialize with a constant value.
 
@@ -1,26 +1,50 @@
-import operator
 from collections.abc import Callable
 from typing import Any, Literal
 
-from genruler.common import binary
-from genruler.library import compute
+from genruler.library import compute, pure
 
 
+@pure
 def and_(*arguments: Any) -> Callable[[dict[Any, Any]], bool]:
-    return binary(operator.and_, arguments)
+    """Return True if every argument is truthy, False otherwise.
 
+    Arguments are evaluated left to right following Python truthiness, and
+    evaluation stops at the first falsy argument. Without arguments the
+    result is True.
+    """
 
-def contradiction() -> Callable[[dict[Any, Any]], Literal[False]]:
-    def inner(_: Any) -> Literal[False]:
-        return False
+    def inner(context: dict[Any, Any]) -> bool:
+        return all(compute(argument, context) for argument in arguments)
 
     return inner
 
 
+def _false(_: Any) -> Literal[False]:
+    return False
+
+
+@pure
+def contradiction() -> Callable[[dict[Any, Any]], Literal[False]]:
+    """Return False whatever the context, as a closure shared by every rule."""
+    return _false
+
+
+@pure
 def or_(*arguments: Any) -> Callable[[dict[Any, Any]], bool]:
-    return binary(operator.or_, arguments)
+    """Return True if any argument is truthy, False otherwise.
+
+    Arguments are evaluated left to right following Python truthiness, and
+    evaluation stops at the first truthy argument. Without arguments the
+    result is False.
+    """
+
+    def inner(context: dict[Any, Any]) -> bool:
+        return any(compute(argument, context) for argument in arguments)
+
+    return inner
 
 
+@pure
 def not_(argument: Any) -> Callable[[dict[Any, Any]], bool]:
     def inner(context: dict[Any, Any]) -> bool:
         return not compute(argument, context)
@@ -28,8 +52,11 @@ def not_(argument: Any) -> Callable[[dict[Any, Any]], bool]:
     return inner
 
 
-def tautology() -> Callable[[dict[Any, Any]], Literal[True]]:
-    def inner(_: Any) -> Literal[True]:
-        return True
+def _true(_: Any) -> Literal[True]:
+    return True
 
-    return inner
+
+@pure
+def tautology() -> Callable[[dict[Any, Any]], Literal[True]]:
+    """Return True whatever the context, as a closure shared by every rule."""
+    return _true
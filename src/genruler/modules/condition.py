@@ -2,32 +2,99 @@ import operator
 from collections.abc import Callable
 from typing import Any
 
-from genruler.common import binary
-from genruler.library import compute
+from genruler.common import Intervals, Members, binary, literal
+from genruler.library import compute, pure
 
 
+@pure
 def equal(*arguments: Any) -> Callable[[dict[Any, Any]], bool]:
     return binary(operator.eq, arguments)
 
 
+@pure
 def gt(*arguments: Any) -> Callable[[dict[Any, Any]], bool]:
     return binary(operator.gt, arguments)
 
 
+@pure
 def ge(*arguments: Any) -> Callable[[dict[Any, Any]], bool]:
     return binary(operator.ge, arguments)
 
 
+@pure
 def in_(*arguments: Any) -> Callable[[dict[Any, Any]], bool]:
+    """Return whether the value is in the collection.
+
+    A literal collection of numbers, strings and None is hashed once, rather
+    than scanned on every evaluation.
+    """
+    if len(arguments) == 2 and (members := Members.of(arguments[1])) is not None:
+        value = arguments[0]
+
+        def inner(context: dict[Any, Any]) -> bool:
+            return compute(value, context) in members
+
+        return inner
+
     return binary(operator.contains, arguments[::-1])
 
 
+@pure
+def in_range(argument: Any, *intervals: Any) -> Callable[[dict[Any, Any]], bool]:
+    """Return whether lower <= value <= upper for any (lower, upper) interval.
+
+    Literal intervals are sorted and merged once, and each evaluation is a
+    binary search over them.
+    """
+    if all(isinstance(literal(interval), tuple) for interval in intervals):
+        members = Intervals(tuple(map(literal, intervals)))
+
+        def inner(context: dict[Any, Any]) -> bool:
+            return compute(argument, context) in members
+
+        return inner
+
+    def dynamic(context: dict[Any, Any]) -> bool:
+        value = compute(argument, context)
+
+        return value in Intervals(
+            tuple(compute(interval, context) for interval in intervals)
+        )
+
+    return dynamic
+
+
+@pure
+def not_in(argument: Any, collection: Any) -> Callable[[dict[Any, Any]], bool]:
+    """Return whether the value is not in the collection.
+
+    The collection is computed before the value, and hashed once when it is
+    literal, like condition.in.
+    """
+    if (members := Members.of(collection)) is not None:
+
+        def inner(context: dict[Any, Any]) -> bool:
+            return compute(argument, context) not in members
+
+        return inner
+
+    def dynamic(context: dict[Any, Any]) -> bool:
+        items = compute(collection, context)
+
+        return compute(argument, context) not in items
+
+    return dynamic
+
+
+@pure
 def is_none(argument: Any) -> Callable[[dict[Any, Any]], bool]:
     def inner(context: dict[Any, Any]) -> bool:
         return compute(argument, context) is None
 
     return inner
 
+
+@pure
 def is_true(argument: Any) -> Callable[[dict[Any, Any]], bool]:
     def inner(context: dict[Any, Any]) -> bool:
         return compute(argument, context) is True
@@ -35,9 +102,11 @@ def is_true(argument: Any) -> Callable[[dict[Any, Any]], bool]:
     return inner
 
 
+@pure
 def lt(*arguments: Any) -> Callable[[dict[Any, Any]], bool]:
     return binary(operator.lt, arguments)
 
 
+@pure
 def le(*arguments: Any) -> Callable[[dict[Any, Any]], bool]:
     return binary(operator.le, arguments)
@@ -1,8 +1,9 @@
 from collections.abc import Callable
 
-from genruler.library import compute
+from genruler.library import compute, pure
 
 
+@pure
 def length[T](argument: Callable[[T], list] | list) -> Callable[[T], int]:
     def inner(context: T) -> int:
         return len(compute(argument, context))
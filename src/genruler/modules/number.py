@@ -4,23 +4,29 @@ from numbers import Number
 from typing import Any
 
 from genruler.common import binary
+from genruler.library import pure
 
 
+@pure
 def add(*arguments: Any) -> Callable[[dict[Any, Any]], Number]:
     return binary(operator.add, arguments)
 
 
+@pure
 def subtract(*arguments: Any) -> Callable[[dict[Any, Any]], Number]:
     return binary(operator.sub, arguments)
 
 
+@pure
 def multiply(*arguments: Any) -> Callable[[dict[Any, Any]], Number]:
     return binary(operator.mul, arguments)
 
 
+@pure
 def divide(*arguments: Any) -> Callable[[dict[Any, Any]], Number]:
     return binary(operator.truediv, arguments)
 
 
+@pure
 def modulo(*arguments: Any) -> Callable[[dict[Any, Any]], Number]:
     return binary(operator.mod, arguments)
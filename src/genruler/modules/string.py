@@ -1,6 +1,6 @@
 from typing import Any, Callable
 
-from genruler.library import compute
+from genruler.library import compute, pure
 from genruler.modules import basic
 
 
@@ -11,6 +11,7 @@ def field(key: str | int, *args) -> Callable[[dict[Any, Any] | list[Any]], Any]:
     return inner
 
 
+@pure
 def concat(link: Any, *arguments: Any) -> Callable[[dict[Any, Any]], str]:
     def inner(context: dict[Any, Any]) -> str:
         return compute(link, context).join(
@@ -31,6 +32,7 @@ def concat_fields(link: Any, *arguments: Any) -> Callable[[dict[Any, Any]], str]
     return inner
 
 
+@pure
 def lower(argument: Any) -> Callable[[dict[Any, Any]], str]:
     def inner(context: dict[Any, Any]) -> str:
         return compute(argument, context).lower()
@@ -0,0 +1,313 @@
+import sys
+from collections.abc import Callable, Iterator
+from dataclasses import dataclass
+from types import ModuleType
+from typing import Any, List
+
+from .exceptions import InvalidFunctionNameError, NestingDepthError
+from .lexer import Symbol
+from .registry import Registry, default_registry, is_builtin
+
+MAX_DEPTH = 200
+
+# Functions whose calls without arguments always compute the same value, and
+# are built as a single node shared by every tree
+SINGLETONS = frozenset({"boolean.tautology", "boolean.contradiction"})
+
+
+@dataclass(frozen=True, slots=True, weakref_slot=True)
+class Literal:
+    """A value written directly in the rule, such as a number or a string."""
+
+    value: Any
+
+    def __reduce__(self) -> tuple[Any, ...]:
+        return (Literal, (_intern(self.value),))
+
+
+@dataclass(frozen=True, slots=True, weakref_slot=True)
+class Reference:
+    """A function referenced by name without being called."""
+
+    name: str
+    function: Any
+
+    def __reduce__(self) -> tuple[Any, ...]:
+        if is_builtin(self.name, self.function):
+            return (_resolve, (Reference, sys.intern(self.name)))
+
+        return (Reference, (sys.intern(self.name), self.function))
+
+
+@dataclass(frozen=True, slots=True, weakref_slot=True)
+class Call:
+    """A call of a named function with the given argument nodes."""
+
+    name: str
+    function: Callable[..., Any]
+    arguments: tuple["Node", ...]
+
+    def __reduce__(self) -> tuple[Any, ...]:
+        if is_builtin(self.name, self.function):
+            return (_resolve, (Call, sys.intern(self.name), self.arguments))
+
+        return (Call, (sys.intern(self.name), self.function, self.arguments))
+
+
+@dataclass(frozen=True, slots=True, weakref_slot=True)
+class Sequence:
+    """A list whose head is not a named function.
+
+    Instantiates to a call of the first item with the remaining items when the
+    first item turns out to be callable, and to a tuple of the items otherwise.
+    """
+
+    items: tuple["Node", ...]
+
+    def __reduce__(self) -> tuple[Any, ...]:
+        return (Sequence, (self.items,))
+
+
+@dataclass(frozen=True, slots=True, weakref_slot=True)
+class Constant:
+    """A subtree replaced by the value it always computes, see genruler.optimizer.
+
+    Instantiates to a basic.value holding the value, so that it stays a callable
+    ignoring its context like the subtree it replaces.
+    """
+
+    value: Any
+    node: "Node"
+
+    def __reduce__(self) -> tuple[Any, ...]:
+        return (Constant, (self.value, self.node))
+
+
+type Node = Literal | Reference | Call | Sequence | Constant
+
+
+# Nodes pickle as their fields alone. Built-in functions are stored as their
+# registered name, and any other function, such as env functions or those of
+# namespaces an application registers, which a worker process may not have
+# registered, as the qualified name pickle records for it. Subtrees shared
+# within a tree stay shared once unpickled, and names and short strings are
+# interned so that pickle stores each of them once.
+
+# String literals up to this length are interned when built and when pickled
+MAX_INTERNED_LENGTH = 64
+
+
+def _intern(value: Any) -> Any:
+    if type(value) is str and len(value) <= MAX_INTERNED_LENGTH:
+        return sys.intern(value)
+
+    return value
+
+
+# The shared call node of each singleton function, keyed on its name and
+# function so that registries resolving the name differently are kept apart
+_singletons: dict[tuple[str, Any], Call] = {}
+
+
+def _call(name: str, function: Callable[..., Any], arguments: tuple[Node, ...]) -> Call:
+    if arguments or name not in SINGLETONS:
+        return Call(name, function, arguments)
+
+    return _singletons.setdefault((name, function), Call(name, function, ()))
+
+
+def _resolve(cls: type[Call] | type[Reference], name: str, *arguments: Any) -> Node:
+    if cls is Call:
+        return _call(name, default_registry.resolve(name), *arguments)
+
+    return cls(name, default_registry.resolve(name), *arguments)
+
+
+def build(
+    sequence: List[Any],
+    env: ModuleType | object | None,
+    max_depth: int = MAX_DEPTH,
+    registry: Registry = default_registry,
+) -> Node:
+    """Build the node tree of an S-expression sequence.
+
+    Function names are resolved while building, but no function is called.
+    Nested lists are walked with an explicit stack rather than recursion.
+    Short string literals are interned, and calls of the SINGLETONS functions
+    without arguments are shared by every tree, which keeps the trees of many
+    rules small.
+
+    Args:
+        sequence: A list representing an S-expression, as returned by lexer.read
+        env: Optional module containing custom functions that can be referenced
+            by name without a module prefix
+        max_depth: Maximum nesting depth of lists, the top level list counting
+            as depth 1
+        registry: The registry qualified function names are resolved with
+
+    Returns:
+        The root node of the tree
+
+    Raises:
+        TypeError: If sequence is not a list
+        InvalidFunctionNameError: If a function reference is invalid or not found
+            in either the registry or the provided env
+        NestingDepthError: If lists are nested deeper than max_depth
+    """
+    if not isinstance(sequence, list):
+        raise TypeError("sequence must be a list")
+
+    resolve = registry.resolve
+
+    # each frame holds the remaining elements of a list and its built nodes
+    frames: list[tuple[Iterator[Any], list[Node]]] = [(iter(sequence), [])]
+
+    while True:
+        elements, items = frames[-1]
+
+        for element in elements:
+            if isinstance(element, list):
+                if len(frames) >= max_depth:
+                    raise NestingDepthError(max_depth)
+
+                frames.append((iter(element), []))
+                break
+
+            elif isinstance(element, Symbol):
+                items.append(
+                    Reference(
+                        element.name,
+                        (
+                            get_function(element.name, env)
+                            if "." not in element.name
+                            else resolve(element.name)
+                        ),
+                    )
+                )
+
+            else:
+                items.append(Literal(_intern(element)))
+
+        else:
+            frames.pop()
+            node = (
+                _call(items[0].name, items[0].function, tuple(items[1:]))
+                if items
+                and isinstance(items[0], Reference)
+                and callable(items[0].function)
+                else Sequence(tuple(items))
+            )
+
+            if not frames:
+                return node
+
+            frames[-1][1].append(node)
+
+
+def children(node: Node) -> tuple[Node, ...]:
+    """Return the child nodes of a node."""
+    if isinstance(node, Call):
+        return node.arguments
+    elif isinstance(node, Sequence):
+        return node.items
+    else:
+        return ()
+
+
+def instantiate(node: Node, memo: dict[int, Any] | None = None) -> Any:
+    """Call the functions of a node tree, producing the rule closures.
+
+    This is what library.evaluate returns for the sequence the tree was built
+    from. The tree is walked with an explicit stack rather than recursion.
+
+    Args:
+        node: The root node of the tree
+        memo: Optional dictionary, keyed on node ids, of values already
+            instantiated. Filled with the value of every node visited, so that
+            nodes shared within the tree are only instantiated once.
+
+    Returns:
+        The value of the root node, usually a callable taking a context
+    """
+    memo = {} if memo is None else memo
+    stack: list[tuple[Node, bool]] = [(node, False)]
+    values: list[Any] = []
+
+    while stack:
+        current, expanded = stack.pop()
+        key = id(current)
+
+        if key in memo:
+            values.append(memo[key])
+            continue
+
+        if isinstance(current, Literal):
+            value = current.value
+
+        elif isinstance(current, Reference):
+            value = current.function
+
+        elif isinstance(current, Constant):
+            from .modules.basic import value as constant
+
+            value = constant(current.value)
+
+        elif not expanded:
+            stack.append((current, True))
+            stack.extend((child, False) for child in reversed(children(current)))
+            continue
+
+        else:
+            count = len(children(current))
+            arguments = values[len(values) - count :]
+            del values[len(values) - count :]
+
+            if isinstance(current, Call):
+                value = current.function(*arguments)
+            elif arguments and callable(arguments[0]):
+                value = arguments[0](*arguments[1:])
+            else:
+                value = tuple(arguments)
+
+        memo[key] = value
+        values.append(value)
+
+    return values[0]
+
+
+def unparse(node: Node) -> str:
+    """Return the S-expression source of a node tree.
+
+    Folded constants are written as the subtree they replace, so that reading
+    the result back builds an equivalent tree.
+
+    Examples:
+        >>> unparse(build(read('(number.add  (basic.field "a") 1)'), None))
+        '(number.add (basic.field "a") 1)'
+    """
+    if isinstance(node, Constant):
+        return unparse(node.node)
+    elif isinstance(node, Literal):
+        if isinstance(node.value, str):
+            escaped = node.value.replace("\\", "\\\\")
+            return f'"{escaped}"'
+
+        return repr(node.value)
+    elif isinstance(node, Reference):
+        return node.name
+    elif isinstance(node, Call):
+        return f"({' '.join([node.name, *map(unparse, node.arguments)])})"
+    else:
+        return f"({' '.join(map(unparse, node.items))})"
+
+
+def get_function(
+    function_name: str, env: ModuleType | object | None
+) -> Callable[..., Any]:
+    """Get a function from the env by name."""
+    try:
+        assert env
+
+        return getattr(env, function_name)
+    except (AttributeError, AssertionError) as e:
+        raise InvalidFunctionNameError(function_name) from e
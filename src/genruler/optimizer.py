@@ -0,0 +1,133 @@
+from typing import Any
+
+from .library import is_pure
+from .lexer import Symbol
+from .nodes import (
+    SINGLETONS,
+    Call,
+    Constant,
+    Literal,
+    Node,
+    Sequence,
+    children,
+    instantiate,
+)
+
+# The constant each singleton call node folds into, shared like the call
+_singletons: dict[Call, Node] = {}
+
+
+def fold(node: Node) -> Node:
+    """Replace the context independent subtrees of a node tree with their values.
+
+    A call is folded when its function is declared pure (see library.pure) and
+    every one of its arguments is a constant: a literal, a list that computes
+    to a tuple, or a call folded already. The call is then computed once, and
+    replaced by a Constant node holding its value.
+
+    Calls raising an exception, or computing a value that could be mistaken for
+    a sub-rule, are kept as they are, so that folding never changes what a
+    rule computes or raises. The tree is walked with an explicit stack rather
+    than recursion, and nodes are rebuilt only where something was folded.
+
+    Args:
+        node: The root node of the tree
+
+    Returns:
+        The root node of the folded tree
+
+    Examples:
+        >>> from genruler.lexer import read
+        >>> from genruler.nodes import build
+        >>> fold(build(read("(number.multiply 60 60 24)"), None)).value
+        86400
+    """
+    stack: list[tuple[Node, bool]] = [(node, False)]
+    results: list[Node] = []
+    memo: dict[int, Node] = {}
+
+    while stack:
+        current, expanded = stack.pop()
+
+        if id(current) in memo:
+            results.append(memo[id(current)])
+            continue
+
+        key = id(current)
+        items = children(current)
+
+        if items and not expanded:
+            stack.append((current, True))
+            stack.extend((child, False) for child in reversed(items))
+            continue
+
+        if items:
+            folded = tuple(results[len(results) - len(items) :])
+            del results[len(results) - len(items) :]
+
+            if any(new is not old for new, old in zip(folded, items)):
+                current = (
+                    Call(current.name, current.function, folded)
+                    if isinstance(current, Call)
+                    else Sequence(folded)
+                )
+
+        if isinstance(current, Call):
+            current = _fold_call(current)
+
+        memo[key] = current
+        results.append(current)
+
+    return results[0]
+
+
+def is_constant(node: Node) -> bool:
+    """Return whether a node computes the same value whatever the context."""
+    if isinstance(node, Constant):
+        return True
+
+    # lists compute to a tuple unless their head turns out to be callable
+    while isinstance(node, Sequence):
+        if not node.items:
+            return True
+
+        node = node.items[0]
+
+    return isinstance(node, Literal) and not callable(node.value)
+
+
+def _fold_call(node: Call) -> Node:
+    if not node.arguments and node.name in SINGLETONS:
+        if node not in _singletons:
+            _singletons[node] = _fold_pure(node)
+
+        return _singletons[node]
+
+    return _fold_pure(node)
+
+
+def _fold_pure(node: Call) -> Node:
+    if not is_pure(node.function) or not all(map(is_constant, node.arguments)):
+        return node
+
+    try:
+        closure = instantiate(node)
+        if not callable(closure):
+            return node
+
+        value = closure(None)
+    except Exception:
+        return node
+
+    if not _is_foldable(value):
+        return node
+
+    return Constant(value, node)
+
+
+def _is_foldable(value: Any) -> bool:
+    # callables and symbols would be taken for sub-rules, and mutable values
+    # could be changed by one evaluation and seen by the next
+    return not (
+        callable(value) or isinstance(value, (Symbol, list, dict, set, bytearray))
+    )
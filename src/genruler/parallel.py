@@ -0,0 +1,162 @@
+import os
+import pickle
+from collections import deque
+from collections.abc import Iterable, Iterator
+from concurrent.futures import FIRST_COMPLETED, Future, ProcessPoolExecutor, wait
+from itertools import count, islice
+from multiprocessing.context import BaseContext
+from typing import Any
+
+from .batch import CHUNK_SIZE
+from .compiler import Rule
+
+# The rule of each worker process, unpickled once when the worker starts
+_rule: Rule | None = None
+
+
+def evaluate_parallel(
+    rule: Rule,
+    contexts: Iterable[Any],
+    workers: int | None = None,
+    chunk_size: int = CHUNK_SIZE,
+    ordered: bool = True,
+    max_pending: int | None = None,
+    mp_context: BaseContext | None = None,
+) -> Iterator[Any]:
+    """Evaluate a rule over contexts in a pool of worker processes.
+
+    The rule is pickled and sent to each worker once, when it starts. The
+    contexts are then sent in chunks, each evaluated by a worker with
+    Rule.evaluate_many. No more than max_pending chunks are submitted and not
+    yet yielded at any time, so that the contexts are consumed as the results
+    are, and memory stays bounded however many contexts there are.
+
+    The contexts and results must be picklable, and so must the rule, see
+    Rule. An exception raised for a context is raised when the results of its
+    chunk would be yielded, and the chunks still pending are cancelled.
+
+    Args:
+        rule: The rule to evaluate
+        contexts: The contexts to evaluate the rule with, consumed lazily
+        workers: Number of worker processes, defaults to the number of CPUs
+        chunk_size: Number of contexts sent to a worker at a time
+        ordered: Whether to yield results in the order of the contexts, rather
+            than as soon as the chunk they belong to is evaluated
+        max_pending: Maximum number of chunks submitted and not yet yielded,
+            defaults to twice the number of workers
+        mp_context: The multiprocessing context the workers are started with
+
+    Returns:
+        A generator of the result for each context in order, or when not
+        ordered, of tuples of the position of a context and its result
+
+    Raises:
+        ValueError: If workers, chunk_size or max_pending is not positive
+        pickle.PicklingError: If the rule cannot be pickled
+    """
+    workers = workers or os.cpu_count() or 1
+    max_pending = 2 * workers if max_pending is None else max_pending
+
+    if min(workers, chunk_size, max_pending) < 1:
+        raise ValueError("workers, chunk_size and max_pending must be positive")
+
+    # pickle the rule up front, so that it fails before any worker starts
+    data = pickle.dumps(rule, protocol=pickle.HIGHEST_PROTOCOL)
+
+    return _evaluate_parallel(
+        data, contexts, workers, chunk_size, ordered, max_pending, mp_context
+    )
+
+
+def _evaluate_parallel(
+    data: bytes,
+    contexts: Iterable[Any],
+    workers: int,
+    chunk_size: int,
+    ordered: bool,
+    pending: int,
+    mp_context: BaseContext | None,
+) -> Iterator[Any]:
+    with ProcessPoolExecutor(
+        workers, mp_context, initializer=_initialize, initargs=(data,)
+    ) as executor:
+        chunks = _chunks(contexts, chunk_size)
+        futures: deque[tuple[int, Future[list[Any]]]] = deque()
+
+        try:
+            if ordered:
+                yield from _ordered(executor, chunks, futures, pending)
+            else:
+                yield from _unordered(executor, chunks, futures, pending)
+        finally:
+            # stop evaluating chunks nobody will read, when the caller stops
+            # early or a chunk raised
+            for _, future in futures:
+                future.cancel()
+
+
+def _initialize(data: bytes) -> None:
+    global _rule
+    _rule = pickle.loads(data)
+
+
+def _evaluate(contexts: list[Any]) -> list[Any]:
+    assert _rule is not None
+
+    return _rule.evaluate_many(contexts)
+
+
+def _chunks(
+    contexts: Iterable[Any], chunk_size: int
+) -> Iterator[tuple[int, list[Any]]]:
+    # pair each chunk with the position of its first context
+    iterator = iter(contexts)
+
+    for start in count(0, chunk_size):
+        chunk = list(islice(iterator, chunk_size))
+        if not chunk:
+            return
+
+        yield start, chunk
+
+
+def _ordered(
+    executor: ProcessPoolExecutor,
+    chunks: Iterator[tuple[int, list[Any]]],
+    futures: deque[tuple[int, Future[list[Any]]]],
+    pending: int,
+) -> Iterator[Any]:
+    for start, chunk in chunks:
+        futures.append((start, executor.submit(_evaluate, chunk)))
+
+        if len(futures) >= pending:
+            yield from futures.popleft()[1].result()
+
+    while futures:
+        yield from futures.popleft()[1].result()
+
+
+def _unordered(
+    executor: ProcessPoolExecutor,
+    chunks: Iterator[tuple[int, list[Any]]],
+    futures: deque[tuple[int, Future[list[Any]]]],
+    pending: int,
+) -> Iterator[tuple[int, Any]]:
+    exhausted = False
+
+    while futures or not exhausted:
+        while not exhausted and len(futures) < pending:
+            chunk = next(chunks, None)
+            if chunk is None:
+                exhausted = True
+            else:
+                futures.append((chunk[0], executor.submit(_evaluate, chunk[1])))
+
+        if not futures:
+            break
+
+        done, _ = wait([future for _, future in futures], return_when=FIRST_COMPLETED)
+
+        for start, future in [item for item in futures if item[1] in done]:
+            futures.remove((start, future))
+            yield from enumerate(future.result(), start)
@@ -0,0 +1,304 @@
+import pstats
+import time
+from collections.abc import Callable, Iterable
+from dataclasses import dataclass, field
+from typing import Any
+
+from .modules.basic import value as constant
+from .nodes import Call, Constant, Literal, Node, Reference, unparse
+
+# Orders Profile.report lists nodes in, by the key nodes are sorted on
+SORT_KEYS = {
+    "cumulative": lambda node: node.cumulative,
+    "own": lambda node: node.own,
+    "calls": lambda node: node.calls,
+    "position": lambda node: node.span[0],
+}
+
+
+@dataclass(eq=False)
+class NodeProfile:
+    """The time spent evaluating a call node of a rule.
+
+    Attributes:
+        name: The name of the function called
+        span: The start and end offsets of the call in the source of the
+            profile
+        parent: The profile of the call the node is an argument of, None for
+            the root
+        calls: Number of times the node was evaluated
+        cumulative: Nanoseconds spent evaluating the node, its arguments
+            included
+        own: Nanoseconds spent evaluating the node, its arguments excluded
+    """
+
+    name: str
+    span: tuple[int, int]
+    parent: "NodeProfile | None" = field(default=None, repr=False)
+    calls: int = 0
+    cumulative: int = 0
+    own: int = 0
+
+    @property
+    def label(self) -> str:
+        """The name and the span of the node, unique within a profile."""
+        return f"{self.name}@{self.span[0]}:{self.span[1]}"
+
+
+class Profile:
+    """The time spent in each call node of a rule, across its evaluations.
+
+    Nodes are told apart by their span in the source of the profile, which is
+    the rule written back from its node tree, see genruler.nodes.unparse, so
+    that spans do not depend on how the rule was formatted. Subtrees
+    shared within the tree are profiled for each place they appear in, and
+    subtrees folded into constants are not profiled.
+
+    Attributes:
+        source: The source the spans of the nodes are offsets into
+        nodes: The profile of every call node, in the order they appear in
+            the source
+    """
+
+    source: str
+    nodes: list[NodeProfile]
+
+    def __init__(self, source: str, nodes: list[NodeProfile]) -> None:
+        self.source = source
+        self.nodes = nodes
+
+    def text(self, node: NodeProfile) -> str:
+        """Return the source of a node."""
+        return self.source[node.span[0] : node.span[1]]
+
+    def reset(self) -> None:
+        """Forget the evaluations profiled so far."""
+        for node in self.nodes:
+            node.calls = node.cumulative = node.own = 0
+
+    def report(self, sort: str = "cumulative", limit: int | None = None) -> str:
+        """Return a table of the time spent in each node.
+
+        Args:
+            sort: The column the nodes are sorted on, descending, one of
+                "cumulative", "own" and "calls", or "position" for the order
+                they appear in the source
+            limit: Maximum number of nodes listed, all of them when None
+
+        Returns:
+            The table, with a line per node
+        """
+        nodes = sorted(self.nodes, key=SORT_KEYS[sort], reverse=sort != "position")
+        lines = [
+            f"{'calls':>10} {'cumulative ms':>14} {'own ms':>10} "
+            f"{'per call us':>12}  node"
+        ]
+
+        for node in nodes[:limit]:
+            text = self.text(node)
+            if len(text) > 60:
+                text = text[:57] + "..."
+
+            per_call = node.cumulative / node.calls / 1e3 if node.calls else 0.0
+            lines.append(
+                f"{node.calls:>10} {node.cumulative / 1e6:>14.3f} "
+                f"{node.own / 1e6:>10.3f} {per_call:>12.3f}  {text}"
+            )
+
+        return "\n".join(lines)
+
+    def collapsed(self) -> str:
+        """Return the own time of each node as collapsed stacks.
+
+        The format is the one flamegraph.pl, speedscope and inferno read: a
+        line per node, of the labels of the nodes from the root to it joined
+        with semicolons, then its own time in microseconds.
+
+        Returns:
+            The collapsed stacks, a line per node evaluated at least once
+        """
+        lines = []
+
+        for node in self.nodes:
+            if not node.calls:
+                continue
+
+            stack = []
+            current: NodeProfile | None = node
+            while current is not None:
+                stack.append(current.label)
+                current = current.parent
+
+            lines.append(f"{';'.join(reversed(stack))} {node.own // 1000}")
+
+        return "\n".join(lines)
+
+    def stats(self) -> pstats.Stats:
+        """Return the profile as pstats statistics.
+
+        Each node is a function of its own, named after its label, so that the
+        tools reading profiles of Python code, such as snakeviz or gprof2dot,
+        read this one too, after pstats.Stats.dump_stats.
+
+        Returns:
+            The statistics, in seconds
+        """
+        return pstats.Stats(_Stats(self))
+
+
+class ProfiledRule:
+    """A rule compiled with a timer around the closure of each call node.
+
+    The profiled closures are compiled apart from the rule, so that the rule
+    itself is evaluated without any profiling overhead. They are not safe to
+    evaluate from several threads at once.
+
+    Attributes:
+        profile: The time spent in each node across the evaluations so far
+    """
+
+    profile: Profile
+
+    def __init__(self, node: Node) -> None:
+        self.profile = Profile(unparse(node), [])
+        self._function, _ = _Instrumenter(self.profile).instrument(node, 0, None)
+
+    def __call__(self, context: Any) -> Any:
+        """Evaluate the rule against a context, timing each node.
+
+        Args:
+            context: The context to evaluate the rule with
+
+        Returns:
+            The result of the rule
+        """
+        return self._function(context)
+
+    def evaluate_many(self, contexts: Iterable[Any]) -> list[Any]:
+        """Evaluate the rule against each context, timing each node.
+
+        Args:
+            contexts: The contexts to evaluate the rule with
+
+        Returns:
+            The result for each context, in order
+        """
+        function = self._function
+
+        return [function(context) for context in contexts]
+
+    def report(self, sort: str = "cumulative", limit: int | None = None) -> str:
+        """Return a table of the time spent in each node, see Profile.report."""
+        return self.profile.report(sort, limit)
+
+    def collapsed(self) -> str:
+        """Return the own time of each node as collapsed stacks."""
+        return self.profile.collapsed()
+
+
+class _Instrumenter:
+    # builds the closures of a tree like nodes.instantiate, wrapping those of
+    # call nodes in a timer, and records the span of each call in the source
+    # nodes.unparse writes
+
+    def __init__(self, profile: Profile) -> None:
+        self.profile = profile
+        # the time spent in the arguments of each node being evaluated
+        self.stack: list[int] = []
+
+    def instrument(
+        self, node: Node, start: int, parent: NodeProfile | None
+    ) -> tuple[Any, int]:
+        # the closure of the node, and the length of its source
+        if isinstance(node, Constant):
+            return constant(node.value), len(unparse(node.node))
+        elif isinstance(node, (Literal, Reference)):
+            value = node.value if isinstance(node, Literal) else node.function
+            return value, len(unparse(node))
+
+        profile = None
+        if isinstance(node, Call):
+            profile = NodeProfile(node.name, (start, start), parent)
+            self.profile.nodes.append(profile)
+            arguments, offset = node.arguments, start + len(node.name) + 2
+        else:
+            arguments, offset = node.items, start + 1
+
+        values = []
+        for argument in arguments:
+            value, length = self.instrument(argument, offset, profile or parent)
+            values.append(value)
+            offset += length + 1
+
+        # the offset is past the closing parenthesis, but for empty sequences,
+        # where it is on it
+        end = offset if arguments or profile is not None else offset + 1
+        length = end - start
+
+        if profile is not None:
+            profile.span = (start, end)
+
+        if isinstance(node, Call):
+            value = node.function(*values)
+        elif values and callable(values[0]):
+            value = values[0](*values[1:])
+        else:
+            return tuple(values), length
+
+        if profile is None or not callable(value):
+            return value, length
+
+        return self.timed(value, profile), length
+
+    def timed(self, function: Callable[[Any], Any], profile: NodeProfile) -> Any:
+        stack = self.stack
+        clock = time.perf_counter_ns
+
+        def timed(context: Any) -> Any:
+            stack.append(0)
+            start = clock()
+            try:
+                return function(context)
+            finally:
+                elapsed = clock() - start
+                arguments = stack.pop()
+
+                profile.calls += 1
+                profile.cumulative += elapsed
+                profile.own += elapsed - arguments
+                if stack:
+                    stack[-1] += elapsed
+
+        return timed
+
+
+class _Stats:
+    # the interface pstats.Stats loads statistics from, as cProfile.Profile
+    # provides it
+
+    def __init__(self, profile: Profile) -> None:
+        self.profile = profile
+
+    def create_stats(self) -> None:
+        self.stats = {}
+
+        for node in self.profile.nodes:
+            callers = {}
+            if node.parent is not None:
+                callers[self._key(node.parent)] = (
+                    node.calls,
+                    node.calls,
+                    node.own / 1e9,
+                    node.cumulative / 1e9,
+                )
+
+            self.stats[self._key(node)] = (
+                node.calls,
+                node.calls,
+                node.own / 1e9,
+                node.cumulative / 1e9,
+                callers,
+            )
+
+    def _key(self, node: NodeProfile) -> tuple[str, int, str]:
+        return ("<rule>", node.span[0], node.label)
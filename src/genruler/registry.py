@@ -0,0 +1,201 @@
+import importlib
+import threading
+from collections.abc import Callable
+from types import ModuleType
+from typing import Any, overload
+
+from .exceptions import InvalidFunctionNameError, UnknownFunctionError
+
+BUILTIN_NAMESPACES = ("basic", "boolean", "condition", "list", "number", "string")
+
+
+class Registry:
+    """Map fully qualified function names (e.g. "number.add") to their factories.
+
+    Functions are either registered one by one, or as a whole namespace backed
+    by a module (or any object with attributes). Namespaces are loaded lazily
+    on the first reference to one of their functions, after which resolving a
+    name is a single dictionary lookup.
+
+    Public callables of a namespace are registered under their attribute name,
+    and additionally without the trailing underscore used to avoid clashes with
+    Python keywords, so "boolean.and" resolves to boolean.and_. The public
+    callables of a module are those listed in its __all__ when it has one,
+    and otherwise those defined in the module, or in the modules of the
+    package it is the __init__ of.
+    """
+
+    def __init__(self) -> None:
+        self._functions: dict[str, Callable[..., Any]] = {}
+        self._pending: dict[str, str | ModuleType | object] = {}
+        self._lock = threading.Lock()
+
+    @overload
+    def register(
+        self, name: str
+    ) -> Callable[[Callable[..., Any]], Callable[..., Any]]: ...
+
+    @overload
+    def register(
+        self, name: str, function: Callable[..., Any]
+    ) -> Callable[..., Any]: ...
+
+    def register(self, name: str, function: Callable[..., Any] | None = None) -> Any:
+        """Register a single function under a fully qualified name.
+
+        Can also be used as a decorator by omitting the function.
+
+        Args:
+            name: The qualified name, in the format "namespace.function"
+            function: The function factory to register
+
+        Returns:
+            The function itself, or a decorator registering the function
+
+        Raises:
+            InvalidFunctionNameError: If name is not qualified with a namespace
+
+        Examples:
+            >>> @default_registry.register("geo.distance")
+            ... def distance(a, b):
+            ...     ...
+        """
+        namespace, _, function_name = name.rpartition(".")
+        if not namespace or not function_name:
+            raise InvalidFunctionNameError(name)
+
+        def decorator(function: Callable[..., Any]) -> Callable[..., Any]:
+            if not callable(function):
+                raise TypeError(f"{name} must be callable")
+
+            self._load(namespace)
+            self._functions[name] = function
+            return function
+
+        return decorator if function is None else decorator(function)
+
+    def register_namespace(
+        self, namespace: str, module: str | ModuleType | object
+    ) -> None:
+        """Register every public callable of a module under a namespace.
+
+        Args:
+            namespace: The namespace functions are referenced with, e.g. "geo"
+            module: The module, an importable module path, or any other object
+                whose attributes are the functions. Module paths are only
+                imported when a function of the namespace is first resolved.
+
+        Raises:
+            InvalidFunctionNameError: If the namespace is empty
+        """
+        if not namespace:
+            raise InvalidFunctionNameError(namespace)
+
+        with self._lock:
+            for name in [
+                name for name in self._functions if name.rpartition(".")[0] == namespace
+            ]:
+                del self._functions[name]
+
+            self._pending[namespace] = module
+
+    def resolve(self, name: str) -> Callable[..., Any]:
+        """Return the function registered under a fully qualified name.
+
+        Args:
+            name: The qualified name, in the format "namespace.function"
+
+        Returns:
+            The registered function factory
+
+        Raises:
+            UnknownFunctionError: If no function is registered under the name
+        """
+        try:
+            return self._functions[name]
+        except KeyError:
+            pass
+
+        namespace = name.rpartition(".")[0]
+        if namespace in self._pending:
+            self._load(namespace)
+
+            try:
+                return self._functions[name]
+            except KeyError:
+                pass
+
+        raise UnknownFunctionError(name)
+
+    def __contains__(self, name: str) -> bool:
+        try:
+            self.resolve(name)
+        except UnknownFunctionError:
+            return False
+
+        return True
+
+    def _load(self, namespace: str) -> None:
+        with self._lock:
+            module = self._pending.get(namespace)
+            if module is None:
+                return
+
+            if isinstance(module, str):
+                module = importlib.import_module(module)
+            del self._pending[namespace]
+
+            exported = getattr(module, "__all__", None)
+
+            for attribute in dir(module) if exported is None else exported:
+                if attribute.startswith("_"):
+                    continue
+
+                function = getattr(module, attribute)
+                if not callable(function) or (
+                    # without __all__, skip names a module merely imported,
+                    # keeping those a package imported from its own modules
+                    exported is None
+                    and isinstance(module, ModuleType)
+                    and not _defined_in(function, module.__name__)
+                ):
+                    continue
+
+                self._functions[f"{namespace}.{attribute}"] = function
+                if attribute.endswith("_"):
+                    self._functions.setdefault(
+                        f"{namespace}.{attribute[:-1]}", function
+                    )
+
+
+def _defined_in(function: Callable[..., Any], package: str) -> bool:
+    name = getattr(function, "__module__", None) or ""
+
+    return name == package or name.startswith(f"{package}.")
+
+
+default_registry = Registry()
+
+for namespace in BUILTIN_NAMESPACES:
+    default_registry.register_namespace(namespace, f"genruler.modules.{namespace}")
+
+
+def is_builtin(name: str, function: Any) -> bool:
+    """Return whether a function is the built-in one registered under a name.
+
+    Functions of the namespaces an application registers are not built-in,
+    even in the default registry.
+
+    Args:
+        name: The qualified name the function was resolved from
+        function: The function factory
+
+    Returns:
+        Whether the name belongs to a built-in namespace and resolves to the
+        function in the default registry
+    """
+    return (
+        name.partition(".")[0] in BUILTIN_NAMESPACES
+        and name in default_registry
+        and default_registry.resolve(name) is function
+    )
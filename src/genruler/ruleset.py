@@ -0,0 +1,105 @@
+from collections.abc import Callable, Iterator, Mapping
+from types import ModuleType
+from typing import Any
+
+from .compiler import compile_python_results
+from .lexer import read
+from .nodes import Node, build
+from .optimizer import fold
+
+
+class RuleSet:
+    """A set of named rules evaluated together against one context.
+
+    The rules are compiled into a single Python function, like the "python"
+    backend of genruler.compile does for one rule. Subexpressions repeated
+    across rules, such as the same condition tested by several of them, are
+    computed once per context and shared by every rule using them.
+
+    Attributes:
+        names: The names of the rules, in the order they were given
+        nodes: The root node of each rule, in the same order
+        source: The generated Python source
+        deduplicated: Number of uses of repeated subexpressions that read the
+            value computed by an earlier use, rather than computing it again
+    """
+
+    names: tuple[str, ...]
+    nodes: tuple[Node, ...]
+    source: str
+    deduplicated: int
+
+    def __init__(
+        self,
+        rules: Mapping[str, str],
+        env: ModuleType | object | None = None,
+        optimize: bool = True,
+    ) -> None:
+        """Compile the rules of the set.
+
+        Args:
+            rules: The S-expression string of each rule, keyed on its name
+            env: Optional module containing local functions that can be
+                referenced in the S-expressions
+            optimize: Whether to fold context independent subexpressions and
+                share repeated ones, like genruler.compile
+
+        Raises:
+            ValueError: If a rule cannot be parsed
+            NonCallableResultError: If a rule does not evaluate to a callable
+            InvalidFunctionNameError: If a referenced function cannot be found
+        """
+        nodes = []
+
+        for name, source in rules.items():
+            try:
+                node = build(read(source), env)
+            except Exception as e:
+                e.add_note(f"In rule {name!r}")
+                raise
+
+            nodes.append(fold(node) if optimize else node)
+
+        self.names = tuple(rules)
+        self.nodes = tuple(nodes)
+
+        function, self.source, self.deduplicated = compile_python_results(
+            self.nodes, optimize
+        )
+        self._function: Callable[[Any], tuple[Any, ...]] = function
+
+    def __call__(self, context: Any) -> dict[str, Any]:
+        """Evaluate every rule against a context.
+
+        Args:
+            context: The context to evaluate the rules with
+
+        Returns:
+            The result of each rule, keyed on its name
+        """
+        return dict(zip(self.names, self._function(context)))
+
+    def matching(self, context: Any) -> list[str]:
+        """Return the names of the rules with a truthy result for a context.
+
+        Args:
+            context: The context to evaluate the rules with
+
+        Returns:
+            The names of the matching rules, in the order they were given
+        """
+        return [
+            name for name, result in zip(self.names, self._function(context)) if result
+        ]
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.names)
+
+    def __contains__(self, name: object) -> bool:
+        return name in self.names
+
+    def __repr__(self) -> str:
+        return f"<{self.__class__.__name__} of {len(self)} rules>"
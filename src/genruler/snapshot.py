@@ -0,0 +1,316 @@
+import hashlib
+import importlib.metadata
+import marshal
+import mmap
+import os
+import tempfile
+from collections.abc import Mapping
+from types import ModuleType
+from typing import Any
+
+from .compiler import BACKENDS, Rule
+from .exceptions import InvalidFunctionNameError
+from .lexer import read
+from .nodes import (
+    Call,
+    Constant,
+    Literal,
+    Node,
+    Reference,
+    Sequence,
+    _call,
+    build,
+    children,
+    get_function,
+)
+from .optimizer import fold
+from .registry import default_registry, is_builtin
+
+# Written at the start of every snapshot file
+MAGIC = b"GENRULER-SNAPSHOT"
+
+# Version of the layout of snapshots, changed whenever it changes. Snapshots
+# of another version, or written by a Python with another marshal format,
+# are entirely stale.
+FORMAT_VERSION = 1
+
+# Version of genruler, which snapshots are stale for another one of, as the
+# built-in functions their constants were folded with may have changed
+try:
+    PACKAGE_VERSION: str | None = importlib.metadata.version("genruler")
+except importlib.metadata.PackageNotFoundError:  # pragma: no cover
+    # imported from a source tree, without the package installed
+    PACKAGE_VERSION = None
+
+# Tags of the nodes, as encoded in snapshots
+LITERAL, REFERENCE, CALL, SEQUENCE, CONSTANT, UNFOLDED = range(6)
+
+type Sources = Mapping[str, str]
+
+
+def digest(source: str) -> bytes:
+    """Return the SHA-256 digest of a rule source, as snapshots key it."""
+    return hashlib.sha256(source.encode()).digest()
+
+
+def save(
+    path: str | os.PathLike[str],
+    sources: Sources,
+    rules: Mapping[str, Rule],
+    optimize: bool = True,
+) -> int:
+    """Write the node trees of compiled rules to a snapshot file.
+
+    Each rule is stored as its node tree, folded constants included, along
+    with the SHA-256 digest of its source, encoded with marshal. Constants
+    folded from calls of env functions, or of functions of namespaces the
+    application registered, are stored unfolded, as those may change between
+    saving and loading. The file is written to a temporary
+    file next to the path and moved over it once complete, so that readers
+    never see a partial snapshot.
+
+    Args:
+        path: The path of the snapshot file, overwritten
+        sources: The S-expression string of each rule, keyed on its name
+        rules: The rules compiled from the sources, keyed on the same names
+        optimize: Whether the rules were compiled with optimize, which
+            snapshots are only loaded with
+
+    Returns:
+        The number of bytes written
+
+    Raises:
+        KeyError: If a rule has no source
+    """
+    entries = {
+        name: (digest(sources[name]), _encode(rule.node))
+        for name, rule in rules.items()
+    }
+    header = (FORMAT_VERSION, PACKAGE_VERSION, marshal.version, optimize)
+    data = MAGIC + marshal.dumps((*header, entries))
+
+    descriptor, temporary = tempfile.mkstemp(
+        dir=os.path.dirname(os.fspath(path)) or "."
+    )
+    try:
+        with os.fdopen(descriptor, "wb") as file:
+            file.write(data)
+        os.replace(temporary, path)
+    except BaseException:
+        os.unlink(temporary)
+        raise
+
+    return len(data)
+
+
+def load(
+    path: str | os.PathLike[str],
+    sources: Sources,
+    env: ModuleType | object | None = None,
+    backend: str = "closure",
+    optimize: bool = True,
+) -> tuple[dict[str, Rule], list[str]]:
+    """Compile the rules stored in a snapshot file, without parsing them.
+
+    The file is memory-mapped and decoded with marshal. The rules whose
+    source changed since the snapshot was saved, or that are missing from
+    it, are stale, as are all of them when the file is missing, corrupt, or
+    of another version.
+
+    Args:
+        path: The path of the snapshot file
+        sources: The S-expression string of each rule, keyed on its name
+        env: Optional module containing the local functions the rules
+            reference, resolved by name again
+        backend: The backend the rules are compiled with, see genruler.compile
+        optimize: Whether the rules are optimized, see genruler.compile
+
+    Returns:
+        The rules loaded, keyed on their name, and the names of the stale
+        rules, in the order of the sources
+    """
+    return _load(_read(path, optimize), sources, env, backend, optimize)
+
+
+def load_or_compile(
+    path: str | os.PathLike[str],
+    sources: Sources,
+    env: ModuleType | object | None = None,
+    backend: str = "closure",
+    optimize: bool = True,
+) -> dict[str, Rule]:
+    """Load rules from a snapshot file, compiling and saving the stale ones.
+
+    Only the stale rules are parsed and compiled from their source. The
+    snapshot is then saved again when any rule was stale, or removed from
+    the sources, so that the next load finds every rule in it.
+
+    Args:
+        path: The path of the snapshot file, created when missing
+        sources: The S-expression string of each rule, keyed on its name
+        env: Optional module containing the local functions the rules
+            reference
+        backend: The backend the rules are compiled with, see genruler.compile
+        optimize: Whether the rules are optimized, see genruler.compile
+
+    Returns:
+        The compiled rules, keyed on their name, in the order of the sources
+
+    Raises:
+        ValueError: If a stale rule cannot be parsed, or the backend is
+            unknown
+        NonCallableResultError: If a stale rule does not evaluate to a callable
+        InvalidFunctionNameError: If a stale rule references a function that
+            cannot be found
+
+    Examples:
+        >>> sources = {"adult": '(condition.gt (basic.field "age") 18)'}
+        >>> rules = load_or_compile("rules.snapshot", sources)
+        >>> rules["adult"]({"age": 21})
+        True
+    """
+    if backend not in BACKENDS:
+        raise ValueError(
+            f"Unknown backend {backend!r}, expected one of {list(BACKENDS)}"
+        )
+
+    entries = _read(path, optimize)
+    loaded, stale = _load(entries, sources, env, backend, optimize)
+
+    for name in stale:
+        try:
+            node = build(read(sources[name]), env)
+        except Exception as e:
+            e.add_note(f"In rule {name!r}")
+            raise
+
+        loaded[name] = BACKENDS[backend](fold(node) if optimize else node, optimize)
+
+    rules = {name: loaded[name] for name in sources}
+
+    if stale or len(entries) != len(rules):
+        save(path, sources, rules, optimize)
+
+    return rules
+
+
+def _load(
+    entries: dict[str, Any],
+    sources: Sources,
+    env: ModuleType | object | None,
+    backend: str,
+    optimize: bool,
+) -> tuple[dict[str, Rule], list[str]]:
+    compiler = BACKENDS[backend]
+    rules = {}
+    stale = []
+
+    for name, source in sources.items():
+        entry = entries.get(name)
+        if entry is None or entry[0] != digest(source):
+            stale.append(name)
+            continue
+
+        try:
+            node = _decode(entry[1], env)
+        except InvalidFunctionNameError:
+            # a function of the env is gone, compiling the source reports it
+            stale.append(name)
+            continue
+
+        rules[name] = compiler(node, optimize)
+
+    return rules, stale
+
+
+def _read(path: str | os.PathLike[str], optimize: bool) -> dict[str, Any]:
+    # the entries of a snapshot, none when it cannot be loaded as it is
+    try:
+        with (
+            open(path, "rb") as file,
+            mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as data,
+        ):
+            if data[: len(MAGIC)] != MAGIC:
+                return {}
+
+            with memoryview(data)[len(MAGIC) :] as view:
+                *header, entries = marshal.loads(view)
+    except (OSError, ValueError, EOFError, TypeError):
+        # missing, empty or corrupt
+        return {}
+
+    if header != [FORMAT_VERSION, PACKAGE_VERSION, marshal.version, optimize]:
+        return {}
+
+    # the digest and encoded node tree of each rule, keyed on its name
+    if not isinstance(entries, dict) or not all(
+        isinstance(entry, tuple)
+        and len(entry) == 2
+        and isinstance(entry[0], bytes)
+        and isinstance(entry[1], tuple)
+        for entry in entries.values()
+    ):
+        return {}
+
+    return entries
+
+
+def _encode(node: Node) -> tuple[Any, ...]:
+    if isinstance(node, Literal):
+        return (LITERAL, node.value)
+    elif isinstance(node, Reference):
+        return (REFERENCE, node.name)
+    elif isinstance(node, Call):
+        return (CALL, node.name, *map(_encode, node.arguments))
+    elif isinstance(node, Sequence):
+        return (SEQUENCE, *map(_encode, node.items))
+
+    if _calls_env(node.node):
+        # computed by functions outside genruler, which may have changed
+        # once loaded
+        return (UNFOLDED, _encode(node.node))
+
+    try:
+        marshal.dumps(node.value)
+    except ValueError:
+        # a value marshal cannot store, folded again once loaded
+        return (UNFOLDED, _encode(node.node))
+
+    return (CONSTANT, node.value, _encode(node.node))
+
+
+def _calls_env(node: Node) -> bool:
+    # any function but the built-in ones may compute something else once
+    # loaded, those of the env as well as those of application namespaces
+    if isinstance(node, Call | Reference) and not is_builtin(node.name, node.function):
+        return True
+    elif isinstance(node, Constant):
+        return _calls_env(node.node)
+
+    return any(_calls_env(child) for child in children(node))
+
+
+def _decode(data: tuple[Any, ...], env: ModuleType | object | None) -> Node:
+    tag = data[0]
+
+    if tag == LITERAL:
+        return Literal(data[1])
+    elif tag == REFERENCE:
+        return Reference(data[1], _function(data[1], env))
+    elif tag == CALL:
+        arguments = tuple(_decode(argument, env) for argument in data[2:])
+        return _call(data[1], _function(data[1], env), arguments)
+    elif tag == SEQUENCE:
+        return Sequence(tuple(_decode(item, env) for item in data[1:]))
+    elif tag == CONSTANT:
+        return Constant(data[1], _decode(data[2], env))
+
+    return fold(_decode(data[1], env))
+
+
+def _function(name: str, env: ModuleType | object | None) -> Any:
+    # resolves names like nodes.build does
+    if "." not in name:
+        return get_function(name, env)
+
+    return default_registry.resolve(name)
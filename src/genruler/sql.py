@@ -0,0 +1,362 @@
+from collections.abc import Callable
+from dataclasses import dataclass, field
+from string import Formatter
+from typing import Any
+
+from .compiler import Rule, compile_closure
+from .modules import basic, boolean, condition, number, string
+from .nodes import Call, Constant, Literal, Node, Sequence, unparse
+
+# Python values passed to the database as parameters
+SCALARS = (int, float, bool, str)
+
+
+class Untranslatable(Exception):
+    """Raised for subtrees without an equivalent SQL expression."""
+
+
+@dataclass(frozen=True)
+class Fragment:
+    """A translated SQL expression.
+
+    Attributes:
+        sql: The SQL expression, with a ? placeholder per parameter
+        parameters: The parameter values, in the order of their placeholders
+        boolean: Whether the expression is a condition, evaluating to 0, 1 or
+            NULL
+    """
+
+    sql: str
+    parameters: tuple[Any, ...] = ()
+    boolean: bool = False
+
+
+@dataclass(frozen=True)
+class Residual:
+    """A subtree of a rule that could not be translated into SQL.
+
+    Attributes:
+        node: The root of the subtree
+        reason: Why the subtree could not be translated
+        source: The S-expression of the subtree
+    """
+
+    node: Node
+    reason: str
+    source: str
+
+
+@dataclass(frozen=True)
+class Predicate:
+    """A rule translated into an SQL WHERE clause.
+
+    The rows a rule matches are the rows selected by the clause for which
+    every residual is also truthy. A rule translated without residuals is
+    pushed down to the database as a whole.
+
+    Attributes:
+        where: The SQL condition, with a ? placeholder per parameter
+        parameters: The parameter values, in the order of their placeholders
+        residuals: The conjuncts of the rule that were not translated, to be
+            evaluated against the rows selected by the clause
+    """
+
+    where: str
+    parameters: tuple[Any, ...]
+    residuals: tuple[Residual, ...]
+    _rules: tuple[Rule, ...] = field(default=(), repr=False, compare=False)
+
+    def matches(self, row: Any) -> bool:
+        """Return whether a row selected by the clause matches the residuals.
+
+        Args:
+            row: The row as the context a rule is evaluated with, usually a
+                dictionary of column values
+
+        Returns:
+            True if every residual is truthy for the row
+        """
+        return all(rule(row) for rule in self._rules)
+
+
+def to_sql(rule: Rule | Node) -> Predicate:
+    """Translate a rule into an SQL WHERE clause for filtering in a database.
+
+    Fields read with a constant string key are translated into the column of
+    the same name, and calls of the condition, boolean and number functions,
+    and string.concat into the equivalent SQL expressions, with
+    constants passed as parameters. The conjuncts of a top level boolean.and
+    are translated one by one, those that cannot be translated being
+    returned as residuals, so that as much of the rule as possible is
+    filtered by the database.
+
+    The SQL follows SQLite, and expects columns without type affinity holding
+    numbers, strings and NULL for None. Rows for which evaluating the rule
+    would raise, such as comparing None or adding a string to a number, may
+    be selected differently, as SQL evaluates them to NULL instead.
+
+    Args:
+        rule: The compiled rule, or the root of a node tree
+
+    Returns:
+        The translated predicate
+
+    Examples:
+        >>> predicate = to_sql(compile('(condition.gt (basic.field "age") 18)'))
+        >>> predicate.where, predicate.parameters
+        ('("age" > ?)', (18,))
+    """
+    node = rule.node if isinstance(rule, Rule) else rule
+
+    fragments, residuals = [], []
+    for conjunct in _conjuncts(node):
+        try:
+            fragments.append(_condition(translate(conjunct)))
+        except Untranslatable as e:
+            residuals.append(Residual(conjunct, str(e), unparse(conjunct)))
+
+    where = " AND ".join(fragment.sql for fragment in fragments) or "1"
+
+    return Predicate(
+        where,
+        tuple(value for fragment in fragments for value in fragment.parameters),
+        tuple(residuals),
+        tuple(compile_closure(residual.node) for residual in residuals),
+    )
+
+
+def translate(node: Node) -> Fragment:
+    """Translate a subtree into an SQL expression.
+
+    Args:
+        node: The root of the subtree
+
+    Returns:
+        The translated expression
+
+    Raises:
+        Untranslatable: If any part of the subtree has no SQL equivalent
+    """
+    if isinstance(node, Constant):
+        return _parameter(node.value)
+    elif isinstance(node, Literal):
+        return _parameter(node.value)
+    elif isinstance(node, Call):
+        translator = TRANSLATORS.get(node.function)
+        if translator is None:
+            raise Untranslatable(f"{node.name} has no SQL equivalent")
+
+        return translator(node.arguments)
+
+    raise Untranslatable(f"{unparse(node)} is not a value")
+
+
+def _conjuncts(node: Node) -> list[Node]:
+    if isinstance(node, Call) and node.function is boolean.and_:
+        return [
+            conjunct for argument in node.arguments for conjunct in _conjuncts(argument)
+        ]
+
+    return [node]
+
+
+def _format(template: str, *fragments: Fragment, boolean: bool = False) -> Fragment:
+    # fill the template with the fragments, keeping the parameters in the
+    # order of their placeholders when a fragment is used more than once
+    sql, parameters = [], []
+
+    for text, index, _, _ in Formatter().parse(template):
+        sql.append(text)
+        if index is not None:
+            fragment = fragments[int(index)]
+            sql.append(fragment.sql)
+            parameters.extend(fragment.parameters)
+
+    return Fragment("".join(sql), tuple(parameters), boolean)
+
+
+def _parameter(value: Any) -> Fragment:
+    if value is None:
+        return Fragment("NULL")
+    elif type(value) in SCALARS:
+        return Fragment("?", (value,))
+
+    raise Untranslatable(f"{type(value).__name__} values have no SQL equivalent")
+
+
+def _condition(fragment: Fragment) -> Fragment:
+    # the truth of a value following Python, where None, 0 and "" are false,
+    # conditions being true, false or NULL when Python would raise
+    if fragment.boolean:
+        return fragment
+
+    return _format("(NULLIF(NULLIF({0}, 0), '') IS NOT NULL)", fragment, boolean=True)
+
+
+def _identifier(name: str) -> str:
+    return '"{}"'.format(name.replace('"', '""'))
+
+
+type Translator = Callable[[tuple[Node, ...]], Fragment]
+
+
+def _field(arguments: tuple[Node, ...]) -> Fragment:
+    # every row has every column, the default of a field is never used
+    if not 0 < len(arguments) <= 2:
+        raise Untranslatable("basic.field takes a key and an optional default")
+
+    key = arguments[0]
+    if not isinstance(key, (Literal, Constant)) or type(key.value) is not str:
+        raise Untranslatable("basic.field is only translated for string keys")
+
+    return Fragment(_identifier(key.value))
+
+
+def _value(arguments: tuple[Node, ...]) -> Fragment:
+    if len(arguments) != 1:
+        raise Untranslatable("basic.value takes a single value")
+
+    return translate(arguments[0])
+
+
+def _reduce(template: str, boolean: bool = False) -> Translator:
+    def translator(arguments: tuple[Node, ...]) -> Fragment:
+        if not arguments:
+            raise Untranslatable("reductions take at least one argument")
+
+        first, *rest = map(translate, arguments)
+
+        result = first
+        for incoming in rest:
+            result = _format(template, result, incoming, boolean=boolean)
+
+        return result
+
+    return translator
+
+
+def _unary(template: str, boolean: bool = False) -> Translator:
+    def translator(arguments: tuple[Node, ...]) -> Fragment:
+        if len(arguments) != 1:
+            raise Untranslatable("expected a single argument")
+
+        return _format(template, translate(arguments[0]), boolean=boolean)
+
+    return translator
+
+
+def _constant(sql: str) -> Translator:
+    def translator(arguments: tuple[Node, ...]) -> Fragment:
+        if arguments:
+            raise Untranslatable("expected no arguments")
+
+        return Fragment(sql, (), True)
+
+    return translator
+
+
+def _connective(operator: str, empty: str) -> Translator:
+    def translator(arguments: tuple[Node, ...]) -> Fragment:
+        if not arguments:
+            return Fragment(empty, (), True)
+
+        fragments = [_condition(translate(argument)) for argument in arguments]
+
+        return _format(
+            "(" + f" {operator} ".join(f"{{{i}}}" for i in range(len(fragments))) + ")",
+            *fragments,
+            boolean=True,
+        )
+
+    return translator
+
+
+def _not(arguments: tuple[Node, ...]) -> Fragment:
+    if len(arguments) != 1:
+        raise Untranslatable("boolean.not takes a single argument")
+
+    # NOT NULL is NULL, the negation of a value that is not true must be true
+    return _format(
+        "(NOT COALESCE({0}, 0))", _condition(translate(arguments[0])), boolean=True
+    )
+
+
+def _in(arguments: tuple[Node, ...]) -> Fragment:
+    if len(arguments) != 2:
+        raise Untranslatable("condition.in is only translated for two arguments")
+
+    value, collection = arguments
+
+    if isinstance(collection, Constant) and isinstance(collection.value, tuple):
+        items = collection.value
+    elif isinstance(collection, Sequence) and all(
+        isinstance(item, Literal) for item in collection.items
+    ):
+        items = tuple(item.value for item in collection.items)
+    else:
+        raise Untranslatable("condition.in is only translated for literal lists")
+
+    if not all(type(item) in SCALARS for item in items):
+        raise Untranslatable("condition.in is only translated for lists of scalars")
+
+    # x IN () is not valid in every database, and x IN (...) is NULL for a
+    # NULL x, where Python is False
+    if not items:
+        return Fragment("0", (), True)
+
+    return _format(
+        "COALESCE({0} IN ({1}), 0)",
+        translate(value),
+        Fragment(", ".join("?" * len(items)), items),
+        boolean=True,
+    )
+
+
+def _not_in(arguments: tuple[Node, ...]) -> Fragment:
+    return _format("(NOT {0})", _in(arguments), boolean=True)
+
+
+def _concat(arguments: tuple[Node, ...]) -> Fragment:
+    if not arguments:
+        raise Untranslatable("string.concat takes a separator")
+
+    link, *values = map(translate, arguments)
+
+    if not values:
+        return Fragment("''")
+
+    template = " || {0} || ".join(f"{{{i + 1}}}" for i in range(len(values)))
+
+    return _format(f"({template})", link, *values)
+
+
+TRANSLATORS: dict[Callable[..., Any], Translator] = {
+    basic.field: _field,
+    basic.value: _value,
+    boolean.and_: _connective("AND", "1"),
+    boolean.or_: _connective("OR", "0"),
+    boolean.not_: _not,
+    boolean.tautology: _constant("1"),
+    boolean.contradiction: _constant("0"),
+    condition.equal: _reduce("({0} IS {1})", True),
+    condition.gt: _reduce("({0} > {1})", True),
+    condition.ge: _reduce("({0} >= {1})", True),
+    condition.lt: _reduce("({0} < {1})", True),
+    condition.le: _reduce("({0} <= {1})", True),
+    condition.in_: _in,
+    condition.not_in: _not_in,
+    condition.is_none: _unary("({0} IS NULL)", True),
+    number.add: _reduce("({0} + {1})"),
+    number.subtract: _reduce("({0} - {1})"),
+    number.multiply: _reduce("({0} * {1})"),
+    number.divide: _reduce("({0} * 1.0 / {1})"),
+    # SQL truncates the remainder of integers and Python floors it, and
+    # SQLite rounds real operands to integers first
+    number.modulo: _reduce(
+        "(CASE WHEN typeof({0}) = 'integer' AND typeof({1}) = 'integer' "
+        "THEN ((({0} % {1}) + {1}) % {1}) "
+        "ELSE ({0} - {1} * floor({0} * 1.0 / {1})) END)"
+    ),
+    string.concat: _concat,
+    # string.lower is left out, SQLite's lower only folds ASCII letters
+}
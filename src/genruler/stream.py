@@ -0,0 +1,412 @@
+import csv
+import json
+import mmap
+import os
+import stat
+import time
+from collections import deque
+from collections.abc import Generator, Iterable, Iterator
+from itertools import compress, islice
+from typing import Any, BinaryIO, NamedTuple
+
+from .batch import CHUNK_SIZE
+from .compiler import Rule
+from .index import guard
+
+# Size of the buffer files are read and written through
+BUFFER_SIZE = 1 << 20
+
+type Source = str | os.PathLike[str] | BinaryIO
+
+
+class Record(NamedTuple):
+    """A record read from a file, with the line it was read from.
+
+    Attributes:
+        raw: The bytes of the record in the file, line ending included, which
+            writers copy through unchanged
+        value: The decoded record, the context rules are evaluated with
+        line: The number of the line the record starts on, from 1
+    """
+
+    raw: bytes
+    value: Any
+    line: int
+
+
+def read_jsonl(
+    source: Source,
+    buffer_size: int = BUFFER_SIZE,
+    use_mmap: bool = False,
+    prefilter: Rule | None = None,
+) -> Iterator[Record]:
+    """Read the records of a JSON Lines file, one line at a time.
+
+    Only the line being decoded is held in memory, besides the read buffer,
+    however large the file is. Blank lines are skipped.
+
+    Decoding takes most of the time of filtering a file. With a prefilter
+    rule leading with a guard on string values, see genruler.index.guard,
+    lines holding none of the values are skipped without being decoded, as
+    the rule is false for them. Lines missing the field of the guard, for
+    which the rule would raise, may be skipped too.
+
+    Args:
+        source: The path of the file, or a binary file object such as
+            sys.stdin.buffer
+        buffer_size: Size of the buffer the file is read through
+        use_mmap: Whether to map the file in memory rather than reading it
+            through a buffer, for paths and files with a file descriptor;
+            pipes and other files that cannot be mapped are read anyway
+        prefilter: The rule the records are filtered with afterwards
+
+    Yields:
+        The record of each line, its value decoded with json.loads
+
+    Raises:
+        json.JSONDecodeError: If a line is not valid JSON, noting the line
+    """
+    needles = _needles(prefilter) if prefilter is not None else None
+
+    for number, raw in enumerate(_lines(source, buffer_size, use_mmap), 1):
+        if (
+            needles is not None
+            and b"\\" not in raw
+            and not any(needle in raw for needle in needles)
+        ):
+            continue
+
+        if raw.isspace():
+            continue
+
+        try:
+            value = json.loads(raw)
+        except json.JSONDecodeError as e:
+            e.add_note(f"On line {number}")
+            raise
+
+        yield Record(raw, value, number)
+
+
+def read_csv(
+    source: Source,
+    fieldnames: list[str] | None = None,
+    encoding: str = "utf-8",
+    buffer_size: int = BUFFER_SIZE,
+    use_mmap: bool = False,
+    **fmtparams: Any,
+) -> Iterator[Record]:
+    """Read the rows of a CSV file as dictionaries, one row at a time.
+
+    Only the row being decoded is held in memory, besides the read buffer.
+    Quoted values may span lines, the raw bytes of a row then spanning them
+    too. Values are strings, as with csv.DictReader, and missing values are
+    None.
+
+    Args:
+        source: The path of the file, or a binary file object such as
+            sys.stdin.buffer
+        fieldnames: The keys of the values of each row, read from the first
+            row of the file when None, see read_header
+        encoding: The encoding of the file
+        buffer_size: Size of the buffer the file is read through
+        use_mmap: Whether to map the file in memory rather than reading it
+            through a buffer, for paths and files with a file descriptor;
+            pipes and other files that cannot be mapped are read anyway
+        **fmtparams: The dialect and formatting parameters of csv.reader
+
+    Yields:
+        The record of each row after the header, its value a dictionary of
+        the values keyed on their field names
+    """
+    rows = _rows(_lines(source, buffer_size, use_mmap), encoding, fmtparams)
+
+    if fieldnames is None:
+        header = next(rows, None)
+        if header is None:
+            return
+        fieldnames = header[1]
+
+    for raw, row, number in rows:
+        if not row:
+            continue
+
+        yield Record(raw, dict(zip(fieldnames, _pad(row, len(fieldnames)))), number)
+
+
+def read_header(
+    source: Source, encoding: str = "utf-8", **fmtparams: Any
+) -> Record | None:
+    """Return the header row of a CSV file.
+
+    A file object is left at the first row after the header, for read_csv
+    to read the rows from with the field names of the header.
+
+    Args:
+        source: The path of the file, or a binary file object
+        encoding: The encoding of the file
+        **fmtparams: The dialect and formatting parameters of csv.reader
+
+    Returns:
+        The record of the first row, its value the list of field names, or
+        None if the file is empty
+    """
+    rows = _rows(_lines(source, BUFFER_SIZE, False), encoding, fmtparams)
+
+    try:
+        header = next(rows, None)
+    finally:
+        rows.close()
+
+    return None if header is None else Record(*header)
+
+
+def write(
+    records: Iterable[Record],
+    destination: Source,
+    header: bytes = b"",
+    buffer_size: int = BUFFER_SIZE,
+) -> int:
+    """Write records to a file as they were read, without encoding them again.
+
+    Args:
+        records: The records to write, such as those kept by filter
+        destination: The path of the file, overwritten, or a binary file
+            object such as sys.stdout.buffer
+        header: Bytes written before the records, such as the raw header row
+            of a CSV file
+        buffer_size: Size of the buffer the file is written through
+
+    Returns:
+        The number of records written
+    """
+    if isinstance(destination, (str, os.PathLike)):
+        with open(destination, "wb", buffering=buffer_size) as file:
+            return write(records, file, header)
+
+    written = 0
+    destination.write(header)
+
+    for raw, _, _ in records:
+        destination.write(raw)
+        # the last line of a file may not end with one
+        if not raw.endswith(b"\n"):
+            destination.write(b"\n")
+        written += 1
+
+    return written
+
+
+def filter(
+    rule: Rule, items: Iterable[Any], chunk_size: int = CHUNK_SIZE
+) -> Iterator[Any]:
+    """Keep the items for which a rule is truthy.
+
+    The items are consumed a chunk at a time and evaluated together with
+    Rule.evaluate_many. Records are evaluated with their value, and other
+    items as they are.
+
+    Args:
+        rule: The rule to evaluate
+        items: The records or contexts to filter, consumed lazily
+        chunk_size: Number of items evaluated together
+
+    Yields:
+        The items for which the rule is truthy, in order
+    """
+    for chunk, results in _evaluate(rule, items, chunk_size):
+        yield from compress(chunk, results)
+
+
+def map(
+    rule: Rule, items: Iterable[Any], chunk_size: int = CHUNK_SIZE
+) -> Iterator[Any]:
+    """Evaluate a rule for each item.
+
+    Args:
+        rule: The rule to evaluate
+        items: The records or contexts to evaluate, consumed lazily
+        chunk_size: Number of items evaluated together
+
+    Yields:
+        The result of the rule for each item, in order
+    """
+    for _, results in _evaluate(rule, items, chunk_size):
+        yield from results
+
+
+def partition(
+    rule: Rule, items: Iterable[Any], chunk_size: int = CHUNK_SIZE
+) -> tuple[Iterator[Any], Iterator[Any]]:
+    """Split items on whether a rule is truthy for them.
+
+    Both iterators draw from the same items. The items one of them reaches
+    are held until the other yields them, so that memory stays bounded when
+    the two are consumed together, as by interleaved writes, but not when
+    one is exhausted before the other.
+
+    Args:
+        rule: The rule to evaluate
+        items: The records or contexts to split, consumed lazily
+        chunk_size: Number of items evaluated together
+
+    Returns:
+        The iterator of the items for which the rule is truthy, and the one
+        of the other items, each in order
+    """
+    chunks = _evaluate(rule, items, chunk_size)
+    queues: tuple[deque[Any], deque[Any]] = (deque(), deque())
+
+    def side(queue: deque[Any]) -> Iterator[Any]:
+        while True:
+            while not queue:
+                chunk, results = next(chunks, (None, None))
+                if chunk is None:
+                    return
+
+                for item, result in zip(chunk, results):
+                    queues[0 if result else 1].append(item)
+
+            yield queue.popleft()
+
+    return side(queues[0]), side(queues[1])
+
+
+class Throughput:
+    """Count the items passing through an iterator, and how fast they do.
+
+    The clock runs while measure is iterated, from the request for its first
+    item, so that the time to set up a pipeline is not counted. Iterables
+    measured one after the other add up.
+
+    Attributes:
+        count: Number of items passed through so far
+
+    Examples:
+        >>> throughput = Throughput()
+        >>> matches = filter(rule, throughput.measure(read_jsonl("events.jsonl")))
+        >>> write(matches, "matches.jsonl")
+        >>> throughput.rate
+        412093.5
+    """
+
+    count: int
+
+    def __init__(self) -> None:
+        self.count = 0
+        self._elapsed = 0.0
+        self._start: float | None = None
+
+    def measure(self, items: Iterable[Any]) -> Iterator[Any]:
+        """Count the items of an iterable as they are consumed.
+
+        Args:
+            items: The items to count
+
+        Yields:
+            The items, unchanged
+        """
+        self._start = time.perf_counter()
+
+        try:
+            for self.count, item in enumerate(items, self.count + 1):
+                yield item
+        finally:
+            self._elapsed += time.perf_counter() - self._start
+            self._start = None
+
+    @property
+    def elapsed(self) -> float:
+        """Seconds the items have been passing through for."""
+        if self._start is None:
+            return self._elapsed
+
+        return self._elapsed + time.perf_counter() - self._start
+
+    @property
+    def rate(self) -> float:
+        """Items passed through per second, 0.0 before any has."""
+        elapsed = self.elapsed
+
+        return self.count / elapsed if elapsed > 0 else 0.0
+
+    def __repr__(self) -> str:
+        return (
+            f"<{self.__class__.__name__} {self.count} items in "
+            f"{self.elapsed:.3f}s, {self.rate:.0f}/s>"
+        )
+
+
+def _evaluate(
+    rule: Rule, items: Iterable[Any], chunk_size: int
+) -> Iterator[tuple[list[Any], list[Any]]]:
+    iterator = iter(items)
+
+    while chunk := list(islice(iterator, chunk_size)):
+        contexts = [item.value if isinstance(item, Record) else item for item in chunk]
+
+        yield chunk, rule.evaluate_many(contexts, chunk_size=chunk_size)
+
+
+def _needles(rule: Rule) -> tuple[bytes, ...] | None:
+    # the bytes a line must hold for its guarded field to equal one of the
+    # values, unless it escapes characters, JSON Lines being UTF-8
+    rule_guard = guard(rule.node)
+
+    if rule_guard is None or not all(type(v) is str for v in rule_guard.values):
+        return None
+
+    return tuple(
+        json.dumps(value, ensure_ascii=False).encode() for value in rule_guard.values
+    )
+
+
+def _lines(source: Source, buffer_size: int, use_mmap: bool) -> Generator[bytes]:
+    if isinstance(source, (str, os.PathLike)):
+        with open(source, "rb", buffering=buffer_size) as file:
+            yield from _lines(file, buffer_size, use_mmap)
+        return
+
+    if use_mmap:
+        status = os.fstat(source.fileno())
+        # pipes, sockets and empty files cannot be mapped, read them instead
+        use_mmap = stat.S_ISREG(status.st_mode) and status.st_size > 0
+
+    if not use_mmap:
+        # yield from would close the file along with the generator
+        for line in source:
+            yield line
+        return
+
+    with mmap.mmap(source.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+        # from where the file was read up to, past a header for instance
+        mapped.seek(source.tell())
+        yield from iter(mapped.readline, b"")
+
+
+def _rows(
+    lines: Generator[bytes], encoding: str, fmtparams: dict[str, Any]
+) -> Iterator[tuple[bytes, list[str], int]]:
+    # the csv reader pulls the lines of a row one at a time, the raw bytes of
+    # a row being those pulled since the previous row
+    consumed: list[bytes] = []
+    position = [0]
+
+    def decoded() -> Iterator[str]:
+        for raw in lines:
+            consumed.append(raw)
+            position[0] += 1
+            yield raw.decode(encoding)
+
+    try:
+        for row in csv.reader(decoded(), **fmtparams):
+            raw = b"".join(consumed)
+            yield raw, row, position[0] - len(consumed) + 1
+            consumed.clear()
+    finally:
+        # close the file when the rows are closed early
+        lines.close()
+
+
+def _pad(row: list[str], length: int) -> list[str | None]:
+    return row + [None] * (length - len(row)) if len(row) < length else row
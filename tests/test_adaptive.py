@@ -0,0 +1,157 @@
+import json
+
+import pytest
+
+import genruler as ruler
+from genruler.adaptive import AdaptiveRule
+from genruler.library import compute
+
+from .test_compiler import CASES, outcome
+
+# The first operand is true for every context, the last one false for most
+SOURCE = (
+    "(boolean.and "
+    + " ".join(f'(condition.ge (basic.field "n{i}") 0)' for i in range(20))
+    + ' (condition.equal (basic.field "kind") "rare"))'
+)
+
+CONTEXTS = [
+    {**{f"n{i}": i for i in range(20)}, "kind": "rare" if i % 50 == 0 else "common"}
+    for i in range(1000)
+]
+
+
+class Env:
+    calls = 0
+
+    @classmethod
+    def count(cls, argument):
+        def inner(ctx):
+            cls.calls += 1
+            return compute(argument, ctx)
+
+        return inner
+
+
+@pytest.mark.parametrize("source,contexts", CASES)
+def test_adaptive_parity(source, contexts):
+    """Test adaptive rules compute what the rules compute, reordered or not."""
+    rule = ruler.compile(source, cache=None)
+    adaptive = rule.adaptive(sample_every=1, reorder_every=1)
+
+    for _ in range(3):
+        for context in contexts:
+            assert outcome(adaptive, context) == outcome(rule, context)
+
+
+def test_learns_decisive_operands_first():
+    """Test the most decisive operand moves first and is kept there."""
+    adaptive = ruler.compile(SOURCE).adaptive(sample_every=2, reorder_every=100)
+
+    assert adaptive.export() == {"": list(range(21))}
+    assert adaptive.evaluate_many(CONTEXTS) == [i % 50 == 0 for i in range(1000)]
+
+    order = adaptive.export()[""]
+    assert order[0] == 20
+    assert sorted(order) == list(range(21))
+
+    connective = adaptive.connectives[""]
+    statistics = connective.statistics()
+    assert [statistic.position for statistic in statistics] == order
+    assert statistics[0].source == '(condition.equal (basic.field "kind") "rare")'
+    assert statistics[0].decisive <= statistics[0].evaluated
+    assert all(statistic.cost >= 0 for statistic in statistics)
+
+
+def test_reorders_every_few_samples():
+    """Test operands are reordered once per reorder_every evaluations."""
+    adaptive = ruler.compile(SOURCE).adaptive(sample_every=4, reorder_every=10)
+    connective = adaptive.connectives[""]
+    reorders = []
+    connective.reorder = lambda: reorders.append(connective._count)
+
+    adaptive.evaluate_many(CONTEXTS[:40])
+
+    # sampled every 4 evaluations, reordered every 2 samples
+    assert reorders == [8, 16, 24, 32, 40]
+
+
+def test_frozen_order():
+    """Test an exported order is kept, and survives JSON, without adapting."""
+    order = json.loads(json.dumps({"": [20, *range(20)]}))
+    frozen = ruler.compile(SOURCE).adaptive(order, adapt=False, sample_every=1)
+
+    frozen.evaluate_many(CONTEXTS)
+    assert frozen.export() == order
+    assert all(s.evaluated == 0 for s in frozen.connectives[""].statistics())
+
+
+def test_invalid_order():
+    """Test orders that do not match the connectives of the rule are refused."""
+    rule = ruler.compile(SOURCE)
+
+    with pytest.raises(ValueError, match="No connective"):
+        rule.adaptive({"0": [0, 1]})
+    with pytest.raises(ValueError, match="not an order"):
+        rule.adaptive({"": [0, 1]})
+    with pytest.raises(ValueError, match="positive"):
+        rule.adaptive(sample_every=0)
+
+
+def test_nested_paths():
+    """Test nested connectives are keyed on the positions leading to them."""
+    adaptive = ruler.compile(
+        '(boolean.or (boolean.not (boolean.and (basic.field "a") (basic.field "b")))'
+        ' (boolean.and (basic.field "c") (basic.field "d")))'
+    ).adaptive()
+
+    assert adaptive.export() == {"": [0, 1], "0.0": [0, 1], "1": [0, 1]}
+
+
+def test_errors_follow_rule_order():
+    """Test an operand raising in a learned order raises only as the rule would."""
+    source = '(boolean.and (condition.equal (basic.field "a") 1) (basic.field "b"))'
+    adaptive = ruler.compile(source).adaptive({"": [1, 0]}, adapt=False)
+
+    # the rule stops at the first operand, never reading the missing "b"
+    assert adaptive({"a": 2}) is False
+    assert adaptive({"a": 1, "b": 1}) is True
+    with pytest.raises(KeyError):
+        adaptive({"a": 1})
+
+
+def test_learned_order_skips_errors():
+    """Test a learned order deciding before an operand raising returns a result."""
+    source = '(boolean.and (basic.field "b") (condition.equal (basic.field "a") 1))'
+    rule = ruler.compile(source)
+    adaptive = rule.adaptive({"": [1, 0]}, adapt=False)
+
+    with pytest.raises(KeyError):
+        rule({"a": 2})
+    assert adaptive({"a": 2}) is False
+
+    # reached, the operand raises as in the rule
+    with pytest.raises(KeyError):
+        adaptive({"a": 1})
+
+
+def test_env_operands_keep_their_order():
+    """Test connectives calling env functions are not reordered."""
+    adaptive = ruler.compile(
+        '(boolean.or (count (basic.field "a")) (basic.field "b"))', env=Env
+    ).adaptive(sample_every=1, reorder_every=1)
+
+    assert adaptive.connectives == {}
+
+    Env.calls = 0
+    assert adaptive.evaluate_many([{"a": 1, "b": 0}] * 10) == [True] * 10
+    assert Env.calls == 10
+
+
+def test_adaptive_leaves_rule_unchanged():
+    """Test the adaptive rule is compiled apart from the rule."""
+    rule = ruler.compile(SOURCE, cache=None)
+    function = rule.function
+
+    assert isinstance(rule.adaptive(), AdaptiveRule)
+    assert rule.function is function
@@ -0,0 +1,272 @@
+import asyncio
+
+import pytest
+
+import genruler as ruler
+from genruler.asynchronous import MAX_DEFERRALS, DataLoader, compile_async
+from genruler.library import compute
+
+from .test_compiler import CASES, outcome
+
+CALLS = []
+IN_FLIGHT = {"now": 0, "most": 0}
+
+
+async def _lookup(key):
+    IN_FLIGHT["now"] += 1
+    IN_FLIGHT["most"] = max(IN_FLIGHT["most"], IN_FLIGHT["now"])
+    await asyncio.sleep(0.01)
+    IN_FLIGHT["now"] -= 1
+    CALLS.append(key)
+
+    return key * 10
+
+
+class Env:
+    @staticmethod
+    def fetch(argument):
+        return lambda ctx: _lookup(compute(argument, ctx))
+
+    @staticmethod
+    def double(argument):
+        return lambda ctx: compute(argument, ctx) * 2
+
+    @staticmethod
+    def load(argument):
+        return lambda ctx: ctx["loader"].load(compute(argument, ctx))
+
+
+@pytest.fixture(autouse=True)
+def reset():
+    CALLS.clear()
+    IN_FLIGHT.update(now=0, most=0)
+
+
+async def _outcome(rule, context):
+    try:
+        return ("result", await rule.evaluate_async(context))
+    except Exception as e:
+        return ("error", type(e))
+
+
+@pytest.mark.parametrize("source,contexts", CASES)
+def test_evaluate_async_parity(source, contexts):
+    """Test rules without awaitables compute what they compute synchronously."""
+    rule = ruler.compile(source, cache=None)
+
+    for context in contexts:
+        assert asyncio.run(_outcome(rule, context)) == outcome(rule, context)
+
+
+def test_evaluate_async_awaits_env_functions():
+    """Test the awaitables returned by env functions are awaited."""
+    rule = ruler.compile(
+        '(number.add (fetch (basic.field "a")) (double (fetch 2)) 1)',
+        env=Env,
+        cache=None,
+    )
+
+    assert asyncio.run(rule.evaluate_async({"a": 1})) == 10 + 40 + 1
+    assert sorted(CALLS) == [1, 2]
+
+
+def test_evaluate_async_awaits_siblings_concurrently():
+    """Test independent arguments are awaited at the same time."""
+    rule = ruler.compile(
+        "(number.add (fetch 1) (fetch 2) (fetch 3) (fetch 4))", env=Env, cache=None
+    )
+
+    assert asyncio.run(rule.evaluate_async({})) == 100
+    assert IN_FLIGHT["most"] == 4
+
+
+@pytest.mark.parametrize(
+    "source,expected,calls",
+    [
+        ("(boolean.and (fetch 0) (fetch 1))", False, [0]),
+        ("(boolean.and (fetch 1) (fetch 0) (fetch 2))", False, [1, 0]),
+        ("(boolean.and (fetch 1) (fetch 2))", True, [1, 2]),
+        ("(boolean.or (fetch 1) (fetch 2))", True, [1]),
+        ("(boolean.or (fetch 0) (fetch 0) (fetch 3))", True, [0, 0, 3]),
+        ('(boolean.and (basic.field "off") (fetch 1))', False, []),
+        ("(basic.coalesce (fetch 0) (fetch 2) (fetch 3))", 20, [0, 2]),
+        ("(basic.coalesce (fetch 0) (fetch 0))", 0, [0, 0]),
+    ],
+)
+def test_evaluate_async_short_circuits(source, expected, calls):
+    """Test connectives stop awaiting once their result is known."""
+    rule = ruler.compile(source, env=Env, cache=None)
+
+    assert asyncio.run(rule.evaluate_async({"off": False})) == expected
+    assert CALLS == calls
+    assert IN_FLIGHT["most"] <= 1
+
+
+def test_evaluate_async_context():
+    """Test basic.context evaluates its argument in the awaited sub-context."""
+    rule = ruler.compile(
+        '(basic.context (basic.field "user") (fetch (basic.field "id")))',
+        env=Env,
+        cache=None,
+    )
+
+    assert asyncio.run(rule.evaluate_async({"user": {"id": 4}})) == 40
+
+
+def test_evaluate_async_raises():
+    """Test exceptions raised by awaitables propagate."""
+    rule = ruler.compile("(number.divide 1 (number.subtract (fetch 1) 10))", env=Env)
+
+    with pytest.raises(ZeroDivisionError):
+        asyncio.run(rule.evaluate_async({}))
+
+
+def test_compile_async_backends():
+    """Test rules of either backend share the node tree they are evaluated from."""
+    source = '(condition.gt (fetch (basic.field "a")) 15)'
+    closure = ruler.compile(source, env=Env, backend="closure", cache=None)
+    python = ruler.compile(source, env=Env, backend="python", cache=None)
+
+    assert asyncio.run(closure.evaluate_async({"a": 2})) is True
+    assert asyncio.run(python.evaluate_async({"a": 1})) is False
+    assert asyncio.run(compile_async(closure.node)({"a": 2})) is True
+
+
+class FakeBackend:
+    def __init__(self, fail=()):
+        self.batches = []
+        self.fail = set(fail)
+
+    async def __call__(self, keys):
+        self.batches.append(list(keys))
+        await asyncio.sleep(0)
+
+        if self.fail.intersection(keys):
+            raise LookupError(keys)
+
+        return [key * 10 for key in keys]
+
+
+async def _evaluate_all(rule, contexts):
+    return await asyncio.gather(*(rule.evaluate_async(c) for c in contexts))
+
+
+def test_dataloader_coalesces_evaluations():
+    """Test the loads of concurrent evaluations are looked up in one batch."""
+    backend = FakeBackend()
+    rule = ruler.compile(
+        '(condition.gt (load (basic.field "id")) 25)', env=Env, cache=None
+    )
+
+    async def main():
+        loader = DataLoader(backend)
+        contexts = [{"id": i, "loader": loader} for i in [1, 2, 3, 2, 4]]
+
+        return await _evaluate_all(rule, contexts)
+
+    assert asyncio.run(main()) == [False, False, True, False, True]
+    assert backend.batches == [[1, 2, 3, 4]]
+
+
+def test_dataloader_coalesces_within_a_rule():
+    """Test sibling loads of a single evaluation share a batch."""
+    backend = FakeBackend()
+    rule = ruler.compile("(number.add (load 1) (double (load 2)))", env=Env)
+
+    async def main():
+        return await rule.evaluate_async({"loader": DataLoader(backend)})
+
+    assert asyncio.run(main()) == 50
+    assert backend.batches == [[1, 2]]
+
+
+def test_dataloader_max_batch_size():
+    """Test batches are split to the maximum batch size."""
+    backend = FakeBackend()
+
+    async def main():
+        loader = DataLoader(backend, max_batch_size=2)
+        return await asyncio.gather(*(loader.load(key) for key in range(5)))
+
+    assert asyncio.run(main()) == [0, 10, 20, 30, 40]
+    assert backend.batches == [[0, 1], [2, 3], [4]]
+
+
+def test_dataloader_steady_load():
+    """Test keys loaded at every iteration of the loop are still looked up."""
+
+    async def main(loader, backend):
+        futures = []
+        for key in range(100):
+            futures.append(loader.load(key))
+            await asyncio.sleep(0)
+
+        return len(backend.batches), await asyncio.gather(*futures)
+
+    backend = FakeBackend()
+    sent, values = asyncio.run(main(DataLoader(backend, max_batch_size=10), backend))
+    assert sent >= 9
+    assert values == [key * 10 for key in range(100)]
+    assert all(len(batch) == 10 for batch in backend.batches)
+
+    backend = FakeBackend()
+    sent, values = asyncio.run(main(DataLoader(backend), backend))
+    assert sent >= 100 // (MAX_DEFERRALS + 1)
+    assert values == [key * 10 for key in range(100)]
+    assert max(map(len, backend.batches)) <= MAX_DEFERRALS + 1
+
+
+def test_dataloader_cache():
+    """Test keys are looked up once unless the cache is disabled or cleared."""
+
+    async def main(loader):
+        first = await loader.load(1)
+        second = await asyncio.gather(loader.load(1), loader.load(2))
+        loader.clear(1)
+        third = await loader.load(1)
+
+        return first, second, third
+
+    cached = FakeBackend()
+    assert asyncio.run(main(DataLoader(cached))) == (10, [10, 20], 10)
+    assert cached.batches == [[1], [2], [1]]
+
+    uncached = FakeBackend()
+    assert asyncio.run(main(DataLoader(uncached, cache=False))) == (10, [10, 20], 10)
+    assert uncached.batches == [[1], [1, 2], [1]]
+
+
+def test_dataloader_errors():
+    """Test a failed batch fails each of its loads, which can be retried."""
+    backend = FakeBackend(fail=[3])
+
+    async def main():
+        loader = DataLoader(backend)
+        results = await asyncio.gather(
+            loader.load(1), loader.load(3), return_exceptions=True
+        )
+        backend.fail.clear()
+
+        return results, await loader.load(3)
+
+    (first, second), retried = asyncio.run(main())
+
+    assert isinstance(first, LookupError) and isinstance(second, LookupError)
+    assert retried == 30
+    assert backend.batches == [[1, 3], [3]]
+
+
+def test_dataloader_invalid():
+    """Test batch functions must return a value per key."""
+
+    async def short(keys):
+        return keys[:-1]
+
+    async def main():
+        return await DataLoader(short).load(1)
+
+    with pytest.raises(ValueError, match="0 values for 1 keys"):
+        asyncio.run(main())
+
+    with pytest.raises(ValueError):
+        DataLoader(short, max_batch_size=0)
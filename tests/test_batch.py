@@ -0,0 +1,150 @@
+import itertools
+import types
+
+import pytest
+
+import genruler as ruler
+from genruler.batch import MAX_KERNEL_DEPTH, compile_kernel
+from genruler.lexer import read
+from genruler.library import compute
+from genruler.nodes import build
+
+from .test_compiler import CASES, outcome
+
+
+def outcomes(function, contexts):
+    try:
+        return ("result", function(contexts))
+    except Exception as e:
+        return ("error", type(e))
+
+
+@pytest.mark.parametrize("backend", ["closure", "python"])
+@pytest.mark.parametrize("source,contexts", CASES)
+def test_evaluate_many_parity(source, contexts, backend):
+    """Test evaluate_many computes what evaluating each context computes."""
+    rule = ruler.compile(source, backend=backend, cache=None)
+
+    expected = outcomes(lambda contexts: [rule(c) for c in contexts], contexts)
+
+    assert outcomes(rule.evaluate_many, contexts) == expected
+    assert outcomes(lambda c: list(rule.evaluate_many(c, lazy=True)), contexts) == (
+        expected
+    )
+    for context in contexts:
+        assert outcomes(rule.evaluate_many, [context]) == outcomes(
+            lambda contexts: [rule(c) for c in contexts], [context]
+        )
+
+
+@pytest.mark.parametrize("source,contexts", CASES)
+def test_kernel_parity(source, contexts):
+    """Test node kernels compute what the rule computes for each context."""
+    kernel = compile_kernel(build(read(source), None))
+    rule = ruler.parse(source)
+
+    for context in contexts:
+        if outcome(rule, context)[0] == "result":
+            assert kernel([context]) == [rule(context)], (source, context)
+
+
+def test_evaluate_many_short_circuits():
+    """Test arguments are only evaluated for contexts not short-circuited."""
+    rule = ruler.parse(
+        '(boolean.or (condition.is_none (basic.field "d")) '
+        '(condition.gt (number.divide 1 (basic.field "d")) 0.1))'
+    )
+    contexts = [{"d": None}, {"d": 2}, {"d": None}, {"d": 20}]
+
+    assert rule.evaluate_many(contexts) == [True, True, True, False]
+
+    rule = ruler.parse(
+        '(basic.coalesce (basic.field "a") (basic.field "b") (basic.field "c" "none"))'
+    )
+    contexts = [{"a": 1}, {"a": 0, "b": 2}, {"a": "", "b": 0}, {"a": "", "b": None}]
+
+    assert rule.evaluate_many(contexts) == [1, 2, "none", "none"]
+
+
+def test_evaluate_many_errors():
+    """Test a failing context raises what evaluating contexts in a loop raises."""
+    rule = ruler.parse('(number.divide 1 (basic.field "d"))')
+
+    assert rule.evaluate_many([{"d": 1}, {"d": 2}]) == [1.0, 0.5]
+
+    with pytest.raises(ZeroDivisionError):
+        rule.evaluate_many([{"d": 1}, {"d": 0}])
+
+    with pytest.raises(KeyError):
+        rule.evaluate_many([{"d": 1}, {}, {"d": 0}])
+
+    results = rule.evaluate_many([{"d": 1}, {"d": 0}], lazy=True, chunk_size=1)
+    assert next(results) == 1.0
+    with pytest.raises(ZeroDivisionError):
+        next(results)
+
+
+def test_evaluate_many_lazy():
+    """Test lazy evaluation consumes the contexts a chunk at a time."""
+    rule = ruler.parse('(number.multiply (basic.field "n") 2)')
+    contexts = ({"n": n} for n in itertools.count())
+
+    results = rule.evaluate_many(contexts, lazy=True, chunk_size=10)
+
+    assert isinstance(results, types.GeneratorType)
+    assert list(itertools.islice(results, 25)) == [n * 2 for n in range(25)]
+    assert next(contexts) == {"n": 30}
+
+    assert rule.evaluate_many([]) == []
+
+
+@pytest.mark.parametrize("chunk_size", [0, -1])
+def test_evaluate_many_chunk_size(chunk_size):
+    """Test chunk sizes that are not positive are refused, lazily or not."""
+    rule = ruler.parse('(basic.field "n")')
+
+    for lazy in [False, True]:
+        with pytest.raises(ValueError, match="positive"):
+            rule.evaluate_many([{"n": 1}], lazy=lazy, chunk_size=chunk_size)
+
+
+def test_evaluate_many_env_functions():
+    """Test env functions are evaluated context by context."""
+
+    class Env:
+        @staticmethod
+        def double(argument):
+            return lambda ctx: compute(argument, ctx) * 2
+
+    rule = ruler.parse('(condition.gt (double (basic.field "n")) 5)', env=Env)
+
+    assert rule.evaluate_many([{"n": 1}, {"n": 3}]) == [False, True]
+
+
+def test_evaluate_many_deep():
+    """Test rules nested deeper than the kernels evaluate through closures."""
+    depth = MAX_KERNEL_DEPTH * 3
+    source = "(boolean.not " * depth + '(basic.field "a")' + ")" * depth
+    rule = ruler.parse(source)
+
+    assert rule.evaluate_many([{"a": True}, {"a": False}]) == [
+        depth % 2 == 0,
+        depth % 2 == 1,
+    ]
+
+
+def test_evaluate_many_python_backend():
+    """Test the python backend evaluates batches with a generated loop."""
+    rule = ruler.compile(
+        '(boolean.or (condition.gt (string.lower (basic.field "a")) "m") '
+        '(condition.equal (string.lower (basic.field "a")) "b"))',
+        backend="python",
+        cache=None,
+    )
+
+    assert "def batch(contexts):" in rule.source
+    assert rule.evaluate_many([{"a": "Z"}, {"a": "B"}, {"a": "C"}]) == [
+        True,
+        True,
+        False,
+    ]
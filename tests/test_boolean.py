@@ -41,6 +41,31 @@ class BooleanTest(unittest.TestCase):
         result = rule(context)
         self.assertTrue(result)
 
+    def test_and_short_circuit(self):
+        calls = []
+
+        def operand(value):
+            def inner(context):
+                calls.append(value)
+                return value
+
+            return inner
+
+        rule = boolean.and_(operand(1), operand(0), operand(2))
+
+        self.assertIs(rule({}), False)
+        self.assertEqual(calls, [1, 0])
+
+        calls.clear()
+        rule = boolean.and_(operand("a"), operand([1]))
+
+        self.assertIs(rule({}), True)
+        self.assertEqual(calls, ["a", [1]])
+
+        # Truthiness rather than bitwise operators decides the result
+        self.assertIs(boolean.and_(1, 2)({}), True)
+        self.assertIs(boolean.and_()({}), True)
+
     def test_contradiction(self):
         context = {}
         rule = boolean.contradiction()
@@ -97,6 +122,30 @@ class BooleanTest(unittest.TestCase):
         result = rule(context)
         self.assertTrue(result)
 
+    def test_or_short_circuit(self):
+        calls = []
+
+        def operand(value):
+            def inner(context):
+                calls.append(value)
+                return value
+
+            return inner
+
+        rule = boolean.or_(operand(0), operand("yes"), operand(None))
+
+        self.assertIs(rule({}), True)
+        self.assertEqual(calls, [0, "yes"])
+
+        calls.clear()
+        rule = boolean.or_(operand(""), operand([]))
+
+        self.assertIs(rule({}), False)
+        self.assertEqual(calls, ["", []])
+
+        self.assertIs(boolean.or_(1, 2)({}), True)
+        self.assertIs(boolean.or_()({}), False)
+
     def test_tautology(self):
         context = {}
         rule = boolean.tautology()
@@ -0,0 +1,121 @@
+import pytest
+
+import genruler as ruler
+from genruler.cache import ParseCache, normalize
+
+
+def test_normalize():
+    """Test that formatting differences normalize to the same text."""
+    assert normalize("(number.add 1 2)") == "(number.add 1 2)"
+    assert normalize("  ( number.add\n\t1   2 )  ") == "(number.add 1 2)"
+    assert normalize('(basic.field "a  b")') == '(basic.field "a  b")'
+    assert normalize('(string.concat " " "a" "b")') == '(string.concat " " "a" "b")'
+
+
+def test_parse_uses_cache():
+    """Test that parse returns the cached rule for equivalent sources."""
+    cache = ParseCache(maxsize=4)
+
+    first = ruler.parse("(number.add 1 2)", cache=cache)
+    second = ruler.parse("( number.add  1\n2 )", cache=cache)
+
+    assert first is second
+    assert second({}) == 3
+    assert cache.info().hits == 1
+    assert cache.info().misses == 1
+
+
+def test_parse_without_cache():
+    """Test that passing cache=None always parses from scratch."""
+    first = ruler.parse("(number.add 1 2)", cache=None)
+    second = ruler.parse("(number.add 1 2)", cache=None)
+
+    assert first is not second
+
+
+def test_cache_keyed_on_env():
+    """Test that the same source parsed against different envs is cached separately."""
+
+    class First:
+        @staticmethod
+        def custom():
+            return lambda ctx: "first"
+
+    class Second:
+        @staticmethod
+        def custom():
+            return lambda ctx: "second"
+
+    cache = ParseCache()
+
+    assert ruler.parse("(custom)", env=First, cache=cache)({}) == "first"
+    assert ruler.parse("(custom)", env=Second, cache=cache)({}) == "second"
+    assert ruler.parse("(custom)", env=First, cache=cache)({}) == "first"
+    assert cache.info().misses == 2
+    assert cache.info().hits == 1
+
+
+def test_cache_eviction():
+    """Test least recently used entries are evicted once the cache is full."""
+    cache = ParseCache(maxsize=2)
+
+    a = ruler.parse("(number.add 1 1)", cache=cache)
+    ruler.parse("(number.add 2 2)", cache=cache)
+    assert ruler.parse("(number.add 1 1)", cache=cache) is a
+
+    ruler.parse("(number.add 3 3)", cache=cache)
+    info = cache.info()
+    assert info.evictions == 1
+    assert info.currsize == 2
+
+    # (number.add 1 1) was used most recently, so (number.add 2 2) was evicted
+    assert ruler.parse("(number.add 1 1)", cache=cache) is a
+    assert cache.info().misses == 3
+    ruler.parse("(number.add 2 2)", cache=cache)
+    assert cache.info().misses == 4
+
+
+def test_cache_invalidate_and_clear():
+    """Test explicit invalidation of single entries and of the whole cache."""
+    cache = ParseCache()
+
+    rule = ruler.parse("(number.add 1 2)", cache=cache)
+    assert cache.invalidate(" (number.add 1 2) ") is True
+    assert cache.invalidate("(number.add 1 2)") is False
+    assert ruler.parse("(number.add 1 2)", cache=cache) is not rule
+
+    cache.clear()
+    assert len(cache) == 0
+    assert cache.info() == (0, 0, 0, cache.maxsize, 0)
+
+
+def test_cache_resize():
+    """Test resizing evicts surplus entries and rejects negative sizes."""
+    cache = ParseCache(maxsize=3)
+    for i in range(3):
+        ruler.parse(f"(number.add {i} 1)", cache=cache)
+
+    cache.resize(1)
+    assert len(cache) == 1
+    assert cache.info().evictions == 2
+
+    cache.resize(0)
+    ruler.parse("(number.add 1 2)", cache=cache)
+    assert len(cache) == 0
+
+    with pytest.raises(ValueError):
+        cache.resize(-1)
+
+    with pytest.raises(ValueError):
+        ParseCache(maxsize=-1)
+
+
+def test_cache_skips_errors():
+    """Test that sources failing to parse are not cached."""
+    cache = ParseCache()
+
+    with pytest.raises(ValueError):
+        ruler.parse("(number.add 1 2", cache=cache)
+
+    assert len(cache) == 0
+    assert cache.info().misses == 1
@@ -0,0 +1,176 @@
+import io
+import json
+import subprocess
+import sys
+from types import SimpleNamespace
+
+import pytest
+
+from genruler.cli import load_env, main
+from genruler.library import compute
+
+RULE = '(condition.gt (basic.field "age") 18)'
+
+JSONL = b'{"age": 21, "name": "Ann"}\n{"age":12,"name":"Bob"}\n{"age": 40}\n'
+
+CSV = b"name,age\r\nAnn,21\r\nBob,12\r\nCid,40\r\n"
+
+
+class Env:
+    @staticmethod
+    def adult(argument):
+        return lambda ctx: compute(argument, ctx) >= 18
+
+
+@pytest.fixture
+def jsonl(tmp_path):
+    path = tmp_path / "records.jsonl"
+    path.write_bytes(JSONL)
+
+    return str(path)
+
+
+def run(capsysbinary, *argv):
+    status = main(list(argv))
+    out, err = capsysbinary.readouterr()
+
+    return status, out, err.decode()
+
+
+def test_matches(capsysbinary, jsonl):
+    """Test matching records are written as they were read."""
+    status, out, _ = run(capsysbinary, RULE, jsonl)
+
+    assert status == 0
+    assert out == b'{"age": 21, "name": "Ann"}\n{"age": 40}\n'
+
+
+def test_results_and_counts(capsysbinary, jsonl):
+    """Test the result of each record, or the counts, can be written instead."""
+    _, out, _ = run(capsysbinary, '(basic.field "name" "?")', jsonl, "-m", "results")
+    assert out.splitlines() == [b'"Ann"', b'"Bob"', b'"?"']
+
+    _, out, _ = run(capsysbinary, RULE, jsonl, "--mode", "counts")
+    assert json.loads(out) == {"records": 3, "matches": 2}
+
+
+def test_stdin(capsysbinary, monkeypatch):
+    """Test records are read from standard input by default."""
+    monkeypatch.setattr(sys, "stdin", SimpleNamespace(buffer=io.BytesIO(JSONL)))
+
+    _, out, _ = run(capsysbinary, RULE, "-m", "counts")
+    assert json.loads(out) == {"records": 3, "matches": 2}
+
+
+def test_csv(capsysbinary, tmp_path, monkeypatch):
+    """Test CSV input is detected from its extension, and its header kept."""
+    path = tmp_path / "records.csv"
+    path.write_bytes(CSV)
+    rule = '(condition.lt (basic.field "name") "C")'
+
+    _, out, _ = run(capsysbinary, rule, str(path))
+    assert out == b"name,age\r\nAnn,21\r\nBob,12\r\n"
+
+    _, out, _ = run(capsysbinary, rule, str(path), "--mmap", "-m", "counts")
+    assert json.loads(out) == {"records": 3, "matches": 2}
+
+    monkeypatch.setattr(sys, "stdin", SimpleNamespace(buffer=io.BytesIO(CSV)))
+    _, out, _ = run(capsysbinary, rule, "--format", "csv")
+    assert out == b"name,age\r\nAnn,21\r\nBob,12\r\n"
+
+
+def test_rule_file_and_env(capsysbinary, tmp_path, jsonl):
+    """Test rules are read from files, with custom functions from an env."""
+    rule_file = tmp_path / "rule.lisp"
+    rule_file.write_text('(adult (basic.field "age"))\n')
+
+    _, out, _ = run(
+        capsysbinary, "-f", str(rule_file), jsonl, "-e", "tests.test_cli:Env"
+    )
+    assert out.count(b"\n") == 2
+
+
+@pytest.mark.parametrize(
+    "argv",
+    [
+        [RULE, "-b", "python"],
+        [RULE, "--no-optimize", "--chunk-size", "1"],
+        [RULE, "--mmap"],
+        [RULE, "--prefilter"],
+    ],
+)
+def test_options(capsysbinary, jsonl, argv):
+    """Test evaluation options write the same matches."""
+    _, out, _ = run(capsysbinary, argv[0], jsonl, *argv[1:])
+
+    assert out == b'{"age": 21, "name": "Ann"}\n{"age": 40}\n'
+
+
+@pytest.mark.filterwarnings("ignore:This process .* is multi-threaded")
+def test_workers(capsysbinary, jsonl):
+    """Test records can be evaluated in worker processes."""
+    _, out, _ = run(capsysbinary, RULE, jsonl, "-w", "2", "--chunk-size", "1")
+
+    assert out == b'{"age": 21, "name": "Ann"}\n{"age": 40}\n'
+
+
+def test_bench(capsysbinary, jsonl):
+    """Test --bench reports timings instead of evaluating the input."""
+    status, out, _ = run(capsysbinary, RULE, jsonl, "--bench", "--repeat", "1")
+
+    report = out.decode()
+    assert status == 0
+    for label in ["parse", "compile", "records  3", "p50", "p99", "records/s"]:
+        assert label in report
+
+
+def test_errors(capsysbinary, jsonl, tmp_path):
+    """Test invalid rules are usage errors, and failed evaluations reported."""
+    with pytest.raises(SystemExit) as e:
+        main(['(condition.gt (basic.field "age")', jsonl])
+    assert e.value.code == 2
+    assert "Parse error" in capsysbinary.readouterr().err.decode()
+
+    with pytest.raises(SystemExit):
+        main([RULE, jsonl, "-e", "tests.test_cli:Missing"])
+
+    with pytest.raises(SystemExit):
+        main([])
+
+    with pytest.raises(SystemExit) as e:
+        main(["-f", str(tmp_path / "missing.rule"), jsonl])
+    assert e.value.code == 2
+    assert "cannot read" in capsysbinary.readouterr().err.decode()
+
+    with pytest.raises(SystemExit) as e:
+        main([RULE, jsonl, "--chunk-size", "0"])
+    assert e.value.code == 2
+    assert "not positive" in capsysbinary.readouterr().err.decode()
+
+    status, _, err = run(capsysbinary, '(basic.field "name")', jsonl, "-m", "results")
+    assert status == 1
+    assert "KeyError" in err
+
+    invalid = tmp_path / "invalid.jsonl"
+    invalid.write_bytes(b"{}\n{\n")
+    status, _, err = run(capsysbinary, RULE, str(invalid))
+    assert status == 1
+    assert "On line 2" in err
+
+
+def test_load_env():
+    """Test env references name modules or objects within them."""
+    assert load_env("tests.test_cli:Env") is Env
+    assert load_env("tests.test_cli:Env.adult") is Env.adult
+    assert load_env("json") is json
+
+
+def test_module_entry_point(jsonl):
+    """Test the interface runs with python -m genruler."""
+    completed = subprocess.run(
+        [sys.executable, "-m", "genruler", RULE, jsonl, "-m", "counts"],
+        capture_output=True,
+        check=True,
+    )
+
+    assert json.loads(completed.stdout) == {"records": 3, "matches": 2}
@@ -0,0 +1,171 @@
+import pytest
+
+np = pytest.importorskip("numpy")
+
+import genruler as ruler
+from genruler.columnar import Frame
+from genruler.library import compute
+
+COLUMNS = {
+    "age": np.array([12, 18, 30, 65, 90]),
+    "score": np.array([0.5, 1.5, np.nan, -2.0, 10.0]),
+    "country": np.array(["MY", "us", "FR", "", "Ca"]),
+    "verified": np.array([True, False, True, True, False]),
+    "count": np.array([0, 3, -4, 7, 1]),
+    "optional": np.array([None, 1, "a", None, 0.5], dtype=object),
+    "order": np.array(
+        [{"total": 10}, {"total": 200}, {"total": 0}, {}, {"total": 5}], dtype=object
+    ),
+}
+
+SOURCES = [
+    '(condition.gt (basic.field "age") 18)',
+    '(condition.equal (basic.field "country") "MY")',
+    '(condition.le (basic.field "age") (number.multiply (basic.field "count") 10))',
+    '(condition.equal (condition.gt (basic.field "age") 18) (basic.field "verified"))',
+    '(boolean.and (condition.ge (basic.field "age") 18) (basic.field "verified"))',
+    '(boolean.or (condition.lt (basic.field "score") 1) (basic.field "country"))',
+    "(boolean.or (boolean.contradiction) (boolean.tautology))",
+    '(boolean.and (boolean.contradiction) (condition.gt (basic.field "age") "a"))',
+    '(boolean.not (basic.field "count"))',
+    '(boolean.not (basic.field "country"))',
+    '(number.add (basic.field "age") (basic.field "count") 1)',
+    '(number.subtract (basic.field "age") (basic.field "score"))',
+    '(number.add (basic.field "verified") (basic.field "verified"))',
+    '(number.divide (basic.field "age") 4)',
+    '(number.divide (basic.field "age") (basic.field "count"))',
+    '(number.modulo (basic.field "count") 3)',
+    '(number.modulo (basic.field "age") (basic.field "count"))',
+    '(number.modulo "x" (basic.field "age"))',
+    '(number.modulo "%s!" (basic.field "country"))',
+    '(number.modulo (basic.field "country") 2)',
+    '(number.modulo (basic.field "verified") 2)',
+    '(number.add (basic.field "country") "!")',
+    '(number.add (basic.field "age") "!")',
+    '(condition.in (string.lower (basic.field "country")) ("my" "us" "ca"))',
+    '(condition.in (basic.field "age") (18 "18" 65))',
+    '(condition.in (basic.field "country") (basic.value ("MY" 1)))',
+    '(condition.not_in (basic.field "country") ("MY" "FR" 1))',
+    '(condition.not_in (basic.field "age") (12 90))',
+    '(condition.in_range (basic.field "age") (60 100) (10 20))',
+    '(condition.in_range (basic.field "score") (0 1) (5.5 10))',
+    '(condition.in_range (basic.field "country") ("A" "Z"))',
+    '(condition.in_range (basic.field "country") (1 2))',
+    '(condition.in_range (basic.field "optional") (0 1))',
+    '(condition.is_none (basic.field "optional"))',
+    '(condition.is_none (basic.field "age"))',
+    '(condition.is_true (basic.field "verified"))',
+    '(condition.is_true (basic.field "count"))',
+    '(string.lower (basic.field "country"))',
+    '(basic.field "missing" 0)',
+    '(basic.field "missing")',
+    "(basic.value 42)",
+    '(basic.coalesce (basic.field "optional") (basic.field "age"))',
+    '(basic.context (basic.field "order") (basic.field "total" -1))',
+    '(list.length (basic.field "country"))',
+    '(string.concat "-" (basic.field "country") "x")',
+]
+
+
+def rows(columns):
+    names = list(columns)
+    return [dict(zip(names, row)) for row in zip(*(columns[n].tolist() for n in names))]
+
+
+def outcome(function):
+    try:
+        return ("result", function())
+    except Exception as e:
+        return ("error", type(e))
+
+
+@pytest.mark.parametrize("source", SOURCES)
+def test_columnar_parity(source):
+    """Test evaluating columns computes what evaluating each row computes."""
+    rule = ruler.parse(source)
+
+    expected = outcome(lambda: [rule(row) for row in rows(COLUMNS)])
+    result = outcome(lambda: rule.evaluate_columns(COLUMNS).tolist())
+
+    if expected[0] == "result" and result[0] == "result":
+        # nan compares unequal to itself
+        assert [repr(value) for value in result[1]] == [
+            repr(value) for value in expected[1]
+        ], source
+    else:
+        assert result == expected, source
+
+
+def test_columnar_masks():
+    """Test conditions evaluate to boolean masks over the columns."""
+    rule = ruler.parse(
+        '(boolean.and (condition.ge (basic.field "age") 18) (basic.field "verified"))'
+    )
+    mask = rule.evaluate_columns(COLUMNS)
+
+    assert mask.dtype == bool
+    assert mask.tolist() == [False, False, True, True, False]
+
+    values = ruler.parse('(number.add (basic.field "age") 1)').evaluate_columns(COLUMNS)
+
+    assert values.dtype.kind == "i"
+    assert values.tolist() == [13, 19, 31, 66, 91]
+
+
+def test_columnar_integer_overflow():
+    """Test integers overflowing int64 are computed row by row, as python does."""
+    columns = {"x": np.array([2**62, -(2**62), 1, 2**61, -1])}
+
+    for source in [
+        '(condition.gt (number.multiply (basic.field "x") 4) 0)',
+        '(number.add (basic.field "x") (basic.field "x") (basic.field "x"))',
+        '(number.subtract 0 (basic.field "x") (basic.field "x"))',
+    ]:
+        rule = ruler.parse(source)
+        expected = [rule(row) for row in rows(columns)]
+
+        assert rule.evaluate_columns(columns).tolist() == expected, source
+
+
+def test_columnar_constant_results():
+    """Test results shared by every row are broadcast to the number of rows."""
+    rule = ruler.parse("(boolean.tautology)")
+
+    assert rule.evaluate_columns(COLUMNS).tolist() == [True] * 5
+    assert rule.evaluate_columns({}, length=3).tolist() == [True] * 3
+
+    column = ruler.parse('(basic.field "age")').evaluate_columns(COLUMNS)
+    column[0] = 0
+    assert COLUMNS["age"][0] == 12
+
+
+def test_columnar_env_functions():
+    """Test env functions are evaluated row by row."""
+
+    class Env:
+        @staticmethod
+        def double(argument):
+            return lambda ctx: compute(argument, ctx) * 2
+
+    rule = ruler.parse('(condition.gt (double (basic.field "age")) 50)', env=Env)
+
+    assert rule.evaluate_columns(COLUMNS).tolist() == [False, False, True, True, True]
+
+
+def test_columnar_sequences():
+    """Test plain sequences are accepted as columns."""
+    rule = ruler.parse('(condition.equal (basic.field "name") "a")')
+
+    assert rule.evaluate_columns({"name": ["a", "b"]}).tolist() == [True, False]
+
+
+def test_frame_errors():
+    """Test columns of different lengths are rejected."""
+    with pytest.raises(ValueError):
+        Frame({"a": np.array([1, 2]), "b": np.array([1])})
+
+    with pytest.raises(ValueError):
+        Frame({})
+
+    with pytest.raises(ValueError):
+        Frame({"a": np.array([[1, 2]])})
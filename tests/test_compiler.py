@@ -0,0 +1,397 @@
+import warnings
+
+import pytest
+
+import genruler as ruler
+from genruler.compiler import MAX_INLINE_ARGUMENTS, MAX_INLINE_DEPTH, Rule
+from genruler.exceptions import InvalidFunctionNameError, NonCallableResultError
+from genruler.library import compute, pure
+
+CASES = [
+    (
+        '(condition.equal (basic.field "name") "John")',
+        [{"name": "John"}, {"name": "Jane"}, {}],
+    ),
+    ('(basic.coalesce "" "value" "other")', [{}]),
+    (
+        '(basic.coalesce (basic.field "a") (basic.field "b") "default")',
+        [{"b": "value", "a": None}, {"a": 0, "b": ""}, {"a": 1}],
+    ),
+    (
+        '(basic.context (basic.field "user") (basic.field "name"))',
+        [{"user": {"name": "John"}}, {"user": {}}],
+    ),
+    (
+        '(basic.context (basic.field "data") (basic.context (basic.field "user") (basic.field "email")))',
+        [{"data": {"user": {"email": "john@example.com"}}}],
+    ),
+    ('(basic.field "age" 0)', [{}, {"age": 3}, [1, 2]]),
+    ("(basic.field 0)", [["first", "second"], {0: "zero"}, []]),
+    (
+        '(basic.field (basic.field "key"))',
+        [{"key": "key"}, {"key": "other", "other": 1}],
+    ),
+    ("(basic.value 42)", [{}]),
+    ('(basic.value ("a" "b" "c"))', [{}]),
+    ("(basic.value 1.5)", [{}]),
+    ("(number.add 1 2 3)", [{}]),
+    (
+        '(number.add (basic.field "price") (basic.field "tax"))',
+        [
+            {"price": 100, "tax": 20},
+            {"price": "a", "tax": "b"},
+            {"price": 1, "tax": "b"},
+        ],
+    ),
+    ("(number.subtract 10 3 2)", [{}]),
+    ("(number.multiply 2 3 4)", [{}]),
+    ('(number.divide 10 (basic.field "d"))', [{"d": 2}, {"d": 0}]),
+    ('(number.modulo (basic.field "n") 3)', [{"n": 7}, {"n": -7}]),
+    ("(number.add 5)", [{}]),
+    (
+        '(boolean.and (condition.gt (basic.field "age") 18) (condition.equal (basic.field "verified") (boolean.tautology)))',
+        [{"age": 21, "verified": True}, {"age": 12}, {"age": 30, "verified": False}],
+    ),
+    (
+        '(boolean.and (basic.field "a") (basic.field "b"))',
+        [{"a": 1, "b": "x"}, {"a": 0}, {"a": [], "b": 1}],
+    ),
+    (
+        '(boolean.or (condition.equal (basic.field "role") "admin") (condition.equal (basic.field "role") "moderator"))',
+        [{"role": "admin"}, {"role": "moderator"}, {"role": "user"}],
+    ),
+    (
+        '(boolean.or (basic.field "a") (basic.field "b"))',
+        [{"a": 1}, {"a": 0, "b": 0}, {"a": None}],
+    ),
+    ("(boolean.and)", [{}]),
+    ("(boolean.or)", [{}]),
+    ('(boolean.not (basic.field "disabled"))', [{"disabled": False}, {"disabled": 1}]),
+    ("(boolean.not (boolean.tautology))", [{}]),
+    ("(boolean.or (boolean.contradiction) (boolean.tautology))", [{}]),
+    (
+        '(condition.in (basic.value "apple") (basic.value ("apple" "banana" "orange")))',
+        [{}],
+    ),
+    (
+        '(condition.in (basic.field "fruit") (basic.field "allowed"))',
+        [
+            {"fruit": "apple", "allowed": ["apple", "banana"]},
+            {"fruit": "kiwi", "allowed": []},
+            {},
+        ],
+    ),
+    (
+        '(condition.in (basic.field "country") ("US" "CA" "MX"))',
+        [{"country": "US"}, {"country": "FR"}],
+    ),
+    (
+        '(condition.in (basic.field "v") (1 "a" 2.5))',
+        [{"v": 1}, {"v": 1.0}, {"v": True}, {"v": "1"}, {"v": [1]}, {"v": None}],
+    ),
+    (
+        '(condition.not_in (basic.field "country") ("US" "CA"))',
+        [{"country": "US"}, {"country": "FR"}, {"country": ["US"]}, {}],
+    ),
+    (
+        '(condition.not_in (basic.field "fruit") (basic.field "allowed"))',
+        [{"fruit": "apple", "allowed": ["apple"]}, {"fruit": "kiwi", "allowed": []}],
+    ),
+    (
+        '(condition.in_range (basic.field "age") (65 120) (0 17) (10 20))',
+        [{"age": a} for a in (-1, 0, 15, 20, 21, 64, 65, 120.0, 121, True)]
+        + [{"age": "a"}, {"age": None}],
+    ),
+    (
+        '(condition.in_range (basic.field "name") ("a" "c") ("x" "z"))',
+        [{"name": "b"}, {"name": "d"}, {"name": "z"}, {"name": 1}],
+    ),
+    (
+        '(condition.in_range (basic.field "v") (1 "z"))',
+        [{"v": 1}, {"v": "a"}],
+    ),
+    (
+        '(condition.in_range (basic.field "v") (basic.value (0 10)) (basic.field "r"))',
+        [{"v": 5, "r": [20, 30]}, {"v": 25, "r": (20, 30)}, {"v": 15, "r": (20, 30)}],
+    ),
+    ('(condition.in_range (basic.field "v"))', [{"v": 1}]),
+    (
+        '(condition.is_none (basic.field "optional"))',
+        [{"optional": None}, {"optional": 0}],
+    ),
+    ('(condition.is_true (basic.field "count"))', [{"count": 1}, {"count": True}]),
+    (
+        '(condition.gt (basic.field "score") (basic.field "threshold"))',
+        [{"score": 85, "threshold": 70}, {"score": 1, "threshold": "a"}],
+    ),
+    ('(condition.ge (basic.field "a") 18)', [{"a": 18}, {"a": 17}]),
+    ('(condition.lt (basic.field "a") 18)', [{"a": 18}, {"a": 17}]),
+    ('(condition.le (basic.field "a") 18)', [{"a": 18}, {"a": 19}]),
+    ("(condition.equal 2 2 2)", [{}]),
+    ('(string.concat "," "a" "b" "c")', [{}]),
+    (
+        '(string.concat " " (basic.field "first") (basic.field "last"))',
+        [{"first": "John", "last": "Doe"}, {"first": 1, "last": "x"}],
+    ),
+    ('(string.concat ",")', [{}]),
+    ('(string.concat_fields " - " "city" "state")', [{"city": "SF", "state": "CA"}]),
+    ('(string.field "age")', [{"age": 25}, {}]),
+    ('(string.field "missing" "N/A")', [{}, {"missing": 1}]),
+    ('(string.lower "HELLO")', [{}]),
+    ('(string.lower (basic.field "name"))', [{"name": "JOHN"}, {"name": 1}]),
+    ('(list.length (basic.value ("a" "b" "c")))', [{}]),
+    ('(list.length (basic.field "items"))', [{"items": [1, 2, 3, 4]}, {"items": None}]),
+    (
+        '(boolean.or (condition.gt (basic.context (basic.field "order") (basic.field "total")) 100) '
+        '(boolean.and (basic.field "vip") (condition.gt (basic.context (basic.field "order") (basic.field "total")) 10)))',
+        [
+            {"order": {"total": 200}},
+            {"order": {"total": 50}, "vip": True},
+            {"order": {"total": 50}, "vip": False},
+            {"order": {}},
+        ],
+    ),
+    (
+        '(basic.context (basic.field "user") (string.concat " " (string.lower (basic.field "name")) '
+        '(string.lower (basic.field "name"))))',
+        [{"user": {"name": "JOHN"}}, {"user": {"name": 1}}],
+    ),
+]
+
+
+def outcome(rule, context):
+    try:
+        return ("result", rule(context))
+    except Exception as e:
+        return ("error", type(e))
+
+
+@pytest.mark.parametrize("source,contexts", CASES)
+def test_python_backend_parity(source, contexts):
+    """Test the python backend computes what the closure interpreter computes."""
+    closure = ruler.compile(source, backend="closure", cache=None)
+    python = ruler.compile(source, backend="python", cache=None)
+
+    assert python.backend == "python"
+    assert python.source.startswith("def rule(")
+
+    for context in contexts:
+        expected = outcome(closure, context)
+        result = outcome(python, context)
+
+        assert result == expected, (source, context)
+        if expected[0] == "result":
+            assert type(result[1]) is type(expected[1]), (source, context)
+
+
+def test_python_backend_inlines():
+    """Test built-in functions and constants are inlined into the generated code."""
+    rule = ruler.compile(
+        '(boolean.and (condition.gt (basic.field "age") 18) '
+        '(condition.equal (string.lower (basic.field "name")) "john"))',
+        backend="python",
+        cache=None,
+    )
+
+    assert "c0['age'] > 18" in rule.source
+    assert "'john'" in rule.source
+    assert rule({"age": 20, "name": "JOHN"}) is True
+
+
+def test_python_backend_env_functions():
+    """Test env functions are called through their closures."""
+
+    class Env:
+        @staticmethod
+        def double(argument):
+            return lambda ctx: compute(argument, ctx) * 2
+
+    rule = ruler.compile(
+        '(condition.equal (double (basic.field "n")) 4)',
+        env=Env,
+        backend="python",
+        cache=None,
+    )
+
+    assert rule({"n": 2}) is True
+    assert rule({"n": 3}) is False
+
+
+def test_python_backend_wide_and_deep():
+    """Test rules too wide or deep to inline fall back to closures."""
+    terms = " ".join(f'(condition.equal (basic.field "id") {i})' for i in range(3000))
+    rule = ruler.compile(f"(boolean.or {terms})", backend="python", cache=None)
+    assert rule({"id": 2999}) is True
+    assert rule({"id": 3000}) is False
+
+    count = MAX_INLINE_ARGUMENTS * 4
+    rule = ruler.compile(
+        f"(number.add {' '.join(['1'] * count)})", backend="python", cache=None
+    )
+    assert rule({}) == count
+
+    depth = MAX_INLINE_DEPTH + 32
+    source = "(boolean.not " * depth + '(basic.field "a")' + ")" * depth
+    rule = ruler.compile(source, backend="python", cache=None)
+    assert rule({"a": True}) is (depth % 2 == 0)
+
+
+def test_python_backend_nested_parentheses():
+    """Test nested wide reductions stay within the parser's parentheses limit."""
+    source = '(basic.field "x")'
+    for _ in range(10):
+        source = f"(number.add {source} {' '.join(['(basic.field \"x\")'] * 20)})"
+
+    rule = ruler.compile(source, backend="python", cache=None)
+    closure = ruler.compile(source, cache=None)
+    assert rule({"x": 1}) == closure({"x": 1}) == 201
+
+
+def test_python_backend_identity_of_constants():
+    """Test identity tests of constants compile without a SyntaxWarning."""
+    for source in [
+        "(condition.is_none 1)",
+        '(condition.is_true "a")',
+        "(condition.is_true (basic.value 1))",
+        "(condition.is_none (basic.value 1.5))",
+        "(condition.is_true (number.add 1 2))",
+        "(condition.is_none (basic.coalesce 2.5))",
+    ]:
+        with warnings.catch_warnings():
+            warnings.simplefilter("error")
+            rule = ruler.compile(source, backend="python", cache=None, optimize=False)
+
+        assert rule({}) is ruler.compile(source, cache=None)({})
+
+
+def test_python_backend_computed_keys():
+    """Test computed field keys are computed once, not copied per branch."""
+    source = '"a"'
+    for _ in range(18):
+        source = f'(basic.field {source} "b")'
+
+    rule = ruler.compile(source, backend="python", cache=None)
+    closure = ruler.compile(source, cache=None)
+
+    assert len(rule.source) < 10_000
+    for context in [{"a": "a"}, {}, {"a": "c"}, {"a": "b", "b": "a"}]:
+        assert outcome(rule, context) == outcome(closure, context)
+
+
+def test_compile_errors():
+    """Test compile raises the same errors as parse."""
+    with pytest.raises(ValueError, match="Unknown backend"):
+        ruler.compile("(boolean.tautology)", backend="nonexistent")
+
+    with pytest.raises(NonCallableResultError):
+        ruler.compile("(1 2 3)", backend="python")
+
+    with pytest.raises(InvalidFunctionNameError):
+        ruler.compile('(invalid_fn "value")', backend="python")
+
+    with pytest.raises(ValueError, match="basic.value cannot accept sub-rules"):
+        ruler.compile('(basic.value (basic.field "status"))', backend="python")
+
+
+def test_compile_cached_per_backend():
+    """Test the same source compiled with different backends is cached separately."""
+    closure = ruler.compile("(number.add 1 2)")
+    python = ruler.compile("(number.add 1 2)", backend="python")
+
+    assert isinstance(closure, Rule)
+    assert closure is ruler.parse("(number.add 1 2)")
+    assert python is ruler.compile("(number.add 1 2)", backend="python")
+    assert python is not closure
+    assert repr(python) == "<Rule backend='python'>"
+
+
+def test_python_backend_shares_repeated_subexpressions():
+    """Test repeated subexpressions are computed once per evaluation."""
+    calls = []
+
+    class Env:
+        @staticmethod
+        @pure
+        def total(argument):
+            def inner(context):
+                calls.append(context)
+                return compute(argument, context)
+
+            return inner
+
+    source = (
+        '(boolean.and (condition.gt (total (basic.field "n")) 1) '
+        '(condition.lt (total (basic.field "n")) 10))'
+    )
+
+    rule = ruler.compile(source, env=Env, backend="python", cache=None)
+    assert rule.deduplicated == 1
+    assert rule({"n": 5}) is True
+    assert len(calls) == 1
+
+    # the second use computes the value when the first one is not evaluated
+    calls.clear()
+    rule = ruler.compile(
+        f'(boolean.or (basic.field "skip") {source} (total (basic.field "n")))',
+        env=Env,
+        backend="python",
+        cache=None,
+    )
+    assert rule.deduplicated == 2
+    assert rule({"n": 5, "skip": True}) is True
+    assert calls == []
+    assert rule({"n": 20, "skip": False}) is True
+    assert len(calls) == 1
+
+    calls.clear()
+    rule = ruler.compile(source, env=Env, backend="python", cache=None, optimize=False)
+    assert rule.deduplicated == 0
+    assert rule({"n": 5}) is True
+    assert len(calls) == 2
+
+
+def test_python_backend_shares_per_context():
+    """Test subexpressions are only shared when computed against the same context."""
+    rule = ruler.compile(
+        '(number.add (list.length (basic.field "items")) '
+        '(basic.context (basic.field "inner") (list.length (basic.field "items"))))',
+        backend="python",
+        cache=None,
+    )
+
+    assert rule.deduplicated == 0
+    assert rule({"items": [1], "inner": {"items": [1, 2]}}) == 3
+
+
+def test_python_backend_does_not_share_impure_functions():
+    """Test calls of functions not declared pure are never shared."""
+    counter = iter(range(10))
+
+    class Env:
+        @staticmethod
+        def tick():
+            return lambda context: next(counter)
+
+    rule = ruler.compile(
+        "(number.add (tick) (tick))", env=Env, backend="python", cache=None
+    )
+
+    assert rule.deduplicated == 0
+    assert rule({}) == 1
+    assert ruler.compile("(number.add 1 2)", cache=None).deduplicated == 0
+
+
+def test_python_backend_hashes_literal_collections():
+    """Test literal collections are tested for membership without a scan."""
+    rule = ruler.compile(
+        '(boolean.and (condition.in (basic.field "a") ("x" "y")) '
+        '(condition.not_in (basic.field "b") (1 2)) '
+        '(condition.in_range (basic.field "c") (0 10)))',
+        backend="python",
+        cache=None,
+    )
+
+    assert "_contains" not in rule.source
+    assert rule.source.splitlines()[1].count(" in _v") == 3
+    assert rule({"a": "x", "b": 3, "c": 10}) is True
+    assert rule({"a": "x", "b": 2, "c": 10}) is False
@@ -70,3 +70,49 @@ class ConditionTest(unittest.TestCase):
 
         result = rule(context)
         self.assertFalse(result)
+
+    def test_in_literal(self):
+        rule = condition.in_(basic.field("foo"), ("lorem", 1, None))
+
+        self.assertTrue(rule({"foo": "lorem"}))
+        self.assertTrue(rule({"foo": 1.0}))
+        self.assertTrue(rule({"foo": None}))
+        self.assertFalse(rule({"foo": "ipsum"}))
+        self.assertFalse(rule({"foo": ["lorem"]}))
+
+        rule = condition.in_(basic.field("foo"), basic.value(("lorem", "ipsum")))
+
+        self.assertTrue(rule({"foo": "ipsum"}))
+
+    def test_not_in(self):
+        rule = condition.not_in(basic.field("foo"), ("lorem", "ipsum"))
+
+        self.assertFalse(rule({"foo": "lorem"}))
+        self.assertTrue(rule({"foo": "dolor"}))
+        self.assertTrue(rule({"foo": {"lorem"}}))
+
+        rule = condition.not_in(basic.field("foo"), basic.field("bar"))
+
+        self.assertFalse(rule({"foo": "a", "bar": ["a", "b"]}))
+        self.assertTrue(rule({"foo": "c", "bar": ["a", "b"]}))
+
+    def test_in_range(self):
+        rule = condition.in_range(basic.field("foo"), (10, 20), (0, 5), (15, 30))
+
+        self.assertTrue(rule({"foo": 0}))
+        self.assertTrue(rule({"foo": 5}))
+        self.assertFalse(rule({"foo": 7}))
+        self.assertTrue(rule({"foo": 25.5}))
+        self.assertTrue(rule({"foo": 30}))
+        self.assertFalse(rule({"foo": 31}))
+        self.assertFalse(rule({"foo": -1}))
+
+        with self.assertRaises(TypeError):
+            rule({"foo": "a"})
+
+        rule = condition.in_range(basic.field("foo"), (5, 1))
+
+        self.assertFalse(rule({"foo": 3}))
+
+        with self.assertRaises(ValueError):
+            condition.in_range(basic.field("foo"), (1, 2, 3))
@@ -0,0 +1,163 @@
+import pytest
+
+import genruler as ruler
+from genruler import RuleIndex
+from genruler.index import Guard, guard
+from genruler.lexer import read
+from genruler.nodes import build
+
+RULES = {
+    "click": '(condition.equal (basic.field "type") "click")',
+    "click_adult": (
+        '(boolean.and (condition.equal (basic.field "type") "click") '
+        '(condition.ge (basic.field "age") 18))'
+    ),
+    "view_nested": (
+        '(boolean.and (boolean.and (condition.equal "view" (basic.field "type")) '
+        '(basic.field "verified")) (condition.lt (basic.field "age") 65))'
+    ),
+    "north_america": '(condition.in (basic.field "country") ("US" "CA" "MX"))',
+    "europe_adult": (
+        '(boolean.and (condition.in (basic.field "country") (basic.value ("FR" "DE"))) '
+        '(condition.ge (basic.field "age") 18))'
+    ),
+    "one": '(condition.equal (basic.field "count") 1)',
+    "adult": '(condition.ge (basic.field "age") 18)',
+    "late_guard": (
+        '(boolean.and (condition.ge (basic.field "age") 18) '
+        '(condition.equal (basic.field "type") "click"))'
+    ),
+}
+
+CONTEXTS = [
+    {"type": "click", "age": 30, "country": "US", "count": 1, "verified": True},
+    {"type": "view", "age": 12, "country": "FR", "count": True, "verified": True},
+    {"type": "view", "age": 70, "country": "DE", "count": 1.0, "verified": False},
+    {"type": None, "age": 40, "country": "MY", "count": 2, "verified": False},
+    {"type": ["click"], "age": 40, "country": {"US"}, "count": 0, "verified": True},
+]
+
+
+def test_index_matching():
+    """Test the index matches the rules evaluating to a truthy result."""
+    index = RuleIndex(RULES)
+
+    for context in CONTEXTS:
+        expected = [
+            name for name, source in RULES.items() if ruler.parse(source)(context)
+        ]
+
+        assert index.matching(context) == expected, context
+        assert set(expected) <= set(index.candidates(context))
+
+
+def test_index_candidates():
+    """Test only the rules guarded on the values of a context are candidates."""
+    index = RuleIndex(RULES)
+
+    assert index.candidates(CONTEXTS[0]) == [
+        "click",
+        "click_adult",
+        "north_america",
+        "one",
+        "adult",
+        "late_guard",
+    ]
+    assert index.candidates({"type": "other", "country": "JP", "count": 5}) == [
+        "adult",
+        "late_guard",
+    ]
+
+
+def test_index_missing_fields():
+    """Test rules guarded on a missing field are evaluated and raise."""
+    index = RuleIndex({"click": RULES["click"], "adult": RULES["adult"]})
+
+    assert index.candidates({"age": 20}) == ["click", "adult"]
+    with pytest.raises(KeyError):
+        index.matching({"age": 20})
+
+    assert index.candidates([1, 2]) == ["click", "adult"]
+
+
+@pytest.mark.parametrize(
+    "source,expected",
+    [
+        ('(condition.equal (basic.field "a") 1)', Guard("a", frozenset({1}))),
+        ('(condition.equal 1 (basic.field "a"))', Guard("a", frozenset({1}))),
+        (
+            '(condition.equal (basic.field "a") (number.add 1 2))',
+            Guard("a", frozenset({3})),
+        ),
+        ('(condition.in (basic.field "a") (1 "b" 1))', Guard("a", frozenset({1, "b"}))),
+        (
+            '(boolean.and (condition.equal (basic.field "a") "b"))',
+            Guard("a", frozenset({"b"})),
+        ),
+        ('(condition.equal (basic.field "a" 1) 1)', None),
+        ('(condition.equal (basic.field "a") (basic.field "b"))', None),
+        ('(condition.equal (basic.field "a") 1 1)', None),
+        ('(condition.in (basic.field "a") (basic.field "b"))', None),
+        ('(condition.in (basic.field "a") (basic.value "abc"))', None),
+        ('(condition.in 1 (basic.field "a"))', None),
+        ('(boolean.or (condition.equal (basic.field "a") 1))', None),
+        ('(condition.equal (string.lower (basic.field "a")) "b")', None),
+    ],
+)
+def test_guard(source, expected):
+    """Test guards are extracted from equality and membership tests."""
+    assert guard(ruler.compile(source, cache=None).node) == expected
+
+
+def test_guard_unoptimized():
+    """Test computed constants are not guards without folding."""
+    node = build(read('(condition.equal (basic.field "a") (number.add 1 2))'), None)
+
+    assert guard(node) is None
+
+
+def test_index_statistics():
+    """Test statistics report how selective each guarded field is."""
+    index = RuleIndex(RULES)
+    statistics = index.statistics()
+
+    assert set(statistics) == {"type", "country", "count"}
+
+    assert statistics["type"].rules == 3
+    assert statistics["type"].values == 2
+    assert statistics["type"].largest == 2
+    assert statistics["type"].selectivity == pytest.approx(3 / 2 / len(RULES))
+
+    assert statistics["country"].rules == 2
+    assert statistics["country"].values == 5
+    assert statistics["country"].largest == 1
+
+
+def test_index_backends():
+    """Test rules are compiled with the given backend."""
+    index = RuleIndex(RULES, backend="python", optimize=False)
+
+    assert {rule.backend for rule in index.rules} == {"python"}
+    assert index.matching(CONTEXTS[0]) == RuleIndex(RULES).matching(CONTEXTS[0])
+
+
+def test_index_errors():
+    """Test compile errors name the rule they are raised for."""
+    with pytest.raises(ValueError) as info:
+        RuleIndex({"good": RULES["click"], "bad": "(condition.equal"})
+
+    assert "In rule 'bad'" in info.value.__notes__
+
+    with pytest.raises(ValueError, match="Unknown backend"):
+        RuleIndex(RULES, backend="nonexistent")
+
+
+def test_index_container():
+    """Test the index behaves as a container of rule names."""
+    index = RuleIndex(RULES)
+
+    assert len(index) == len(RULES)
+    assert list(index) == list(RULES)
+    assert "click" in index
+    assert "missing" not in index
+    assert repr(index) == f"<RuleIndex of {len(RULES)} rules>"
@@ -0,0 +1,146 @@
+import gc
+
+import pytest
+
+import genruler as ruler
+from genruler.interning import NodeTable, TableInfo
+from genruler.lexer import read
+from genruler.library import compute
+from genruler.nodes import build
+from genruler.optimizer import fold
+from genruler.registry import default_registry
+
+from .test_compiler import CASES, outcome
+
+
+class Env:
+    @staticmethod
+    def double(argument):
+        return lambda ctx: compute(argument, ctx) * 2
+
+
+def test_shared_subtrees():
+    """Test equal subtrees of separately parsed rules are the same node."""
+    table = NodeTable()
+    first = ruler.compile(
+        '(condition.equal (string.lower (basic.field "email")) "a@b.c")',
+        cache=None,
+        table=table,
+    )
+    second = ruler.compile(
+        '(condition.in (string.lower (basic.field "email")) ("x" "y"))',
+        cache=None,
+        table=table,
+    )
+
+    assert first.node.arguments[0] is second.node.arguments[0]
+    assert first({"email": "A@B.C"}) is True
+    assert second({"email": "Y"}) is True
+
+
+def test_whole_rule_shared():
+    """Test equal rules intern to the same root, within a tree too."""
+    table = NodeTable()
+    source = '(boolean.or (basic.field "a") (basic.field "a"))'
+    first = table.intern(build(read(source), None))
+    second = table.intern(build(read(source), None))
+
+    assert first is second
+    assert first.arguments[0] is first.arguments[1]
+    assert table.info() == TableInfo(hits=7, misses=3, skipped=0, currsize=3)
+
+
+def test_values_keyed_with_their_type():
+    """Test literals equal across types are kept apart."""
+    table = NodeTable()
+    nodes = [
+        table.intern(build(read(f"(condition.equal 1 {value})"), None))
+        for value in ["1", "1.0", "-0.0", "0.0"]
+    ]
+
+    values = [node.arguments[1].value for node in nodes]
+    assert [type(value) for value in values] == [int, float, float, float]
+    assert str(values[2]) == "-0.0"
+    assert len({id(node) for node in nodes}) == 4
+
+
+def test_folded_constants():
+    """Test constants folded from equal subtrees are shared."""
+    table = NodeTable()
+    source = '(condition.gt (basic.field "s") (number.multiply 60 60))'
+    first = table.intern(fold(build(read(source), None)))
+    second = table.intern(fold(build(read(source), None)))
+
+    assert first.arguments[1] is second.arguments[1]
+    assert first.arguments[1].value == 3600
+
+
+def test_env_functions_skipped():
+    """Test subtrees calling env functions are kept as they are."""
+    table = NodeTable()
+    source = '(condition.gt (double (basic.field "a")) (basic.field "b"))'
+    first = table.intern(build(read(source), Env))
+    second = table.intern(build(read(source), Env))
+
+    assert first is not second
+    assert first.arguments[0] is not second.arguments[0]
+    assert first.arguments[0].arguments[0] is second.arguments[0].arguments[0]
+    assert first.arguments[1] is second.arguments[1]
+    assert table.info().skipped == 4
+
+
+def test_namespace_functions_skipped():
+    """Test subtrees calling functions of application namespaces are kept too."""
+    default_registry.register_namespace("test_interning_geo", Env)
+    table = NodeTable()
+    source = '(condition.gt (test_interning_geo.double (basic.field "a")) 1)'
+    first = table.intern(build(read(source), None))
+    second = table.intern(build(read(source), None))
+
+    assert first is not second
+    assert first.arguments[0] is not second.arguments[0]
+    assert first.arguments[0].arguments[0] is second.arguments[0].arguments[0]
+
+
+def test_unused_nodes_collected():
+    """Test nodes no tree uses anymore are dropped from the table."""
+    table = NodeTable()
+    rule = ruler.compile('(basic.field "unused")', cache=None, table=table)
+
+    assert len(table) == 2
+
+    del rule
+    gc.collect()
+    assert len(table) == 0
+
+    table.intern(build(read('(basic.field "a")'), None))
+    table.clear()
+    assert table.info() == TableInfo(0, 0, 0, 0)
+
+
+@pytest.mark.parametrize("source,contexts", CASES)
+def test_interned_parity(source, contexts):
+    """Test interned rules compute what the rules compute, for either backend."""
+    table = NodeTable()
+
+    for backend in ["closure", "python"]:
+        rule = ruler.compile(source, backend=backend, cache=None)
+        interned = ruler.compile(source, backend=backend, cache=None, table=table)
+
+        for context in contexts:
+            assert outcome(interned, context) == outcome(rule, context)
+
+
+def test_cached_rules_interned():
+    """Test rules cached without a table are compiled again with one."""
+    table = NodeTable()
+    cache = ruler.ParseCache()
+    source = '(condition.equal (basic.field "cached") 1)'
+
+    plain = ruler.parse(source, cache=cache)
+    interned = ruler.parse(source, cache=cache, table=table)
+
+    assert interned is not plain
+    assert interned.node == plain.node
+    assert table.info().misses == 4
+    assert ruler.parse(source, cache=cache, table=table) is interned
@@ -5,11 +5,14 @@ from funcparserlib.lexer import Token
 from funcparserlib.parser import Parser
 
 from genruler import parse
+from genruler.exceptions import ParseError
 from genruler.lexer import (
     Symbol,
     make_parser,
     make_sexp_tokenizer,
     read,
+    read_fast,
+    read_funcparserlib,
 )
 
 
@@ -133,6 +136,69 @@ def test_read():
         read("foo.bar)")  # Extra closing parenthesis
 
 
+def test_read_fast_matches_funcparserlib():
+    """Test the single-pass reader produces the same AST as funcparserlib."""
+    sources = [
+        '(foo.bar 42 "hello")',
+        "(foo (bar 42) (baz (qux -1.5 -0 3.25)))",
+        '(basic.value ("a" "b" "c"))',
+        '(condition.in (basic.field "country") ("US" "CA"))',
+        '(string.concat "" "a b" "")',
+        '(string.concat "\\n" "a" "b")',
+        "(123abc 1.5.3 - -x)",
+        "()",
+        "(())",
+        '(a"b"c)',
+        "\n  (foo\n\t(bar)\r\n)  \n",
+    ]
+
+    for source in sources:
+        assert read_fast(source) == read_funcparserlib(source), source
+        assert read(source) == read(source, reader="funcparserlib"), source
+
+
+def test_read_fast_errors():
+    """Test the single-pass reader reports the line and column of errors."""
+    with pytest.raises(ParseError, match="Parse error") as excinfo:
+        read_fast("foo.bar")
+    assert (excinfo.value.line, excinfo.value.column) == (1, 1)
+
+    with pytest.raises(ParseError) as excinfo:
+        read_fast('(foo\n  (bar "baz")')
+    assert (excinfo.value.line, excinfo.value.column) == (2, 14)
+    assert "expected ')'" in str(excinfo.value)
+
+    with pytest.raises(ParseError) as excinfo:
+        read_fast('(foo\n  "unterminated)')
+    assert (excinfo.value.line, excinfo.value.column) == (2, 3)
+
+    with pytest.raises(ParseError) as excinfo:
+        read_fast("(foo) (bar)")
+    assert (excinfo.value.line, excinfo.value.column) == (1, 7)
+    assert "after expression" in str(excinfo.value)
+
+    with pytest.raises(ParseError, match="expected '\\('"):
+        read_fast("   ")
+
+    with pytest.raises(ParseError, match="unexpected character"):
+        read_fast("(foo\x0c)")
+
+    # ParseError remains a ValueError for existing callers
+    with pytest.raises(ValueError):
+        read_fast("(foo")
+
+
+def test_read_fast_deep_nesting():
+    """Test the single-pass reader does not recurse on nested input."""
+    depth = 5000
+    result = read_fast("(" * depth + ")" * depth)
+
+    for _ in range(depth - 1):
+        assert len(result) == 1
+        result = result[0]
+    assert result == []
+
+
 def test_expression_evaluation():
     """Test evaluation of various S-expressions using parse function."""
     # Test simple expression
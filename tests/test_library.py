@@ -1,7 +1,8 @@
 import unittest
 
 from genruler import library
-from genruler.lexer import Symbol
+from genruler.exceptions import NestingDepthError
+from genruler.lexer import Symbol, read
 
 
 class LibraryTest(unittest.TestCase):
@@ -74,6 +75,36 @@ class LibraryTest(unittest.TestCase):
         result = library.evaluate(sequence, env)
         self.assertEqual(result, 10)
 
+    def test_evaluate_wide(self):
+        # Test a generated rule with thousands of arguments
+        terms = " ".join(
+            f'(condition.equal (basic.field "id") {i})' for i in range(5000)
+        )
+        rule = library.evaluate(read(f"(boolean.or {terms})"), None)
+
+        self.assertTrue(rule({"id": 4999}))
+        self.assertFalse(rule({"id": 5000}))
+
+        result = library.evaluate(list(range(10000)), None)
+        self.assertEqual(result, tuple(range(10000)))
+
+    def test_evaluate_empty(self):
+        self.assertEqual(library.evaluate([], None), ())
+        self.assertEqual(library.evaluate([[], 1], None), ((), 1))
+
+    def test_evaluate_max_depth(self):
+        sequence = read("(boolean.not " * 10 + "(boolean.tautology)" + ")" * 10)
+
+        rule = library.evaluate(sequence, None, max_depth=11)
+        self.assertTrue(rule({}))
+
+        with self.assertRaises(NestingDepthError) as context:
+            library.evaluate(sequence, None, max_depth=10)
+        self.assertIn("maximum depth of 10", str(context.exception))
+
+        with self.assertRaises(NestingDepthError):
+            library.evaluate(read("(" * 5000 + ")" * 5000), None)
+
     def test_evaluate_errors(self):
         # Test invalid sequence type
         with self.assertRaises(TypeError):
@@ -0,0 +1,100 @@
+import pytest
+
+from genruler.exceptions import NestingDepthError
+from genruler.lexer import read
+from genruler.modules import basic, boolean, number
+from genruler.nodes import Call, Literal, Reference, Sequence, build, instantiate
+
+
+def test_build():
+    """Test S-expressions build into the matching node tree."""
+    node = build(read('(number.add (basic.field "a") 1 number.add)'), None)
+
+    assert node == Call(
+        "number.add",
+        number.add,
+        (
+            Call("basic.field", basic.field, (Literal("a"),)),
+            Literal(1),
+            Reference("number.add", number.add),
+        ),
+    )
+
+    assert build(read('("a" "b")'), None) == Sequence((Literal("a"), Literal("b")))
+    assert build(read("()"), None) == Sequence(())
+
+
+def test_build_env():
+    """Test names without a namespace resolve from the env."""
+
+    class Env:
+        constant = 42
+
+        @staticmethod
+        def custom():
+            return lambda ctx: "custom"
+
+    assert build(read("(custom)"), Env) == Call("custom", Env.custom, ())
+
+    # a head that is not callable makes a sequence, evaluating to a tuple
+    node = build(read("(constant 1)"), Env)
+    assert node == Sequence((Reference("constant", 42), Literal(1)))
+    assert instantiate(node) == (42, 1)
+
+
+def test_build_max_depth():
+    """Test nesting deeper than max_depth is rejected."""
+    with pytest.raises(NestingDepthError):
+        build(
+            read("(boolean.not (boolean.not (boolean.tautology)))"), None, max_depth=2
+        )
+
+
+def test_instantiate():
+    """Test instantiating calls the functions of the tree."""
+    rule = instantiate(
+        build(read('(boolean.and (boolean.tautology) (basic.field "a"))'), None)
+    )
+    assert rule({"a": 1}) is True
+    assert rule({"a": 0}) is False
+
+    # a sequence headed by a callable is called with the remaining items
+    assert instantiate(build(read('((basic.field 0) ("a" "b"))'), None)) == "a"
+
+
+def test_instantiate_memo():
+    """Test nodes shared within a tree are instantiated once."""
+    shared = Call("boolean.tautology", boolean.tautology, ())
+    node = Call("boolean.and", boolean.and_, (shared, shared))
+
+    memo = {}
+    rule = instantiate(node, memo)
+
+    assert rule({}) is True
+    assert memo[id(shared)] is not None
+    assert len(memo) == 2
+
+
+def test_compact_nodes():
+    """Test nodes are slotted, and names and short strings interned."""
+    first = build(read('(condition.equal (basic.field "country") "MY")'), None)
+    second = build(read('(condition.equal (basic.field "country") "MY")'), None)
+
+    assert not hasattr(first, "__dict__")
+    assert not hasattr(read("(a)")[0], "__dict__")
+    assert first.name is second.name
+    assert first.arguments[0].arguments[0].value is (
+        second.arguments[0].arguments[0].value
+    )
+
+
+def test_singleton_nodes():
+    """Test calls of tautology and contradiction are shared by every tree."""
+    first = build(read("(boolean.and (boolean.tautology) (boolean.tautology))"), None)
+    second = build(read("(boolean.or (boolean.contradiction))"), None)
+
+    assert first.arguments[0] is first.arguments[1]
+    assert first.arguments[0] is build(read("(boolean.tautology)"), None)
+    assert second.arguments[0] is build(read("(boolean.contradiction)"), None)
+    assert instantiate(first) is not None
+    assert boolean.tautology() is boolean.tautology()
@@ -0,0 +1,141 @@
+import pytest
+
+import genruler as ruler
+from genruler.lexer import read
+from genruler.library import compute, pure
+from genruler.modules import basic, condition
+from genruler.nodes import Call, Constant, Literal, build, instantiate
+from genruler.optimizer import fold, is_constant
+
+from .test_compiler import CASES, outcome
+
+
+def test_fold_constants():
+    """Test context independent calls fold into their values."""
+    assert fold(build(read("(number.multiply 60 60 24)"), None)).value == 86400
+    assert fold(build(read('(string.lower "ABC")'), None)).value == "abc"
+    assert fold(build(read("(boolean.not (boolean.tautology))"), None)).value is False
+    assert fold(build(read('(list.length ("a" "b" "c"))'), None)).value == 3
+
+    node = fold(build(read("(number.add (number.multiply 2 3) 4)"), None))
+    assert isinstance(node, Constant)
+    assert node.value == 10
+    assert node.node.name == "number.add"
+
+
+def test_fold_subtrees():
+    """Test only the context independent subtrees of a rule are folded."""
+    node = fold(
+        build(read('(condition.gt (basic.field "age") (number.multiply 6 3))'), None)
+    )
+
+    assert isinstance(node, Call)
+    assert node.function is condition.gt
+    assert node.arguments[0] == Call("basic.field", basic.field, (Literal("age"),))
+    assert node.arguments[1] == Constant(18, node.arguments[1].node)
+
+    rule = instantiate(node)
+    assert rule({"age": 21}) is True
+    assert rule({"age": 18}) is False
+
+
+def test_fold_keeps_unchanged_nodes():
+    """Test trees without anything to fold are returned as they are."""
+    node = build(read('(boolean.and (basic.field "a") (basic.field "b"))'), None)
+
+    assert fold(node) is node
+
+
+def test_fold_errors_deferred():
+    """Test calls raising an exception are left to raise when the rule runs."""
+    node = fold(build(read("(number.divide 1 0)"), None))
+
+    assert isinstance(node, Call)
+    with pytest.raises(ZeroDivisionError):
+        instantiate(node)({})
+
+    with pytest.raises(ValueError, match="basic.value cannot accept sub-rules"):
+        ruler.compile("(basic.value (number.add 1 2))", cache=None)
+
+
+def test_fold_env_functions():
+    """Test env functions are folded only when declared pure."""
+    calls = []
+
+    class Env:
+        @staticmethod
+        def double(argument):
+            def inner(context):
+                calls.append(context)
+                return compute(argument, context) * 2
+
+            return inner
+
+        @staticmethod
+        @pure
+        def triple(argument):
+            return lambda context: compute(argument, context) * 3
+
+    node = fold(build(read("(number.add (double 2) (triple 2))"), Env))
+    assert isinstance(node, Call)
+    assert isinstance(node.arguments[0], Call)
+    assert node.arguments[1] == Constant(6, node.arguments[1].node)
+
+    rule = ruler.compile("(number.add (double 2) (triple 2))", env=Env, cache=None)
+    assert rule({}) == 10
+    assert calls == [{}]
+
+
+def test_is_constant():
+    """Test which nodes compute the same value whatever the context."""
+    assert is_constant(build(read('(1 "a")'), None))
+    assert is_constant(build(read("()"), None))
+    assert not is_constant(build(read("(boolean.tautology)"), None))
+    assert not is_constant(build(read('((basic.field "a") 1)'), None))
+    assert is_constant(fold(build(read("(boolean.tautology)"), None)))
+
+
+@pytest.mark.parametrize("backend", ["closure", "python"])
+@pytest.mark.parametrize("source,contexts", CASES)
+def test_fold_parity(source, contexts, backend):
+    """Test folded rules compute what unfolded rules compute."""
+    folded = ruler.compile(source, backend=backend, cache=None)
+    unfolded = ruler.compile(source, backend=backend, cache=None, optimize=False)
+
+    for context in contexts:
+        assert outcome(folded, context) == outcome(unfolded, context), (
+            source,
+            context,
+        )
+
+
+def test_fold_python_backend():
+    """Test folded values are inlined into the generated code."""
+    rule = ruler.compile(
+        '(condition.gt (basic.field "seconds") (number.multiply 60 60 24))',
+        backend="python",
+        cache=None,
+    )
+
+    assert "c0['seconds'] > 86400" in rule.source
+
+
+def test_compile_cached_per_optimize():
+    """Test folded and unfolded rules are cached separately."""
+    folded = ruler.compile("(number.add 1 2 3)")
+    unfolded = ruler.compile("(number.add 1 2 3)", optimize=False)
+
+    assert folded is not unfolded
+    assert isinstance(folded.node, Constant)
+    assert not isinstance(unfolded.node, Constant)
+
+
+def test_fold_singletons():
+    """Test singleton calls fold into a constant shared by every tree."""
+    first = fold(
+        build(read('(boolean.and (boolean.tautology) (basic.field "a"))'), None)
+    )
+    second = fold(build(read("(boolean.tautology)"), None))
+
+    assert second == Constant(True, build(read("(boolean.tautology)"), None))
+    assert first.arguments[0] is second
@@ -0,0 +1,98 @@
+import itertools
+import pickle
+
+import pytest
+
+import genruler as ruler
+from genruler.library import compute
+from genruler.parallel import evaluate_parallel
+
+# threads of a pool shut down by an earlier test may not have exited yet when
+# the next pool forks its workers
+pytestmark = pytest.mark.filterwarnings(
+    "ignore:This process .* is multi-threaded:DeprecationWarning"
+)
+
+SOURCE = '(condition.gt (number.multiply (basic.field "n") 2) 10)'
+
+
+class Env:
+    @staticmethod
+    def double(argument):
+        return lambda ctx: compute(argument, ctx) * 2
+
+
+@pytest.mark.parametrize("backend", ["closure", "python"])
+def test_evaluate_parallel(backend):
+    """Test results are those of evaluating the contexts in order."""
+    rule = ruler.compile(SOURCE, backend=backend, cache=None)
+    contexts = [{"n": n} for n in range(100)]
+
+    assert rule.evaluate_parallel(contexts, workers=2, chunk_size=7) == [
+        rule(context) for context in contexts
+    ]
+
+
+def test_evaluate_parallel_unordered():
+    """Test unordered results are paired with the position of their context."""
+    rule = ruler.parse(SOURCE)
+    contexts = [{"n": n} for n in range(50)]
+
+    results = rule.evaluate_parallel(contexts, workers=2, chunk_size=4, ordered=False)
+
+    assert sorted(results) == list(enumerate(rule(context) for context in contexts))
+
+
+def test_evaluate_parallel_bounded():
+    """Test contexts are consumed as results are, a few chunks ahead."""
+    rule = ruler.parse(SOURCE)
+    contexts = ({"n": n} for n in itertools.count())
+
+    for ordered in (True, False):
+        results = evaluate_parallel(
+            rule, contexts, workers=2, chunk_size=5, ordered=ordered, max_pending=3
+        )
+
+        assert len(list(itertools.islice(results, 12))) == 12
+        results.close()
+
+    # each run submits at most three chunks of five ahead of what it yielded
+    assert next(contexts)["n"] <= 2 * (15 + 15)
+
+
+def test_evaluate_parallel_errors():
+    """Test an exception raised for a context is raised in order."""
+    rule = ruler.parse('(number.divide 1 (basic.field "d"))')
+    contexts = [{"d": 1}, {"d": 2}, {"d": 0}, {"d": 4}]
+
+    results = rule.evaluate_parallel(contexts, workers=2, chunk_size=1, lazy=True)
+
+    assert next(results) == 1.0
+    assert next(results) == 0.5
+    with pytest.raises(ZeroDivisionError):
+        next(results)
+
+    with pytest.raises(ValueError):
+        evaluate_parallel(rule, contexts, chunk_size=0)
+
+
+def test_evaluate_parallel_env_functions():
+    """Test rules using env functions are sent to workers by name."""
+    rule = ruler.parse('(double (basic.field "n"))', env=Env)
+
+    assert rule.evaluate_parallel([{"n": 1}, {"n": 2}], workers=1) == [2, 4]
+
+    class Local:
+        @staticmethod
+        def double(argument):
+            return lambda ctx: compute(argument, ctx) * 2
+
+    rule = ruler.parse('(double (basic.field "n"))', env=Local)
+
+    with pytest.raises((pickle.PicklingError, AttributeError)):
+        rule.evaluate_parallel([{"n": 1}])
+
+
+def test_evaluate_parallel_empty():
+    """Test no contexts give no results."""
+    assert ruler.parse(SOURCE).evaluate_parallel([], workers=1) == []
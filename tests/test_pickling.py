@@ -0,0 +1,109 @@
+import pickle
+
+import pytest
+
+import genruler as ruler
+from genruler.lexer import read
+from genruler.library import compute
+from genruler.modules import number
+from genruler.nodes import MAX_DEPTH, Call, build
+from genruler.registry import default_registry
+
+from .test_compiler import CASES, outcome
+
+
+class Env:
+    @staticmethod
+    def double(argument):
+        return lambda ctx: compute(argument, ctx) * 2
+
+
+class Geo:
+    @staticmethod
+    def distance(a, b):
+        return lambda ctx: abs(compute(a, ctx) - compute(b, ctx))
+
+
+@pytest.mark.parametrize("backend", ["closure", "python"])
+@pytest.mark.parametrize("source,contexts", CASES)
+def test_pickle_round_trip(source, contexts, backend):
+    """Test unpickled rules compute what the original rules compute."""
+    rule = ruler.compile(source, backend=backend, cache=None)
+    loaded = pickle.loads(pickle.dumps(rule))
+
+    assert loaded.node == rule.node
+    assert loaded.backend == rule.backend
+    assert loaded.source == rule.source
+    assert loaded.deduplicated == rule.deduplicated
+
+    for context in contexts:
+        assert outcome(loaded, context) == outcome(rule, context), context
+
+
+def test_pickle_shared_subtrees():
+    """Test subtrees shared within a tree are still shared once unpickled."""
+    field = build(read('(basic.field "a")'), None)
+    node = Call("number.add", number.add, (field,) * 3)
+
+    loaded = pickle.loads(pickle.dumps(node))
+
+    assert loaded == node
+    assert len({id(argument) for argument in loaded.arguments}) == 1
+
+
+def test_pickle_env_functions():
+    """Test env functions are pickled by qualified name."""
+    rule = ruler.compile('(double (basic.field "n"))', env=Env, cache=None)
+    data = pickle.dumps(rule)
+
+    assert b"Env.double" in data
+    assert pickle.loads(data)({"n": 2}) == 4
+
+    class Local:
+        @staticmethod
+        def double(argument):
+            return lambda ctx: compute(argument, ctx) * 2
+
+    rule = ruler.compile('(double (basic.field "n"))', env=Local, cache=None)
+
+    with pytest.raises((pickle.PicklingError, AttributeError)):
+        pickle.dumps(rule)
+
+
+def test_pickle_builtins_by_name():
+    """Test built-in functions are stored as their registered name."""
+    data = pickle.dumps(ruler.parse('(condition.gt (basic.field "a") 1)'))
+
+    assert b"condition.gt" in data
+    assert b"genruler.modules" not in data
+
+
+def test_pickle_registered_namespaces():
+    """Test functions of application namespaces are pickled by qualified name."""
+    default_registry.register_namespace("test_pickling_geo", Geo)
+    rule = ruler.compile('(test_pickling_geo.distance (basic.field "x") 4)', cache=None)
+    data = pickle.dumps(rule)
+
+    assert b"Geo.distance" in data
+
+    # as in a worker process the namespace was never registered in
+    default_registry.register_namespace("test_pickling_geo", object())
+    assert pickle.loads(data)({"x": 1}) == 3
+
+
+def test_pickle_folded_constants():
+    """Test folded constants keep both their value and the subtree they replace."""
+    rule = ruler.parse('(condition.gt (basic.field "a") (number.multiply 60 60))')
+    loaded = pickle.loads(pickle.dumps(rule))
+
+    assert loaded.node == rule.node
+    assert loaded.node.arguments[1].value == 3600
+
+
+def test_pickle_deep():
+    """Test trees nested up to the maximum depth can be pickled."""
+    depth = MAX_DEPTH - 1
+    source = "(boolean.not " * depth + '(basic.field "a")' + ")" * depth
+    rule = ruler.compile(source, cache=None, optimize=False)
+
+    assert pickle.loads(pickle.dumps(rule))({"a": True}) == (depth % 2 == 0)
@@ -0,0 +1,175 @@
+import pstats
+
+import pytest
+
+import genruler as ruler
+from genruler.library import compute
+from genruler.profiling import ProfiledRule
+
+from .test_compiler import CASES, outcome
+
+SOURCE = '(boolean.and (condition.gt (basic.field "age") 18) (condition.equal (string.lower (basic.field "country")) "my"))'
+
+
+class Env:
+    @staticmethod
+    def double(argument):
+        return lambda ctx: compute(argument, ctx) * 2
+
+
+@pytest.mark.parametrize("source,contexts", CASES)
+def test_profiled_parity(source, contexts):
+    """Test profiled rules compute what the rules compute."""
+    rule = ruler.compile(source, cache=None)
+    profiled = rule.profiled()
+
+    for context in contexts:
+        assert outcome(profiled, context) == outcome(rule, context)
+
+
+def test_profile_spans():
+    """Test nodes are keyed on their function and span in the source."""
+    profiled = ruler.compile(SOURCE.replace(" ", "  ")).profiled()
+    profile = profiled.profile
+
+    assert profile.source == SOURCE
+    assert [profile.text(node) for node in profile.nodes] == [
+        SOURCE,
+        '(condition.gt (basic.field "age") 18)',
+        '(basic.field "age")',
+        '(condition.equal (string.lower (basic.field "country")) "my")',
+        '(string.lower (basic.field "country"))',
+        '(basic.field "country")',
+    ]
+    assert [node.name for node in profile.nodes] == [
+        "boolean.and",
+        "condition.gt",
+        "basic.field",
+        "condition.equal",
+        "string.lower",
+        "basic.field",
+    ]
+    assert profile.nodes[2].label == "basic.field@27:46"
+    assert profile.nodes[5].parent is profile.nodes[4]
+
+
+def test_profile_spans_without_arguments():
+    """Test calls without arguments span their name and parentheses only."""
+    source = '(boolean.and (boolean.tautology) (condition.gt (basic.field "a") 1))'
+    profile = ruler.compile(source, optimize=False).profiled().profile
+
+    assert [profile.text(node) for node in profile.nodes] == [
+        source,
+        "(boolean.tautology)",
+        '(condition.gt (basic.field "a") 1)',
+        '(basic.field "a")',
+    ]
+
+
+def test_profile_counts_and_times():
+    """Test calls are counted, short circuits included, and times add up."""
+    profiled = ruler.compile(SOURCE).profiled()
+    contexts = [{"age": age, "country": "MY"} for age in range(10, 30)]
+
+    assert profiled.evaluate_many(contexts) == [age > 18 for age in range(10, 30)]
+
+    nodes = profiled.profile.nodes
+    assert [node.calls for node in nodes] == [20, 20, 20, 11, 11, 11]
+
+    for node in nodes:
+        children = [child for child in nodes if child.parent is node]
+        assert 0 <= node.own <= node.cumulative
+        assert node.cumulative == node.own + sum(c.cumulative for c in children)
+
+    profiled.profile.reset()
+    assert all(node.calls == node.cumulative == 0 for node in nodes)
+
+
+def test_profile_errors_and_env():
+    """Test env functions are profiled, and evaluations that raise timed."""
+    profiled = ruler.compile(
+        '(condition.gt (double (basic.field "a")) 3)', env=Env
+    ).profiled()
+
+    assert profiled({"a": 2}) is True
+    with pytest.raises(KeyError):
+        profiled({})
+
+    assert [(node.name, node.calls) for node in profiled.profile.nodes] == [
+        ("condition.gt", 2),
+        ("double", 2),
+        ("basic.field", 2),
+    ]
+
+
+def test_profile_folded_constants():
+    """Test subtrees folded into constants are written but not profiled."""
+    profiled = ruler.compile(
+        '(condition.gt (basic.field "s") (number.multiply 60 60))'
+    ).profiled()
+    profiled({"s": 4000})
+
+    assert [node.name for node in profiled.profile.nodes] == [
+        "condition.gt",
+        "basic.field",
+    ]
+    assert profiled.profile.nodes[0].span == (0, len(profiled.profile.source))
+
+
+def test_report():
+    """Test the report lists a line per node, sorted and limited."""
+    profiled = ruler.compile(SOURCE).profiled()
+    profiled.evaluate_many([{"age": 20, "country": "MY"}] * 10)
+
+    lines = profiled.report().splitlines()
+    assert "cumulative" in lines[0]
+    assert len(lines) == 7
+    assert lines[1].split()[0] == "10"
+    assert lines[1].endswith("...")
+
+    lines = profiled.report(sort="position", limit=2).splitlines()
+    assert len(lines) == 3
+    assert lines[2].endswith('(condition.gt (basic.field "age") 18)')
+
+
+def test_collapsed():
+    """Test collapsed stacks list the labels from the root to each node."""
+    profiled = ruler.compile(SOURCE).profiled()
+    profiled.evaluate_many([{"age": 10, "country": "MY"}] * 10)
+
+    stacks = [line.rsplit(" ", 1) for line in profiled.collapsed().splitlines()]
+
+    assert [stack for stack, _ in stacks] == [
+        "boolean.and@0:113",
+        "boolean.and@0:113;condition.gt@13:50",
+        "boolean.and@0:113;condition.gt@13:50;basic.field@27:46",
+    ]
+    assert all(int(time) >= 0 for _, time in stacks)
+
+
+def test_stats(tmp_path):
+    """Test the profile is exported as pstats statistics."""
+    profiled = ruler.compile(SOURCE).profiled()
+    profiled.evaluate_many([{"age": 20, "country": "MY"}] * 5)
+
+    stats = profiled.profile.stats()
+    path = tmp_path / "rule.prof"
+    stats.dump_stats(path)
+    loaded = pstats.Stats(str(path))
+
+    key = ("<rule>", 13, "condition.gt@13:50")
+    calls, _, own, cumulative, callers = loaded.stats[key]
+    assert calls == 5
+    assert 0 <= own <= cumulative
+    assert list(callers) == [("<rule>", 0, "boolean.and@0:113")]
+    assert loaded.total_calls == 30
+
+
+def test_profiled_leaves_rule_unchanged():
+    """Test profiling compiles a separate rule, for either backend."""
+    for backend in ["closure", "python"]:
+        rule = ruler.compile(SOURCE, backend=backend, cache=None)
+        function = rule.function
+
+        assert isinstance(rule.profiled(), ProfiledRule)
+        assert rule.function is function
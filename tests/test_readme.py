@@ -183,6 +183,20 @@ class TestConditionFunctions:
         result = rule({"fruit": "apple", "allowed": ["apple", "banana"]})
         assert result is True
 
+    def test_not_in(self):
+        rule = genruler.parse(
+            '(condition.not_in (basic.field "country") ("KP" "IR"))'
+        )
+        result = rule({"country": "MY"})
+        assert result is True
+
+    def test_in_range(self):
+        rule = genruler.parse(
+            '(condition.in_range (basic.field "age") (0 12) (65 120))'
+        )
+        result = rule({"age": 70})
+        assert result is True
+
     def test_is_none(self):
         rule = genruler.parse('(condition.is_none (basic.field "optional"))')
         result = rule({"optional": None})
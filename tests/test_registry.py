@@ -0,0 +1,150 @@
+import types
+
+import pytest
+
+import genruler as ruler
+from genruler.exceptions import InvalidFunctionNameError, UnknownFunctionError
+from genruler.modules import boolean, condition, number
+from genruler.registry import Registry, default_registry
+
+
+def test_resolve_builtin():
+    """Test built-in functions resolve with and without the trailing underscore."""
+    assert default_registry.resolve("number.add") is number.add
+    assert default_registry.resolve("boolean.and") is boolean.and_
+    assert default_registry.resolve("boolean.and_") is boolean.and_
+    assert default_registry.resolve("condition.in") is condition.in_
+
+
+def test_resolve_unknown():
+    """Test unknown names raise UnknownFunctionError."""
+    with pytest.raises(UnknownFunctionError) as excinfo:
+        default_registry.resolve("number.nonexistent")
+    assert "Unknown function 'number.nonexistent'" in str(excinfo.value)
+
+    with pytest.raises(UnknownFunctionError):
+        default_registry.resolve("nonexistent.function")
+
+    # helpers a module merely imports are not exposed
+    with pytest.raises(UnknownFunctionError):
+        default_registry.resolve("number.binary")
+
+    # existing callers catching InvalidFunctionNameError keep working
+    with pytest.raises(InvalidFunctionNameError):
+        ruler.parse("(number.nonexistent 1 2)")
+
+    assert "number.add" in default_registry
+    assert "number.nonexistent" not in default_registry
+
+
+def test_namespace_loaded_lazily():
+    """Test namespaces given as module paths are imported on first reference."""
+    registry = Registry()
+    registry.register_namespace("lazy", "genruler.nonexistent_module")
+    registry.register_namespace("num", "genruler.modules.number")
+
+    assert "num.add" not in registry._functions
+    assert registry.resolve("num.add") is number.add
+
+    # the failing import surfaces on reference, and is retried on the next one
+    with pytest.raises(ImportError):
+        registry.resolve("lazy.function")
+    with pytest.raises(ImportError):
+        registry.resolve("lazy.function")
+
+
+def test_register_function():
+    """Test registering single functions, directly and as a decorator."""
+    registry = Registry()
+
+    @registry.register("geo.distance")
+    def distance(a, b):
+        return lambda ctx: abs(a - b)
+
+    registry.register("geo.nested.zero", lambda: lambda ctx: 0)
+
+    assert registry.resolve("geo.distance") is distance
+    assert registry.resolve("geo.nested.zero")()({}) == 0
+
+    with pytest.raises(InvalidFunctionNameError):
+        registry.register("distance", distance)
+
+    with pytest.raises(TypeError):
+        registry.register("geo.invalid", 42)  # type: ignore
+
+
+def test_register_overrides_namespace():
+    """Test single registrations are not clobbered by a lazily loaded namespace."""
+    registry = Registry()
+    registry.register_namespace("number", "genruler.modules.number")
+
+    def add(*arguments):
+        return lambda ctx: "overridden"
+
+    registry.register("number.add", add)
+
+    assert registry.resolve("number.add") is add
+    assert registry.resolve("number.subtract") is number.subtract
+
+
+def test_register_namespace_object():
+    """Test namespaces backed by plain objects and module objects."""
+    registry = Registry()
+
+    class Geo:
+        @staticmethod
+        def origin():
+            return lambda ctx: (0, 0)
+
+    module = types.ModuleType("geo_module")
+    exec("def distance(a, b):\n    return lambda ctx: abs(a - b)", module.__dict__)
+
+    registry.register_namespace("geo", Geo)
+    assert registry.resolve("geo.origin")()({}) == (0, 0)
+
+    # registering a namespace again replaces its functions
+    registry.register_namespace("geo", module)
+    assert registry.resolve("geo.distance")(1, 4)({}) == 3
+    with pytest.raises(UnknownFunctionError):
+        registry.resolve("geo.origin")
+
+
+def test_register_namespace_reexports(tmp_path, monkeypatch):
+    """Test packages export what their modules define, or what __all__ lists."""
+    package = tmp_path / "registry_plugin"
+    package.mkdir()
+    (package / "__init__.py").write_text(
+        "from math import floor\nfrom .impl import distance\n"
+    )
+    (package / "impl.py").write_text(
+        "def distance(a, b):\n    return lambda ctx: abs(a - b)\n"
+    )
+    (tmp_path / "registry_exports.py").write_text(
+        "from math import hypot\n__all__ = ['hypot']\n"
+    )
+    monkeypatch.syspath_prepend(str(tmp_path))
+
+    registry = Registry()
+    registry.register_namespace("plugin", "registry_plugin")
+    registry.register_namespace("exports", "registry_exports")
+
+    assert registry.resolve("plugin.distance")(1, 4)({}) == 3
+    assert "plugin.floor" not in registry
+    assert registry.resolve("exports.hypot")(3, 4) == 5
+
+
+def test_parse_with_registered_namespace():
+    """Test rules reference application namespaces without an env."""
+
+    class Geo:
+        @staticmethod
+        def distance(a, b):
+            return lambda ctx: abs(ctx[a] - ctx[b])
+
+    default_registry.register_namespace("test_registry_geo", Geo)
+
+    rule = ruler.parse(
+        '(condition.gt (test_registry_geo.distance "x" "y") 2)', cache=None
+    )
+    assert rule({"x": 1, "y": 5}) is True
+    assert rule({"x": 1, "y": 2}) is False
@@ -0,0 +1,118 @@
+import pytest
+
+import genruler as ruler
+from genruler import RuleSet
+from genruler.exceptions import InvalidFunctionNameError, NonCallableResultError
+from genruler.library import compute, pure
+
+RULES = {
+    "adult": '(condition.ge (basic.field "age") 18)',
+    "senior": '(condition.ge (basic.field "age") 65)',
+    "big_order": '(condition.gt (basic.context (basic.field "order") (basic.field "total")) 100)',
+    "small_order": '(condition.lt (basic.context (basic.field "order") (basic.field "total")) 10)',
+    "adult_big_order": (
+        '(boolean.and (condition.ge (basic.field "age") 18) '
+        '(condition.gt (basic.context (basic.field "order") (basic.field "total")) 100))'
+    ),
+    "name": '(string.lower (basic.field "name"))',
+}
+
+CONTEXTS = [
+    {"age": 70, "name": "ALICE", "order": {"total": 150}},
+    {"age": 30, "name": "Bob", "order": {"total": 5}},
+    {"age": 12, "name": "carol", "order": {"total": 50}},
+]
+
+
+def test_ruleset_results():
+    """Test a rule set computes what each of its rules computes."""
+    rules = RuleSet(RULES)
+
+    assert len(rules) == len(RULES)
+    assert list(rules) == list(RULES)
+    assert "adult" in rules
+    assert repr(rules) == "<RuleSet of 6 rules>"
+
+    for context in CONTEXTS:
+        assert rules(context) == {
+            name: ruler.parse(source)(context) for name, source in RULES.items()
+        }
+
+
+def test_ruleset_matching():
+    """Test matching returns the names of the rules with a truthy result."""
+    rules = RuleSet(RULES)
+
+    assert rules.matching(CONTEXTS[0]) == [
+        "adult",
+        "senior",
+        "big_order",
+        "adult_big_order",
+        "name",
+    ]
+    assert rules.matching(CONTEXTS[1]) == ["adult", "small_order", "name"]
+    assert rules.matching({"age": 1, "name": "", "order": {"total": 10}}) == []
+
+
+def test_ruleset_shares_subexpressions():
+    """Test subexpressions repeated across rules are computed once per context."""
+    calls = []
+
+    class Env:
+        @staticmethod
+        @pure
+        def total(argument):
+            def inner(context):
+                calls.append(context)
+                return compute(argument, context)
+
+            return inner
+
+    rules = RuleSet(
+        {
+            "big": '(condition.gt (total (basic.field "n")) 100)',
+            "small": '(condition.lt (total (basic.field "n")) 10)',
+            "even": '(condition.equal (number.modulo (total (basic.field "n")) 2) 0)',
+        },
+        env=Env,
+    )
+
+    assert rules.deduplicated == 2
+    assert rules.matching({"n": 4}) == ["small", "even"]
+    assert len(calls) == 1
+
+    calls.clear()
+    unshared = RuleSet(
+        {
+            "big": '(condition.gt (total (basic.field "n")) 100)',
+            "small": '(condition.lt (total (basic.field "n")) 10)',
+        },
+        env=Env,
+        optimize=False,
+    )
+
+    assert unshared.deduplicated == 0
+    assert unshared({"n": 4}) == {"big": False, "small": True}
+    assert len(calls) == 2
+
+
+def test_ruleset_empty():
+    """Test an empty rule set evaluates to no results."""
+    rules = RuleSet({})
+
+    assert rules({}) == {}
+    assert rules.matching({}) == []
+
+
+def test_ruleset_errors():
+    """Test rules that cannot be compiled raise, naming the rule."""
+    with pytest.raises(InvalidFunctionNameError) as info:
+        RuleSet({"ok": "(boolean.tautology)", "bad": '(invalid_fn "value")'})
+
+    assert "In rule 'bad'" in info.value.__notes__
+
+    with pytest.raises(NonCallableResultError):
+        RuleSet({"constant": "(1 2 3)"})
+
+    with pytest.raises(ValueError):
+        RuleSet({"unbalanced": "(boolean.tautology"})
@@ -0,0 +1,203 @@
+import marshal
+
+import pytest
+
+import genruler as ruler
+from genruler import lexer, snapshot
+from genruler.exceptions import ParseError
+from genruler.library import compute, pure
+from genruler.nodes import Constant
+from genruler.registry import default_registry
+
+from .test_compiler import CASES, outcome
+
+SOURCES = {
+    "adult": '(condition.ge (basic.field "age") 18)',
+    "local": '(condition.in (string.lower (basic.field "country")) ("my" "sg"))',
+    "day": '(condition.gt (basic.field "seconds") (number.multiply 60 60 24))',
+}
+
+
+class Origin:
+    def __eq__(self, other):
+        return isinstance(other, Origin)
+
+
+class Env:
+    @staticmethod
+    def double(argument):
+        return lambda ctx: compute(argument, ctx) * 2
+
+    @staticmethod
+    @pure
+    def origin():
+        return lambda ctx: Origin()
+
+    @staticmethod
+    @pure
+    def rate():
+        return lambda ctx: 2
+
+
+class Changed:
+    @staticmethod
+    @pure
+    def rate():
+        return lambda ctx: 5
+
+
+def test_round_trip(tmp_path):
+    """Test rules loaded from a snapshot are the rules compiled from source."""
+    path = tmp_path / "rules.snapshot"
+    rules = snapshot.load_or_compile(path, SOURCES)
+
+    assert path.read_bytes().startswith(snapshot.MAGIC)
+
+    loaded, stale = snapshot.load(path, SOURCES)
+    assert stale == []
+    assert list(loaded) == list(SOURCES)
+
+    for name, rule in rules.items():
+        assert loaded[name].node == rule.node
+
+    assert isinstance(loaded["day"].node.arguments[1], Constant)
+    assert loaded["adult"]({"age": 20}) is True
+    assert loaded["local"]({"country": "MY"}) is True
+
+
+@pytest.mark.parametrize("source,contexts", CASES)
+def test_snapshot_parity(tmp_path, source, contexts):
+    """Test loaded rules compute what the rules compute, for either backend."""
+    path = tmp_path / "rules.snapshot"
+
+    for backend in ["closure", "python"]:
+        rule = ruler.compile(source, backend=backend, cache=None)
+        snapshot.save(path, {"rule": source}, {"rule": rule})
+        loaded, stale = snapshot.load(path, {"rule": source}, backend=backend)
+
+        assert stale == []
+        for context in contexts:
+            assert outcome(loaded["rule"], context) == outcome(rule, context)
+
+
+def test_only_stale_rules_recompiled(tmp_path, monkeypatch):
+    """Test changed and added rules are compiled, and the snapshot updated."""
+    path = tmp_path / "rules.snapshot"
+    snapshot.load_or_compile(path, SOURCES)
+
+    sources = {
+        **SOURCES,
+        "adult": '(condition.ge (basic.field "age") 21)',
+        "minor": '(condition.lt (basic.field "age") 18)',
+    }
+    del sources["day"]
+
+    _, stale = snapshot.load(path, sources)
+    assert stale == ["adult", "minor"]
+
+    read = []
+    monkeypatch.setattr(
+        snapshot, "read", lambda source: read.append(source) or lexer.read(source)
+    )
+    rules = snapshot.load_or_compile(path, sources)
+    assert read == [sources["adult"], sources["minor"]]
+
+    assert list(rules) == ["adult", "local", "minor"]
+    assert rules["adult"]({"age": 20}) is False
+
+    assert snapshot.load(path, sources)[1] == []
+    assert set(snapshot._read(path, True)) == set(sources)
+
+
+def test_stale_snapshots(tmp_path):
+    """Test missing, corrupt and other version snapshots are entirely stale."""
+    path = tmp_path / "rules.snapshot"
+    assert snapshot.load(path, SOURCES) == ({}, list(SOURCES))
+
+    path.write_bytes(b"")
+    assert snapshot.load(path, SOURCES) == ({}, list(SOURCES))
+
+    path.write_bytes(snapshot.MAGIC + b"\xff\x00")
+    assert snapshot.load(path, SOURCES) == ({}, list(SOURCES))
+
+    for header, entries in [
+        ((0, snapshot.PACKAGE_VERSION), {}),
+        ((snapshot.FORMAT_VERSION, "0.0.0"), {}),
+        ((snapshot.FORMAT_VERSION, snapshot.PACKAGE_VERSION), []),
+        ((snapshot.FORMAT_VERSION, snapshot.PACKAGE_VERSION), {"adult": "x"}),
+        ((snapshot.FORMAT_VERSION, snapshot.PACKAGE_VERSION), {"adult": ("x", ())}),
+    ]:
+        data = marshal.dumps((*header, marshal.version, True, entries))
+        path.write_bytes(snapshot.MAGIC + data)
+        assert snapshot.load(path, SOURCES) == ({}, list(SOURCES))
+
+    snapshot.load_or_compile(path, SOURCES)
+    assert snapshot.load(path, SOURCES, optimize=False) == ({}, list(SOURCES))
+    assert snapshot.load(path, SOURCES)[1] == []
+
+
+def test_env_functions(tmp_path):
+    """Test env functions are resolved again, and missing ones recompiled."""
+    path = tmp_path / "rules.snapshot"
+    sources = {"double": '(condition.gt (double (basic.field "a")) 3)'}
+    snapshot.load_or_compile(path, sources, env=Env)
+
+    loaded, _ = snapshot.load(path, sources, env=Env)
+    assert loaded["double"]({"a": 2}) is True
+
+    assert snapshot.load(path, sources) == ({}, ["double"])
+
+
+def test_unmarshallable_constants(tmp_path):
+    """Test constants marshal cannot store are folded again once loaded."""
+    path = tmp_path / "rules.snapshot"
+    sources = {"origin": '(condition.equal (origin) (basic.field "p"))'}
+    rules = snapshot.load_or_compile(path, sources, env=Env)
+
+    loaded, _ = snapshot.load(path, sources, env=Env)
+    assert isinstance(loaded["origin"].node.arguments[0], Constant)
+    assert loaded["origin"].node == rules["origin"].node
+    assert loaded["origin"]({"p": Origin()}) is True
+
+
+def test_env_constants(tmp_path):
+    """Test constants folded from env functions are folded again once loaded."""
+    path = tmp_path / "rules.snapshot"
+    sources = {"rate": "(number.multiply (rate) 3)"}
+    rules = snapshot.load_or_compile(path, sources, env=Env)
+    assert rules["rate"]({}) == 6
+
+    loaded, stale = snapshot.load(path, sources, env=Changed)
+    assert stale == []
+    assert isinstance(loaded["rate"].node, Constant)
+    assert loaded["rate"]({}) == 15
+
+
+def test_namespace_constants(tmp_path):
+    """Test constants folded from application namespaces are folded again too."""
+    path = tmp_path / "rules.snapshot"
+    sources = {"rate": "(number.multiply (test_snapshot_rates.rate) 3)"}
+    default_registry.register_namespace("test_snapshot_rates", Env)
+    assert snapshot.load_or_compile(path, sources)["rate"]({}) == 6
+
+    default_registry.register_namespace("test_snapshot_rates", Changed)
+    loaded, stale = snapshot.load(path, sources)
+    assert stale == []
+    assert loaded["rate"]({}) == 15
+
+
+def test_save_relative_path(tmp_path, monkeypatch):
+    """Test snapshots are written through a temporary file in their directory."""
+    monkeypatch.chdir(tmp_path)
+    snapshot.load_or_compile("rules.snapshot", SOURCES)
+
+    assert [path.name for path in tmp_path.iterdir()] == ["rules.snapshot"]
+    assert snapshot.load("rules.snapshot", SOURCES)[1] == []
+
+
+def test_errors_name_the_rule(tmp_path):
+    """Test stale rules failing to parse raise, noting the rule's name."""
+    with pytest.raises(ParseError) as error:
+        snapshot.load_or_compile(tmp_path / "rules.snapshot", {"broken": "(a"})
+
+    assert "In rule 'broken'" in error.value.__notes__
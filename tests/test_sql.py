@@ -0,0 +1,185 @@
+import sqlite3
+
+import pytest
+
+import genruler as ruler
+from genruler.nodes import unparse
+from genruler.sql import to_sql
+
+ROWS = [
+    {"id": 1, "age": 12, "score": 0.5, "country": "MY", "verified": 1, "count": 0},
+    {"id": 2, "age": 18, "score": 1.5, "country": "us", "verified": 0, "count": 3},
+    {"id": 3, "age": 30, "score": -2.5, "country": "FR", "verified": 1, "count": -4},
+    {"id": 4, "age": 65, "score": 10.0, "country": "", "verified": 1, "count": 7},
+    {"id": 5, "age": 90, "score": 7.0, "country": "Ca", "verified": 0, "count": 1},
+    {"id": 6, "age": 40, "score": 2.0, "country": None, "verified": 0, "count": 2},
+    {"id": 7, "age": 25, "score": 3.0, "country": "ÉCOLE", "verified": 1, "count": 5},
+]
+
+SOURCES = [
+    '(condition.gt (basic.field "age") 18)',
+    '(condition.equal (basic.field "country") "MY")',
+    '(condition.equal (basic.field "country") (basic.value "us"))',
+    '(condition.le (basic.field "age") (number.multiply (basic.field "count") 10))',
+    '(condition.equal (condition.gt (basic.field "age") 18) (basic.field "verified"))',
+    '(boolean.and (condition.ge (basic.field "age") 18) (basic.field "verified"))',
+    '(boolean.or (condition.lt (basic.field "score") 1) (basic.field "count"))',
+    '(boolean.or (condition.gt (basic.field "age") 60) (basic.field "country"))',
+    "(boolean.or (boolean.contradiction) (boolean.tautology))",
+    "(boolean.and)",
+    "(boolean.or)",
+    '(boolean.not (basic.field "count"))',
+    '(boolean.not (basic.field "country"))',
+    '(boolean.not (boolean.and (basic.field "verified") (basic.field "count")))',
+    '(basic.field "count")',
+    '(basic.field "score")',
+    '(condition.gt (number.add (basic.field "age") (basic.field "count") 1) 40)',
+    '(condition.lt (number.subtract (basic.field "age") (basic.field "score")) 20)',
+    '(condition.ge (number.divide (basic.field "age") 4) 7.5)',
+    '(condition.equal (number.divide (basic.field "age") 4) 7.5)',
+    '(condition.equal (number.modulo (basic.field "count") 3) 1)',
+    '(condition.equal (number.modulo (basic.field "score") 2) 1.5)',
+    '(condition.gt (number.modulo (basic.field "age") -7) -3)',
+    '(condition.in (basic.field "country") ("MY" "us" "Ca"))',
+    '(condition.in (basic.field "age") (18 "30" 65.0))',
+    '(condition.in (basic.field "country") (basic.value ("MY" 1)))',
+    '(condition.in (basic.field "country") ())',
+    '(condition.not_in (basic.field "country") ("MY" "us"))',
+    '(condition.is_none (basic.field "country"))',
+    '(boolean.not (condition.is_none (basic.field "country")))',
+    '(boolean.and (boolean.not (condition.is_none (basic.field "country"))) '
+    '(condition.equal (string.concat "-" (basic.field "country") "x") "MY-x"))',
+    '(boolean.and (basic.field "verified") (condition.gt (basic.field "age") 20) '
+    '(condition.lt (basic.field "age") 80))',
+]
+
+# translated with some conjuncts evaluated in Python
+RESIDUAL_SOURCES = [
+    '(boolean.and (condition.gt (basic.field "age") 18) '
+    '(condition.is_true (condition.gt (basic.field "count") 0)))',
+    '(boolean.and (condition.ge (basic.field "age") 18) '
+    '(boolean.and (condition.in "a" (basic.coalesce (basic.field "country") "")) '
+    '(basic.field "verified")))',
+    '(condition.equal (string.field "age") "18")',
+    '(boolean.and (condition.equal (basic.field "country") "MY") '
+    '(condition.equal (basic.coalesce (basic.field "country") "") "MY"))',
+    '(boolean.and (boolean.not (condition.is_none (basic.field "country"))) '
+    '(condition.equal (string.lower (basic.field "country")) "école"))',
+    '(boolean.and (boolean.not (condition.is_none (basic.field "country"))) '
+    '(condition.in (string.lower (basic.field "country")) ("my" "ca")))',
+]
+
+
+@pytest.fixture(scope="module")
+def connection():
+    connection = sqlite3.connect(":memory:")
+    connection.row_factory = sqlite3.Row
+    # columns without a declared type keep values as they are given
+    connection.execute(f"CREATE TABLE rows ({', '.join(ROWS[0])})")
+    connection.executemany(
+        f"INSERT INTO rows VALUES ({', '.join('?' * len(ROWS[0]))})",
+        [tuple(row.values()) for row in ROWS],
+    )
+
+    yield connection
+
+    connection.close()
+
+
+def select(connection, predicate):
+    return [
+        row["id"]
+        for row in connection.execute(
+            f"SELECT * FROM rows WHERE {predicate.where} ORDER BY id",
+            predicate.parameters,
+        )
+        if predicate.matches(dict(row))
+    ]
+
+
+@pytest.mark.parametrize("source", SOURCES)
+def test_sql_parity(connection, source):
+    """Test the translated clause selects the rows the rule matches."""
+    rule = ruler.parse(source)
+    predicate = to_sql(rule)
+
+    assert predicate.residuals == (), source
+    assert select(connection, predicate) == [row["id"] for row in ROWS if rule(row)]
+
+
+@pytest.mark.parametrize("source", RESIDUAL_SOURCES)
+def test_sql_residuals(connection, source):
+    """Test conjuncts that are not translated are evaluated against the rows."""
+    rule = ruler.parse(source)
+    predicate = to_sql(rule)
+
+    assert predicate.residuals
+    assert select(connection, predicate) == [row["id"] for row in ROWS if rule(row)]
+
+
+def test_sql_clause():
+    """Test constants are passed as parameters in the order of placeholders."""
+    predicate = to_sql(
+        ruler.parse(
+            '(boolean.and (condition.gt (basic.field "age") 18) '
+            '(condition.in (basic.field "country") ("MY" "US")))'
+        )
+    )
+
+    assert predicate.where == ('("age" > ?) AND COALESCE("country" IN (?, ?), 0)')
+    assert predicate.parameters == (18, "MY", "US")
+
+    predicate = to_sql(
+        ruler.parse('(condition.equal (number.modulo (basic.field "a") 3) 1)')
+    )
+    assert predicate.where.count("?") == len(predicate.parameters)
+
+
+def test_sql_residual_report():
+    """Test residuals report the subtree and why it was not translated."""
+    predicate = to_sql(
+        ruler.parse(
+            '(boolean.and (condition.gt (basic.field "age") 18) '
+            '(condition.is_true (basic.field "verified")))'
+        )
+    )
+
+    assert predicate.where == '("age" > ?)'
+    [residual] = predicate.residuals
+    assert residual.source == '(condition.is_true (basic.field "verified"))'
+    assert "condition.is_true" in residual.reason
+
+    predicate = to_sql(ruler.parse('(condition.is_true (basic.field "verified"))'))
+    assert predicate.where == "1"
+    assert predicate.parameters == ()
+    assert predicate.matches({"verified": True})
+    assert not predicate.matches({"verified": 1})
+
+
+def test_sql_env_functions():
+    """Test env functions are left to be evaluated in Python."""
+
+    class Env:
+        @staticmethod
+        def adult(argument):
+            return lambda ctx: ruler.library.compute(argument, ctx) >= 18
+
+    predicate = to_sql(
+        ruler.parse(
+            '(boolean.and (adult (basic.field "age")) (condition.equal (basic.field "verified") 1))',
+            env=Env,
+        )
+    )
+
+    assert predicate.where == '("verified" IS ?)'
+    assert [residual.source for residual in predicate.residuals] == [
+        '(adult (basic.field "age"))'
+    ]
+
+
+def test_unparse():
+    """Test unparsed trees read back into the same tree."""
+    for source in SOURCES + RESIDUAL_SOURCES:
+        node = ruler.compile(source, optimize=False, cache=None).node
+
+        assert ruler.compile(unparse(node), optimize=False, cache=None).node == node
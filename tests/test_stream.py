@@ -0,0 +1,272 @@
+import io
+import json
+import os
+from itertools import count, islice
+
+import pytest
+
+import genruler as ruler
+from genruler import stream
+
+RULE = '(condition.gt (basic.field "age") 18)'
+
+LINES = [
+    b'{"age": 21, "name": "Ann"}\n',
+    b'{ "age" : 12,"name":"Bob" }\n',
+    b"\n",
+    b'{"age": 40, "name": "J\\u00f8rn"}\r\n',
+    b'{"age": 19}',
+]
+
+
+@pytest.fixture
+def jsonl(tmp_path):
+    path = tmp_path / "records.jsonl"
+    path.write_bytes(b"".join(LINES))
+
+    return path
+
+
+@pytest.mark.parametrize("use_mmap", [False, True])
+def test_read_jsonl(jsonl, use_mmap):
+    """Test JSON Lines are decoded with their raw bytes and line numbers."""
+    records = list(stream.read_jsonl(jsonl, use_mmap=use_mmap))
+
+    assert [record.raw for record in records] == [LINES[0], LINES[1], *LINES[3:]]
+    assert [record.value["age"] for record in records] == [21, 12, 40, 19]
+    assert [record.line for record in records] == [1, 2, 4, 5]
+    assert records[2].value["name"] == "Jørn"
+
+
+def test_read_jsonl_file_objects():
+    """Test binary file objects, such as standard input, are read."""
+    records = stream.read_jsonl(io.BytesIO(b"".join(LINES)))
+
+    assert [record.value.get("name") for record in records] == [
+        "Ann",
+        "Bob",
+        "Jørn",
+        None,
+    ]
+
+
+@pytest.mark.parametrize("use_mmap", [False, True])
+def test_read_jsonl_empty(tmp_path, use_mmap):
+    """Test empty files have no records."""
+    path = tmp_path / "empty.jsonl"
+    path.write_bytes(b"")
+
+    assert list(stream.read_jsonl(path, use_mmap=use_mmap)) == []
+
+
+def test_read_jsonl_pipe():
+    """Test pipes, which cannot be mapped, are read when asked to map them."""
+    read, write = os.pipe()
+    with os.fdopen(write, "wb") as file:
+        file.write(b'{"a": 1}\n{"a": 2}\n')
+
+    with os.fdopen(read, "rb") as file:
+        records = list(stream.read_jsonl(file, use_mmap=True))
+
+    assert [record.value for record in records] == [{"a": 1}, {"a": 2}]
+
+
+def test_read_jsonl_invalid(tmp_path):
+    """Test decoding errors note the line of the invalid record."""
+    path = tmp_path / "invalid.jsonl"
+    path.write_bytes(b'{"a": 1}\n{"a": \n')
+
+    with pytest.raises(json.JSONDecodeError) as e:
+        list(stream.read_jsonl(path))
+
+    assert "On line 2" in e.value.__notes__
+
+
+CSV = (
+    b"name,age,note\r\n"
+    b"Ann,21,plain\r\n"
+    b'Bob,12,"two\r\nlines, quoted"\r\n'
+    b"\r\n"
+    b"Cid,40\r\n"
+)
+
+
+@pytest.mark.parametrize("use_mmap", [False, True])
+def test_read_csv(tmp_path, use_mmap):
+    """Test rows are read as dictionaries with their raw bytes."""
+    path = tmp_path / "records.csv"
+    path.write_bytes(CSV)
+
+    records = list(stream.read_csv(path, use_mmap=use_mmap))
+
+    assert [record.value for record in records] == [
+        {"name": "Ann", "age": "21", "note": "plain"},
+        {"name": "Bob", "age": "12", "note": "two\r\nlines, quoted"},
+        {"name": "Cid", "age": "40", "note": None},
+    ]
+    assert [record.raw for record in records] == [
+        b"Ann,21,plain\r\n",
+        b'Bob,12,"two\r\nlines, quoted"\r\n',
+        b"Cid,40\r\n",
+    ]
+    assert [record.line for record in records] == [2, 3, 6]
+
+    header = stream.read_header(path)
+    assert header.raw == b"name,age,note\r\n"
+    assert header.value == ["name", "age", "note"]
+
+
+def test_read_csv_options():
+    """Test field names and formatting parameters can be given."""
+    source = io.BytesIO(b"Ann;21\nBob;12\n")
+
+    records = stream.read_csv(source, fieldnames=["name", "age"], delimiter=";")
+
+    assert [record.value for record in records] == [
+        {"name": "Ann", "age": "21"},
+        {"name": "Bob", "age": "12"},
+    ]
+    assert list(stream.read_csv(io.BytesIO(b""))) == []
+
+
+def test_write_passes_raw_lines_through(jsonl, tmp_path):
+    """Test matching records are written as the bytes they were read from."""
+    rule = ruler.compile(RULE)
+    output = tmp_path / "matches.jsonl"
+
+    written = stream.write(stream.filter(rule, stream.read_jsonl(jsonl)), output)
+
+    assert written == 3
+    assert output.read_bytes() == LINES[0] + LINES[3] + LINES[4] + b"\n"
+
+
+def test_write_csv_header(tmp_path):
+    """Test CSV files are filtered with their header copied through."""
+    path = tmp_path / "records.csv"
+    path.write_bytes(CSV)
+    buffer = io.BytesIO()
+
+    rule = ruler.compile('(condition.lt (basic.field "name") "C")')
+    stream.write(
+        stream.filter(rule, stream.read_csv(path)),
+        buffer,
+        header=stream.read_header(path).raw,
+    )
+
+    assert buffer.getvalue() == CSV[: CSV.index(b"\r\n\r\n") + 2]
+
+
+def test_filter_map_contexts():
+    """Test the stages evaluate contexts that are not records as they are."""
+    rule = ruler.compile(RULE)
+    contexts = [{"age": age} for age in [10, 20, 30, 5]]
+
+    assert list(stream.filter(rule, contexts, chunk_size=3)) == contexts[1:3]
+    assert list(stream.map(rule, contexts, chunk_size=3)) == [
+        False,
+        True,
+        True,
+        False,
+    ]
+
+
+def test_filter_is_lazy():
+    """Test the stages consume no more than a chunk ahead of their output."""
+    rule = ruler.compile(RULE)
+    consumed = []
+
+    def contexts():
+        for age in count():
+            consumed.append(age)
+            yield {"age": age}
+
+    matches = list(islice(stream.filter(rule, contexts(), chunk_size=10), 5))
+
+    assert [match["age"] for match in matches] == [19, 20, 21, 22, 23]
+    assert len(consumed) == 30
+
+
+def test_partition():
+    """Test items are split on the rule, in order, from a single pass."""
+    rule = ruler.compile(RULE)
+    consumed = []
+
+    def contexts():
+        for age in [30, 10, 40, 50, 5, 60]:
+            consumed.append(age)
+            yield {"age": age}
+
+    adults, minors = stream.partition(rule, contexts(), chunk_size=2)
+
+    assert next(minors) == {"age": 10}
+    assert consumed == [30, 10]
+    assert [adult["age"] for adult in adults] == [30, 40, 50, 60]
+    assert [minor["age"] for minor in minors] == [5]
+
+
+def test_partition_records(jsonl):
+    """Test records are split with their raw bytes."""
+    rule = ruler.compile(RULE)
+    adults, minors = stream.partition(rule, stream.read_jsonl(jsonl))
+
+    assert [record.line for record in minors] == [2]
+    assert [record.line for record in adults] == [1, 4, 5]
+
+
+def test_throughput():
+    """Test the throughput counts items and measures their rate."""
+    throughput = stream.Throughput()
+
+    assert throughput.count == 0
+    assert throughput.rate == 0.0
+
+    items = throughput.measure(range(1000))
+    assert sum(items) == 499500
+
+    assert throughput.count == 1000
+    assert throughput.elapsed > 0
+    assert throughput.rate == pytest.approx(1000 / throughput.elapsed)
+    assert "1000 items" in repr(throughput)
+
+    list(throughput.measure(range(10)))
+    assert throughput.count == 1010
+
+
+def test_read_jsonl_prefilter(tmp_path):
+    """Test lines without the guarded values are skipped undecoded."""
+    path = tmp_path / "events.jsonl"
+    path.write_bytes(
+        b'{"type": "click", "price": 60}\n'
+        b'{"type": "view", "price": 70}\n'
+        b"not even json, never decoded\n"
+        b'{"type": "cl\\u0069ck", "price": 80}\n'
+        b'{"type": "purchase", "note": "click", "price": 90}\n'
+        b'{"type": "purchase", "price": 40}\n'
+    )
+    rule = ruler.compile(
+        '(boolean.and (condition.in (basic.field "type") ("click" "buy")) '
+        '(condition.gt (basic.field "price") 50))'
+    )
+
+    records = list(stream.read_jsonl(path, prefilter=rule))
+    assert [record.line for record in records] == [1, 4, 5]
+    assert [record.line for record in stream.filter(rule, records)] == [1, 4]
+
+
+def test_read_jsonl_prefilter_unguarded(jsonl):
+    """Test rules without a guard on string values skip nothing."""
+    for source in [RULE, '(condition.equal (basic.field "age") 21)']:
+        records = stream.read_jsonl(jsonl, prefilter=ruler.compile(source))
+        assert len(list(records)) == 4
+
+
+def test_read_header_file_objects():
+    """Test rows are read after the header of a file object, which stays open."""
+    source = io.BytesIO(CSV)
+
+    header = stream.read_header(source)
+    records = list(stream.read_csv(source, fieldnames=header.value))
+
+    assert header.raw == b"name,age,note\r\n"
+    assert [record.value["name"] for record in records] == ["Ann", "Bob", "Cid"]
+    assert not source.closed
@@ -0,0 +1,27 @@
+from benchmarks.suite import compare
+
+
+def results(**metrics):
+    return {"results": {"workload": metrics}}
+
+
+def test_compare_throughput():
+    """Test throughput metrics regress when they drop, not when they rise."""
+    baseline = results(call_python_per_s=1000.0, many_closure_per_s=1000.0)
+
+    assert compare(baseline, results(call_python_per_s=2000.0), 0.1) == []
+    assert compare(baseline, results(many_closure_per_s=500.0), 0.1) == [
+        "workload many_closure_per_s: 1,000.00 -> 500.00 (-50.0%)"
+    ]
+
+
+def test_compare_latency():
+    """Test every other metric regresses when it rises beyond the threshold."""
+    baseline = results(compile_us_python=10.0, blocks_per_rule=4.0)
+
+    assert compare(baseline, results(compile_us_python=5.0), 0.1) == []
+    assert compare(baseline, results(blocks_per_rule=4.2), 0.1) == []
+    assert compare(baseline, results(compile_us_python=20.0), 0.1) == [
+        "workload compile_us_python: 10.00 -> 20.00 (+100.0%)"
+    ]
+    assert compare(results(), results(compile_us_python=20.0), 0.1) == []